@@ -0,0 +1,247 @@
+"""
+Adaptive concurrency limiter for rate-limited backends.
+
+Uses additive-increase / multiplicative-decrease (AIMD): the concurrency
+limit grows by roughly one per round of healthy responses and is cut when
+the backend answers with a rate limit, times out or slows down past the
+latency target. Retry-After hints pause dispatch entirely, and requests
+beyond the limit wait in a FIFO queue until their deadline.
+"""
+import asyncio
+import email.utils
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+# Maps an exception to (is_overload, retry_after_seconds)
+Classifier = Callable[[BaseException], Tuple[bool, Optional[float]]]
+
+
+class LimiterRejectedError(Exception):
+    """Raised when a request could not get a slot before its deadline or the queue is full."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Delay in seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _default_classifier(exc: BaseException) -> Tuple[bool, Optional[float]]:
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError)), None
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with a deadline-aware wait queue."""
+
+    def __init__(
+        self,
+        initial_limit: float = Numbers.AI_LIMIT_INITIAL,
+        min_limit: float = Numbers.AI_LIMIT_MIN,
+        max_limit: float = Numbers.AI_LIMIT_MAX,
+        latency_target: float = Numbers.AI_LATENCY_TARGET_SECONDS,
+        backoff_factor: float = Numbers.AI_LIMIT_BACKOFF_FACTOR,
+        max_queue: int = Numbers.AI_QUEUE_MAX,
+        classify: Classifier = _default_classifier,
+        name: str = "backend",
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_factor = backoff_factor
+        self.max_queue = max_queue
+        self.classify = classify
+        self.name = name
+
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._unblock_handle: Optional[asyncio.TimerHandle] = None
+
+        self.completed = 0
+        self.overloads = 0
+        self.rejected = 0
+        self.last_latency = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """Requests currently allowed in flight."""
+        return max(1, int(self.limit))
+
+    def _can_dispatch(self) -> bool:
+        return self.in_flight < self.capacity and time.monotonic() >= self.blocked_until
+
+    def _on_unblock(self) -> None:
+        self._unblock_handle = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to queued requests in arrival order."""
+        remaining = self.blocked_until - time.monotonic()
+        if remaining > 0:
+            if self._waiters and self._unblock_handle is None:
+                self._unblock_handle = asyncio.get_running_loop().call_later(remaining, self._on_unblock)
+            return
+        while self._waiters and self.in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue  # Timed out or cancelled while queued
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Wait for a slot.
+
+        Args:
+            deadline: time.monotonic() value after which to give up
+
+        Raises:
+            LimiterRejectedError: If the queue is full or the deadline passes
+        """
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        if not self._waiters and self._can_dispatch():
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LimiterRejectedError(f"{self.name} queue is full ({self.max_queue} waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted at the last moment; keep the slot
+                return
+            waiter.cancel()
+            self.rejected += 1
+            raise LimiterRejectedError(f"{self.name} did not free a slot before the deadline")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                waiter.cancel()
+            raise
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def record(self, started: float, latency: float, exc: Optional[BaseException] = None) -> None:
+        """Adjust the limit from one completed request."""
+        self.last_latency = latency
+        overload, retry_after = (False, None) if exc is None else self.classify(exc)
+        if exc is None:
+            self.completed += 1
+
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            logger.warning(f"{self.name} asked us to back off for {retry_after:.1f}s")
+
+        if overload or (exc is None and latency > self.latency_target):
+            if overload:
+                self.overloads += 1
+            # Cut once per round: responses to requests sent before the last cut are ignored
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+                self._last_decrease = time.monotonic()
+                logger.info(f"{self.name} limit decreased to {self.limit:.2f} (latency {latency:.2f}s)")
+        elif exc is None:
+            if self.in_flight >= self.capacity - 1:
+                # Only grow when we were actually using the allowance
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        deadline: Optional[float] = None,
+        max_requeues: int = Numbers.AI_LIMITER_MAX_REQUEUES,
+        **kwargs,
+    ) -> Any:
+        """
+        Run a backend call under the limiter.
+
+        Overloaded calls go back in the queue while the deadline allows,
+        after any Retry-After pause. A requeued call that cannot run again
+        before its deadline fails with the error of its last attempt.
+
+        Raises:
+            LimiterRejectedError: If no slot was available before the deadline
+        """
+        attempt = 0
+        last_error: Optional[Exception] = None
+        while True:
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.rejected += 1
+                    raise LimiterRejectedError(f"{self.name} request deadline passed")
+                await self.acquire(deadline)
+            except LimiterRejectedError:
+                if last_error is None:
+                    raise
+                # Report why the call failed, not that its retry ran out of time
+                raise last_error from None
+            started = time.monotonic()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                self.record(started, time.monotonic() - started, e)
+                overload, _ = self.classify(e)
+                attempt += 1
+                # Don't requeue a call that could only run again after its deadline
+                resume_at = max(time.monotonic(), self.blocked_until)
+                if not overload or attempt > max_requeues or (deadline is not None and resume_at >= deadline):
+                    raise
+                logger.info(f"Requeueing {self.name} request after overload (attempt {attempt})")
+                last_error = e
+                continue
+            else:
+                self.record(started, time.monotonic() - started)
+                return result
+            finally:
+                self._release_slot()
+
+    def stats(self) -> Dict[str, Any]:
+        """Limiter state for health reporting."""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": sum(1 for waiter in self._waiters if not waiter.done()),
+            "completed": self.completed,
+            "overloads": self.overloads,
+            "rejected": self.rejected,
+            "last_latency": self.last_latency,
+            "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+        }
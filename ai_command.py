@@ -5,16 +5,29 @@ import os
 import json
 import asyncio
 from datetime import datetime, timedelta
-from openai import OpenAI
+from openai import AsyncOpenAI
 from config import OPENAI_API_KEY
 from config import TWITCH_PREFIX
+from adaptive_limiter import AdaptiveLimiter, LimiterRejectedError, parse_retry_after
+from ai_queue import AIPriority, AIWorkQueue
+from semantic_cache import SemanticCache
+from usage_ledger import UsageLedger
+from job_scheduler import job_scheduler
+from metrics import ai_cost_dollars_total, ai_latency_seconds, ai_requests_total, ai_tokens_total
+import tracing
+from retry_utils import (
+    OPENAI_TRANSIENT_ERRORS,
+    CircuitBreakerOpenError,
+    get_circuit_breaker,
+    resilient_call,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
+# Initialize OpenAI client; retries are handled by our resilience layer
 try:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
     logger.info("OpenAI client initialized")
 except Exception as e:
     logger.error(f"Failed to initialize OpenAI client: {e}")
@@ -26,6 +39,32 @@ user_conversations = {}
 # Import constants
 from constants import Numbers, Paths, Messages, Models
 
+# Repeated transient OpenAI failures open this breaker so requests fail fast
+get_circuit_breaker(
+    "openai",
+    failure_threshold=Numbers.AI_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=Numbers.AI_BREAKER_RECOVERY_SECONDS,
+    expected_exception=OPENAI_TRANSIENT_ERRORS,
+)
+
+def _classify_openai_error(exc):
+    """Tell the adaptive limiter whether an error means the API is overloaded"""
+    if isinstance(exc, openai.RateLimitError):
+        headers = exc.response.headers if exc.response is not None else {}
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after is None and headers.get("retry-after-ms"):
+            retry_after = parse_retry_after(headers["retry-after-ms"])
+            retry_after = retry_after / 1000 if retry_after is not None else None
+        return True, retry_after
+    # 5xx from OpenAI means it is overloaded; timeouts are the early sign of the same
+    return isinstance(exc, (openai.APITimeoutError, openai.InternalServerError, asyncio.TimeoutError)), None
+
+# Concurrency towards OpenAI adapts to observed latency and 429s
+ai_limiter = AdaptiveLimiter(classify=_classify_openai_error, name="openai")
+
+# Orders AI work by priority and user fairness; released as the limiter frees capacity
+ai_queue = AIWorkQueue(capacity=lambda: ai_limiter.capacity)
+
 # Rate limiting configuration
 request_timestamps = []
 user_request_timestamps = {}  # Keep track of per-user timestamps
@@ -33,6 +72,25 @@ user_request_timestamps = {}  # Keep track of per-user timestamps
 # Cache for recent AI responses
 response_cache = {}
 
+# Near-duplicate prompts from any user reuse a recent answer
+semantic_cache = SemanticCache()
+
+# Token usage and spend per user, channel and model, with daily budgets
+usage_ledger = UsageLedger()
+
+# Module-level state carried over when handlers are hot reloaded (see reloader.py)
+_RELOAD_STATE = (
+    "client",
+    "user_conversations",
+    "response_cache",
+    "request_timestamps",
+    "user_request_timestamps",
+    "ai_limiter",
+    "ai_queue",
+    "semantic_cache",
+    "usage_ledger",
+)
+
 # Create cache directory if it doesn't exist
 os.makedirs(Paths.AI_CACHE_DIR, exist_ok=True)
 
@@ -42,7 +100,6 @@ CONVERSATION_FILE = Paths.CONVERSATIONS_FILE
 CACHE_EXPIRY = Numbers.CACHE_EXPIRY_SECONDS
 MAX_CACHE_SIZE = Numbers.MAX_CACHE_SIZE
 MAX_CONVERSATION_HISTORY = Numbers.MAX_CONVERSATION_HISTORY
-MAX_REQUESTS_PER_MINUTE = Numbers.MAX_REQUESTS_PER_MINUTE
 MAX_REQUESTS_PER_USER_MINUTE = Numbers.MAX_REQUESTS_PER_USER_MINUTE
 MAX_MESSAGE_LENGTH = Numbers.MAX_MESSAGE_LENGTH
 
@@ -94,21 +151,55 @@ def save_conversations():
     except Exception as e:
         logger.error(f"Failed to save user conversations: {e}")
 
+def snapshot_state():
+    """Snapshot AI cache, conversations and rate-limit windows for checkpoints"""
+    # Cache entries and history messages are never mutated in place, so copying
+    # the containers is enough to detach the snapshot from live state
+    return {
+        "response_cache": dict(response_cache),
+        "user_conversations": {k: list(v) for k, v in user_conversations.items()},
+        "request_timestamps": list(request_timestamps),
+        "user_request_timestamps": {k: list(v) for k, v in user_request_timestamps.items()},
+    }
+
+def restore_state(state):
+    """Restore AI module state from a checkpoint"""
+    global response_cache, user_conversations, request_timestamps, user_request_timestamps
+    current_time = time.time()
+    response_cache = {
+        k: v for k, v in state.get("response_cache", {}).items()
+        if v.get('timestamp', 0) + CACHE_EXPIRY > current_time
+    }
+    user_conversations = state.get("user_conversations", user_conversations)
+    request_timestamps = state.get("request_timestamps", [])
+    user_request_timestamps = state.get("user_request_timestamps", {})
+
 # Load cached data at module initialization
 load_cache()
 load_conversations()
+usage_ledger.load()
 
-# Set up periodic cache saving
-async def periodic_cache_save():
-    """Periodically save cache and conversations to disk"""
-    while True:
-        await asyncio.sleep(300)  # Save every 5 minutes
-        save_cache()
-        save_conversations()
+def periodic_cache_save():
+    """Save cache and conversations to disk"""
+    save_cache()
+    save_conversations()
 
-def start_periodic_save(loop):
-    """Start the periodic save task"""
-    loop.create_task(periodic_cache_save())
+def start_periodic_save(scheduler=job_scheduler, save_files=True):
+    """
+    Schedule the AI module's periodic persistence on the job scheduler.
+
+    Args:
+        scheduler: Job scheduler to add the jobs to
+        save_files: Also save the cache and conversations files; pass False
+            when a checkpointer already snapshots them
+    """
+    scheduler.add_interval(
+        "ai_usage_rollup", usage_ledger.rollup_async, Numbers.PERIODIC_SAVE_INTERVAL, jitter=Numbers.JOB_DEFAULT_JITTER
+    )
+    if save_files:
+        scheduler.add_interval(
+            "ai_cache_save", periodic_cache_save, Numbers.PERIODIC_SAVE_INTERVAL, jitter=Numbers.JOB_DEFAULT_JITTER
+        )
 
 def add_to_cache(user_id, prompt, response):
     """Add a response to the cache"""
@@ -137,7 +228,7 @@ def get_from_cache(user_id, prompt):
         entry = response_cache[cache_key]
         # Check if the entry is still valid
         if entry['timestamp'] + CACHE_EXPIRY > time.time():
-            logger.info(f"Cache hit for user {user_id}")
+            logger.debug("Cache hit for user %s", user_id)
             return entry['response']
         else:
             # Remove expired entry
@@ -147,24 +238,21 @@ def get_from_cache(user_id, prompt):
 
 def check_rate_limit(user_id=None):
     """
-    Check if we've exceeded our rate limit
+    Check if a user has exceeded their rate limit
     Args:
         user_id: Optional user ID to check user-specific rate limit
 
     Returns True if we can proceed, False if we're rate limited
+
+    Global throughput is governed by ai_limiter, which adapts to what the
+    API allows; the global window here only tracks recent request volume.
     """
     current_time = time.time()
 
-    # Check global rate limit
     # Remove timestamps older than 60 seconds
     global request_timestamps
     request_timestamps = [t for t in request_timestamps if current_time - t < 60]
 
-    # Check if we've exceeded our global limit
-    if len(request_timestamps) >= MAX_REQUESTS_PER_MINUTE:
-        logger.warning(f"Global rate limit exceeded: {len(request_timestamps)} requests in the last minute")
-        return False
-
     # Check user-specific rate limit if user_id is provided
     if user_id:
         if user_id not in user_request_timestamps:
@@ -198,7 +286,7 @@ async def check_ai_health():
 
         # Make a simple, minimal API call to test connectivity
         model_name = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model_name,
             messages=[
                 {"role": "system", "content": "You are a health check. Respond with 'OK'."},
@@ -222,6 +310,16 @@ async def check_ai_health():
     except Exception as e:
         return f"ERROR ({str(e)[:30]}...)"
 
+def request_priority(message, custom_prompt=None):
+    """Pick the AI queue class for a request"""
+    if custom_prompt:
+        return AIPriority.WELCOME
+    author = message.author
+    is_broadcaster = author.name.lower() == message.channel.name.lower()
+    if author.is_mod or is_broadcaster or getattr(author, 'is_subscriber', False):
+        return AIPriority.PRIVILEGED
+    return AIPriority.COMMAND
+
 async def handle_ai_command(bot, message, custom_prompt=None):
     try:
         # Import cooldown manager
@@ -230,7 +328,8 @@ async def handle_ai_command(bot, message, custom_prompt=None):
         # Check cooldown for AI command (only for non-custom prompts)
         if not custom_prompt:
             is_mod = message.author.is_mod or message.author.name.lower() == message.channel.name.lower()
-            on_cooldown, remaining = cooldown_manager.is_on_cooldown('ai', message.author.name, is_mod)
+            with tracing.span("cooldown"):
+                on_cooldown, remaining = cooldown_manager.is_on_cooldown('ai', message.author.name, is_mod)
             if on_cooldown:
                 await message.channel.send(
                     f"@{message.author.name} AI command on cooldown! "
@@ -267,19 +366,42 @@ async def handle_ai_command(bot, message, custom_prompt=None):
         from validation_utils import sanitize_ai_prompt
         prompt = sanitize_ai_prompt(prompt)
 
-        logger.info(f"Processing AI command from {user_id}: {prompt[:50]}{'...' if len(prompt) > 50 else ''}")
+        logger.debug("Processing AI command from %s: %.50s", user_id, prompt)
 
         # Check rate limiting for this user
         if not check_rate_limit(user_id):
+            ai_requests_total.labels("rate_limited").inc()
             remaining_time = 60 - max([time.time() - t for t in user_request_timestamps.get(user_id, [time.time() - 61])])
             await message.channel.send(f"You're using the AI too frequently! Please wait {int(remaining_time)} seconds before trying again.")
             return
 
         # Check if we have a cached response
-        cached_response = get_from_cache(user_id, prompt)
+        with tracing.span("cache_lookup"):
+            cached_response = get_from_cache(user_id, prompt)
         if cached_response:
+            ai_requests_total.labels("cache").inc()
             await message.channel.send(cached_response)
-            logger.info(f"Sent cached AI response to {user_id}")
+            logger.info("Sent cached AI response to %s", user_id, extra={"user": user_id, "ai_source": "cache"})
+            return
+
+        # Welcome prompts embed the chatter's name and message, so only ?ai uses the similarity tier
+        if not custom_prompt:
+            with tracing.span("similar_lookup"):
+                similar_response = semantic_cache.lookup(prompt)
+            if similar_response:
+                add_to_cache(user_id, prompt, similar_response)
+                ai_requests_total.labels("similar").inc()
+                await message.channel.send(similar_response)
+                logger.info("Sent similar cached AI response to %s", user_id, extra={"user": user_id, "ai_source": "similar"})
+                return
+
+        # Budgets can throttle the request or move it to a cheaper model
+        model_name = os.getenv("OPENAI_MODEL", Models.DEFAULT_OPENAI_MODEL)
+        allowed, model_name = usage_ledger.check(user_id, message.channel.name, model_name)
+        if not allowed:
+            ai_requests_total.labels("over_budget").inc()
+            if not custom_prompt:
+                await message.channel.send(Messages.AI_BUDGET_EXCEEDED)
             return
 
         # Get user's conversation history or create new one
@@ -287,7 +409,8 @@ async def handle_ai_command(bot, message, custom_prompt=None):
             user_conversations[user_id] = []
 
         # Add user's message to history
-        user_conversations[user_id].append({"role": "user", "content": prompt})
+        user_message = {"role": "user", "content": prompt}
+        user_conversations[user_id].append(user_message)
 
         # Keep only last 10 messages to avoid token limits
         if len(user_conversations[user_id]) > 10:
@@ -302,71 +425,112 @@ async def handle_ai_command(bot, message, custom_prompt=None):
             *user_conversations[user_id],
         ]
 
-        # Make API call with timeout protection and retries
-        max_retries = 2
-        # Get model from environment or use default
-        model_name = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        priority = request_priority(message, custom_prompt)
+        deadline = time.monotonic() + (
+            Numbers.AI_WELCOME_DEADLINE_SECONDS if priority == AIPriority.WELCOME
+            else Numbers.AI_COMMAND_DEADLINE_SECONDS
+        )
 
-        for retry in range(max_retries + 1):
-            try:
-                response = client.chat.completions.create(
+        # Ordered by the AI work queue and run behind the OpenAI breaker. The
+        # adaptive limiter is the only retry layer: it requeues timeouts, 429s
+        # and 5xx until the deadline. The queue runs this in its own task, so
+        # the trace is handed over explicitly.
+        trace = tracing.current()
+
+        async def request_completion():
+            with tracing.span("openai", trace):
+                return await resilient_call(
+                    "openai",
+                    ai_limiter.call,
+                    client.chat.completions.create,
+                    deadline=deadline,
                     model=model_name,
                     messages=messages,
                     max_tokens=150,
                     temperature=0.7,
-                    timeout=10  # 10-second timeout
+                    timeout=10,  # 10-second timeout per attempt
                 )
 
-                reply = response.choices[0].message.content
-
-                # Add assistant's reply to history
-                user_conversations[user_id].append({"role": "assistant", "content": reply})
-
-                # Add to cache
-                add_to_cache(user_id, prompt, reply)
-
-                await message.channel.send(reply)
-                logger.info(f"AI response sent to {user_id}")
-
-                # Set cooldown for AI command (only for non-custom prompts)
-                if not custom_prompt:
-                    cooldown_manager.set_cooldown('ai', message.author.name)
+        started = time.perf_counter()
+        try:
+            with tracing.span("ai_queue"):
+                response = await ai_queue.submit(user_id, priority, request_completion, deadline)
+        except CircuitBreakerOpenError:
+            ai_requests_total.labels("breaker_open").inc()
+            await message.channel.send(Messages.AI_UNAVAILABLE)
+            logger.warning(f"OpenAI circuit breaker open, rejected request from {user_id}")
+            return
+        except LimiterRejectedError as e:
+            ai_requests_total.labels("rejected").inc()
+            await message.channel.send(Messages.AI_OVERWHELMED)
+            logger.warning(f"AI request from {user_id} not admitted: {e}")
+            return
+        except (openai.APITimeoutError, asyncio.TimeoutError):
+            ai_requests_total.labels("timeout").inc()
+            await message.channel.send(Messages.AI_THINKING_TOO_HARD)
+            logger.warning(f"OpenAI API timeout for {user_id}, no retry fits before the deadline")
+            return
+        except openai.RateLimitError:
+            ai_requests_total.labels("openai_rate_limited").inc()
+            await message.channel.send(Messages.AI_OVERWHELMED)
+            logger.warning(f"OpenAI rate limit reached for {user_id}")
+            return
+        except openai.APIError as e:
+            ai_requests_total.labels("error").inc()
+            await message.channel.send(Messages.AI_TECHNICAL_DIFFICULTIES)
+            logger.error(f"OpenAI API error for {user_id}: {str(e)}")
+            return
+        except Exception as e:
+            ai_requests_total.labels("error").inc()
+            await message.channel.send(Messages.AI_ERROR_GENERIC)
+            logger.error(f"Error processing AI command: {str(e)}")
+            return
 
-                break  # Successfully processed, break out of retry loop
+        if response is None:
+            ai_requests_total.labels("dropped").inc()
+            # Sampled out, shed or stale before it could run; a late answer is worse than none
+            history = user_conversations.get(user_id, [])
+            history[:] = [entry for entry in history if entry is not user_message]
+            if priority != AIPriority.WELCOME:
+                await message.channel.send(Messages.AI_OVERWHELMED)
+            logger.info(f"AI request from {user_id} dropped by the work queue")
+            return
 
-            except (TimeoutError, asyncio.TimeoutError):
-                if retry < max_retries:
-                    logger.warning(f"OpenAI API timeout for {user_id}, retry {retry+1}/{max_retries}")
-                    await asyncio.sleep(1)  # Wait before retrying
-                else:
-                    await message.channel.send("The AI is thinking too hard right now. Please try again shortly! 🕒")
-                    logger.warning(f"OpenAI API timeout for {user_id} after {max_retries} retries")
-                    break
+        usage = getattr(response, "usage", None)
+        cost = usage_ledger.record(user_id, message.channel.name, model_name, usage)
+        ai_requests_total.labels("openai").inc()
+        ai_latency_seconds.observe(time.perf_counter() - started)
+        if usage is not None:
+            ai_tokens_total.labels("prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+            ai_tokens_total.labels("completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+            ai_cost_dollars_total.inc(cost)
+        reply = response.choices[0].message.content
+
+        # Add assistant's reply to history
+        user_conversations[user_id].append({"role": "assistant", "content": reply})
+
+        # Add to cache
+        add_to_cache(user_id, prompt, reply)
+        if not custom_prompt:
+            semantic_cache.add(prompt, reply)
+
+        await message.channel.send(reply)
+        # One structured line per completion; the details are fields, not prose
+        logger.info(
+            "AI response sent to %s", user_id,
+            extra={
+                "user": user_id,
+                "channel": message.channel.name,
+                "ai_source": "openai",
+                "model": model_name,
+                "tokens": getattr(usage, "total_tokens", None),
+                "cost": round(cost, 6),
+            },
+        )
 
-            except openai.RateLimitError:
-                await message.channel.send(
-                    "I'm a bit overwhelmed right now. Please try again in a moment! 🐺"
-                )
-                logger.warning(f"OpenAI rate limit reached for {user_id}")
-                break
-
-            except openai.APIError as e:
-                if retry < max_retries:
-                    logger.warning(f"OpenAI API error for {user_id}, retry {retry+1}/{max_retries}: {str(e)}")
-                    await asyncio.sleep(1)  # Wait before retrying
-                else:
-                    await message.channel.send(
-                        "Having some technical difficulties. Please try again later! 🛠️"
-                    )
-                    logger.error(f"OpenAI API error after {max_retries} retries: {str(e)}")
-                    break
-
-            except Exception as e:
-                await message.channel.send(
-                    "Sorry, I couldn't process that. Please try again later."
-                )
-                logger.error(f"Error processing AI command: {str(e)}")
-                break
+        # Set cooldown for AI command (only for non-custom prompts)
+        if not custom_prompt:
+            cooldown_manager.set_cooldown('ai', message.author.name)
 
     except Exception as e:
         logger.error(f"Unexpected error in handle_ai_command: {str(e)}")
@@ -0,0 +1,218 @@
+"""
+Priority work queue in front of the OpenAI limiter.
+
+Requests are ordered by class (mods and subscribers, then explicit ?ai
+commands, then first-time-chatter welcomes) and shared round-robin between
+users within a class, so one busy chatter cannot starve everyone else. Each
+request carries a deadline and is dropped once it passes instead of being
+answered late, and welcomes are sampled down while the queue is deep.
+Work is only released while the limiter has free capacity, so the ordering
+decided here is the order requests reach the API.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+
+class AIPriority(IntEnum):
+    """AI request classes; lower values are served first."""
+    PRIVILEGED = 0  # Mods, broadcaster and subscribers
+    COMMAND = 1     # Explicit ?ai from everyone else
+    WELCOME = 2     # Unprompted first-time-chatter welcomes
+
+
+@dataclass
+class AIJob:
+    """One queued AI request."""
+    user: str
+    priority: AIPriority
+    func: Callable[[], Awaitable[Any]]
+    deadline: float
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    expiry: Optional[asyncio.TimerHandle] = None
+
+
+class AIWorkQueue:
+    """Priority, deadline and fairness aware queue for AI requests."""
+
+    def __init__(
+        self,
+        capacity: Callable[[], int],
+        max_depth: int = Numbers.AI_WORK_QUEUE_MAX,
+        welcome_sample_depth: int = Numbers.AI_WELCOME_SAMPLE_DEPTH,
+        welcome_sample_rate: float = Numbers.AI_WELCOME_SAMPLE_RATE,
+    ):
+        """
+        Args:
+            capacity: Returns how many requests may run at once, usually the limiter's capacity
+            max_depth: Queued requests kept before the least important are shed
+            welcome_sample_depth: Queue depth above which welcomes are sampled
+            welcome_sample_rate: Fraction of welcomes kept while sampling
+        """
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self.welcome_sample_depth = welcome_sample_depth
+        self.welcome_sample_rate = welcome_sample_rate
+
+        # priority -> user -> that user's jobs; user order is the round-robin turn order
+        self._lanes: Dict[AIPriority, "OrderedDict[str, Deque[AIJob]]"] = {
+            priority: OrderedDict() for priority in AIPriority
+        }
+        self._depth = 0
+        self.running = 0
+        # Keep a reference to every running request so it isn't garbage collected mid-flight
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.dispatched = 0
+        self.completed = 0
+        self.expired = 0
+        self.sampled_out = 0
+        self.shed = 0
+        self.total_wait = 0.0
+
+    def depth(self) -> int:
+        """Number of requests waiting to run."""
+        return self._depth
+
+    def submit(
+        self,
+        user: str,
+        priority: AIPriority,
+        func: Callable[[], Awaitable[Any]],
+        deadline: float,
+    ) -> asyncio.Future:
+        """
+        Queue an AI request.
+
+        Args:
+            user: Requesting user, used for fair sharing
+            priority: Request class
+            func: Coroutine function performing the request
+            deadline: time.monotonic() value after which the request is dropped
+
+        Returns:
+            Future resolving to func's result, or None if the request was
+            sampled out, shed or expired before it could run
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if priority == AIPriority.WELCOME and self._depth >= self.welcome_sample_depth:
+            if random.random() >= self.welcome_sample_rate:
+                self.sampled_out += 1
+                future.set_result(None)
+                return future
+
+        if self._depth >= self.max_depth and not self._shed_below(priority):
+            self.shed += 1
+            logger.warning(f"AI queue full, dropping {priority.name.lower()} request from {user}")
+            future.set_result(None)
+            return future
+
+        job = AIJob(user, priority, func, deadline, future)
+        job.expiry = loop.call_later(max(0.0, deadline - time.monotonic()), self._expire, job)
+        self._lanes[priority].setdefault(user, deque()).append(job)
+        self._depth += 1
+        self._dispatch()
+        return future
+
+    def _remove(self, job: AIJob) -> None:
+        users = self._lanes[job.priority]
+        jobs = users.get(job.user)
+        if jobs is None:
+            return
+        jobs.remove(job)
+        if not jobs:
+            del users[job.user]
+        self._depth -= 1
+
+    def _shed_below(self, priority: AIPriority) -> bool:
+        """Drop the newest request of the least important class below priority."""
+        for lower in sorted(AIPriority, reverse=True):
+            if lower <= priority:
+                return False
+            users = self._lanes[lower]
+            if users:
+                # The user with the most queued work gives one up
+                user = max(users, key=lambda name: len(users[name]))
+                victim = users[user][-1]
+                self._remove(victim)
+                victim.expiry.cancel()
+                victim.future.set_result(None)
+                self.shed += 1
+                logger.info(f"AI queue full, shed {lower.name.lower()} request from {user}")
+                return True
+        return False
+
+    def _expire(self, job: AIJob) -> None:
+        if job.future.done():
+            return
+        self._remove(job)
+        self.expired += 1
+        logger.info(f"Dropped stale {job.priority.name.lower()} AI request from {job.user}")
+        job.future.set_result(None)
+
+    def _next_job(self) -> Optional[AIJob]:
+        for priority in AIPriority:
+            users = self._lanes[priority]
+            if users:
+                user, jobs = next(iter(users.items()))
+                job = jobs.popleft()
+                del users[user]
+                if jobs:
+                    # Back of the line until every other user has had a turn
+                    users[user] = jobs
+                self._depth -= 1
+                return job
+        return None
+
+    def _dispatch(self) -> None:
+        while self.running < self.capacity():
+            job = self._next_job()
+            if job is None:
+                return
+            job.expiry.cancel()
+            if job.future.done():
+                continue  # Caller gave up while queued
+            self.running += 1
+            self.dispatched += 1
+            self.total_wait += time.monotonic() - job.enqueued_at
+            task = asyncio.get_running_loop().create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: AIJob) -> None:
+        try:
+            result = await job.func()
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.running -= 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue state for health reporting."""
+        return {
+            "queued": self._depth,
+            "running": self.running,
+            "completed": self.completed,
+            "expired": self.expired,
+            "sampled_out": self.sampled_out,
+            "shed": self.shed,
+            "avg_wait_ms": (self.total_wait / self.dispatched * 1000) if self.dispatched else 0.0,
+        }
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for chat_filter.ChatFilter
+Feeds a realistic mix of chat (short messages, emote spam, floods and
+copypastas) through the filter stage and checks it sustains the
+10k messages/sec target.
+
+Usage:
+    python benchmarks/bench_chat_filter.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chat_filter import ChatFilter  # noqa: E402
+
+TARGET_PER_SECOND = 10_000
+MESSAGES = 200_000
+
+SAMPLES = [
+    "murphy who is peks",
+    "?join",
+    "?ai what do you think about the last game",
+    "LUL",
+    "KEKW KEKW KEKW KEKW",
+    "okayCousin okayCousin okayCousin",
+    "that was actually a insane play by the jungler, did you see the flash",
+    "W",
+    "GGGGGGGGGGGGGGGGGGGGGGGGGGGGGGGGG",
+    "!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!",
+    "WHY IS NOBODY TALKING ABOUT THIS ?!?!?!?!",
+    "▬▬▬▬▬▬▬▬▬▬▬▬▬▬ ░░░░░░░░ copypasta ░░░░░░░░ ▬▬▬▬▬▬▬▬▬▬▬▬▬▬",
+    "peks when the wave is crashing into tower but he is still farming the raptors " * 4,
+]
+
+
+def build_messages(count):
+    """Sample chat weighted toward ordinary short messages"""
+    weights = [10, 6, 4, 8, 4, 4, 5, 8, 1, 1, 1, 1, 1]
+    return random.choices(SAMPLES, weights=weights, k=count)
+
+
+def main():
+    random.seed(42)
+    messages = build_messages(MESSAGES)
+    chat_filter = ChatFilter()
+
+    start = time.perf_counter()
+    for text in messages:
+        chat_filter.check(text)
+    elapsed = time.perf_counter() - start
+
+    per_second = MESSAGES / elapsed
+    stats = chat_filter.stats()
+    print(f"{MESSAGES} messages in {elapsed:.2f}s: {per_second:,.0f} msg/s "
+          f"({elapsed / MESSAGES * 1_000_000:.1f} us/msg), {stats['block_rate']:.1%} blocked")
+    print(f"rule hits: {stats['rule_hits']}")
+    status = "PASS" if per_second >= TARGET_PER_SECOND else "FAIL"
+    print(f"{status}: target {TARGET_PER_SECOND:,} msg/s")
+    return 0 if per_second >= TARGET_PER_SECOND else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Recovery benchmark for checkpoint.CheckpointManager
+Measures capture (on the event loop), serialize+write (worker thread)
+and restore times at realistic state sizes.
+
+Usage:
+    python benchmarks/bench_checkpoint.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from checkpoint import CheckpointManager  # noqa: E402
+
+# (label, chatters with AI history, users with active cooldowns, queue length)
+SCENARIOS = [
+    ("small channel", 500, 200, 10),
+    ("busy channel", 20_000, 5_000, 50),
+    ("multi-channel network", 200_000, 50_000, 200),
+]
+
+
+def build_state(ai_users, cooldown_users, queue_length):
+    """Build subsystem state shaped like the live bot's"""
+    now = time.time()
+    conversations = {
+        f"user{i}": [
+            {"role": "user" if j % 2 == 0 else "assistant",
+             "content": "murphy who is peks " * random.randint(1, 4)}
+            for j in range(10)
+        ]
+        for i in range(ai_users)
+    }
+    response_cache = {
+        f"user{i}:prompt {i}": {"response": "okayCousin " * 10, "timestamp": now}
+        for i in range(100)
+    }
+    cooldowns = {
+        command: {f"user{i}": now - random.random() * 60 for i in range(cooldown_users)}
+        for command in ("ai", "joke", "spam", "default", "coin")
+    }
+    return {
+        "bot": {"message_count": 1_000_000, "command_count": 100_000, "error_count": 12},
+        "commands": {"command_counters": {"cannon": 420, "quadra": 69, "penta": 7}},
+        "ai": {
+            "response_cache": response_cache,
+            "user_conversations": conversations,
+            "request_timestamps": [now] * 20,
+            "user_request_timestamps": {f"user{i}": [now] for i in range(ai_users // 10)},
+        },
+        "cooldowns": {"cooldowns": cooldowns, "global_cooldowns": {"joke": now}},
+        "queue": {"queue": [f"player{i}" for i in range(queue_length)], "overflow_queue": []},
+    }
+
+
+def detach(value):
+    """Copy containers two levels deep, mirroring the live snapshot_state functions"""
+    if isinstance(value, dict):
+        return {k: list(v) if isinstance(v, list) else dict(v) if isinstance(v, dict) else v
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def run_scenario(label, ai_users, cooldown_users, queue_length):
+    state = build_state(ai_users, cooldown_users, queue_length)
+    restored = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = CheckpointManager(os.path.join(temp_dir, "bot_state.pkl"))
+        # Providers copy their containers like the live subsystems do
+        for name, data in state.items():
+            manager.register(name, lambda data=data: {k: detach(v) for k, v in data.items()},
+                             lambda value, name=name: restored.__setitem__(name, value))
+
+        start = time.perf_counter()
+        snapshot = manager.capture()
+        capture_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        manager.write(snapshot)
+        write_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        manager.restore()
+        restore_ms = (time.perf_counter() - start) * 1000
+
+    assert restored.keys() == state.keys()
+    size_mb = manager.last_checkpoint_size / 1024 / 1024
+    print(f"{label:<24} {size_mb:>8.2f} MB {capture_ms:>10.1f} {write_ms:>10.1f} {restore_ms:>10.1f}")
+
+
+def main():
+    print(f"{'scenario':<24} {'size':>11} {'capture ms':>10} {'write ms':>10} {'restore ms':>10}")
+    for scenario in SCENARIOS:
+        run_scenario(*scenario)
+
+
+if __name__ == "__main__":
+    main()
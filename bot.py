@@ -2,22 +2,41 @@ import random
 import logging
 import os
 import sys
-import subprocess
 import signal
 import pickle
 import time
 import datetime
 import traceback
 import asyncio
-from logging.handlers import RotatingFileHandler
+import json
+from types import SimpleNamespace
 from typing import Optional, Tuple, List
 from twitchio.ext import commands
 from twitchio import eventsub
-from utils import suggest_alwase_variants, shazdm
-from commands import handle_command
+from aiohttp import web
+import commands as command_handlers
 from scheduler import start_scheduler
+from job_scheduler import job_scheduler
 from queue_manager import QueueManager
-from ai_command import handle_ai_command, start_periodic_save
+from known_users import KnownUsers
+from translation import translator
+from jokes import joke_buffer
+from outbound import OutboundQueue, Priority
+from chat_filter import ChatFilter
+from triggers import trigger_engine
+from live_status import live_status
+from loop_monitor import loop_monitor
+from stream_schedule import stream_schedule
+from checkpoint import CheckpointManager
+from hot_restart import HotRestartCoordinator, HandoffReceiver
+import ai_command
+import http_client
+import metrics
+import tracing
+from tracing import tracer
+from logging_setup import setup_logging_from_env, stop_logging
+from reloader import reload_handlers, ReloadError
+from retry_utils import TWITCH_RETRY_CONFIG, breaker_states, get_circuit_breaker, resilient_call
 from cooldown_manager import cooldown_manager, check_cooldown
 from config import (
     TWITCH_CLIENT_ID,
@@ -30,36 +49,14 @@ from config import (
     LOG_FILE,
     validate_config,
 )
-from constants import Messages, Numbers
+from constants import Messages, Numbers, Commands
 
-# Set up logging
-log_level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
+# Set up logging; records are written by a background thread, never on the event loop
+setup_logging_from_env(LOG_LEVEL, LOG_FILE)
 
 # Also create a state directory for persistence
 os.makedirs("state", exist_ok=True)
 
-# Set up file handler with rotation
-file_handler = RotatingFileHandler(
-    os.path.join("logs", LOG_FILE),
-    maxBytes=Numbers.LOG_MAX_BYTES,
-    backupCount=Numbers.LOG_BACKUP_COUNT
-)
-file_handler.setFormatter(formatter)
-
-# Set up console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-
-# Configure root logger
-logger = logging.getLogger()
-logger.setLevel(log_level)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
 # Get module logger
 logger = logging.getLogger(__name__)
 
@@ -87,13 +84,51 @@ class MurphyAI(commands.Bot):
             prefix=TWITCH_PREFIX,
         )
         self.queue_manager = QueueManager()
-        self.known_users = set()  # Track users we've seen before
+        self.outbound = OutboundQueue()  # All chat output is paced through here
+        self.chat_filter = ChatFilter()  # Drops spam before any command or AI work
+        self.channel_users = {}  # Channel login -> PartialUser, resolved in setup_hook
+        self.scheduler = None  # Started in event_ready
+        # Compiled once; ?latege and go-live announcements look slots up from here
+        stream_schedule.set_timezone(os.getenv("STREAM_TIMEZONE") or None)
+        stream_schedule.load_config()
+        self.known_users = KnownUsers()  # Track users we've seen before (mmap'd Bloom filter)
         self.start_time = time.time()  # Record when the bot started
         self.message_count = 0  # Track total messages processed
         self.command_count = 0  # Track commands processed
         self.error_count = 0  # Track errors encountered
         self.last_reconnect_time = 0  # Track the last time we reconnected
         self.reconnect_attempts = 0  # Track reconnection attempts
+        self._shutting_down = False
+        self.last_restart_gap = None  # Seconds without a chat handler during the last hot restart
+
+        # Shared breaker for Helix calls (user lookups, EventSub subscriptions)
+        get_circuit_breaker(
+            "twitch_helix",
+            failure_threshold=Numbers.TWITCH_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=Numbers.TWITCH_BREAKER_RECOVERY_SECONDS,
+            expected_exception=TWITCH_RETRY_CONFIG.exceptions,
+        )
+
+        # A hot-restarted worker stays silent until the old instance hands over
+        self.handoff = HandoffReceiver.from_environment()
+        self.accepting_messages = self.handoff is None
+
+        # Coordinated checkpoints of every stateful subsystem
+        self.checkpointer = CheckpointManager(STATE_FILE, legacy_provider="bot")
+        self._register_checkpoint_providers()
+
+        # Local Prometheus endpoint; subsystem counters are read at scrape time
+        self.metrics_server = metrics.MetricsServer(
+            metrics.registry, port=int(os.getenv("METRICS_PORT", Numbers.METRICS_PORT))
+        )
+        self._register_metrics()
+
+        # Per-message tracing, off unless TRACE_SAMPLE_RATE is set; slow traces are served on /traces
+        tracer.configure(
+            float(os.getenv("TRACE_SAMPLE_RATE", 0)),
+            float(os.getenv("TRACE_SLOW_MS", Numbers.TRACE_SLOW_MS)),
+        )
+        self.metrics_server.add_route("/traces", self._handle_traces_endpoint)
 
         # Load any saved state if it exists
         self.load_state()
@@ -114,22 +149,89 @@ class MurphyAI(commands.Bot):
     async def setup_hook(self) -> None:
         """Subscribe to chat messages for configured channels (TwitchIO 3.0)."""
         try:
-            # Resolve channel user IDs from logins
+            live_status.fetch_live = self._fetch_live_streams
+            live_status.track(TWITCH_INITIAL_CHANNELS)
+
             if TWITCH_INITIAL_CHANNELS:
-                users = await self.fetch_users(logins=TWITCH_INITIAL_CHANNELS)
+                started = time.perf_counter()
+
+                # Resolve channel user IDs from logins
+                users = await self._fetch_channel_users(TWITCH_INITIAL_CHANNELS)
+                self.channel_users = {user.name.lower(): user for user in users}
+
+                # The bot is a moderator in its own channel and gets the higher chat limit there
                 for user in users:
-                    try:
-                        payload = eventsub.ChatMessageSubscription(
-                            broadcaster_user_id=user.id,
-                            user_id=self.bot_id,
-                        )
-                        await self.subscribe_websocket(payload=payload)
-                        logger.info(f"Subscribed to chat messages for channel: {user.name} ({user.id})")
-                    except Exception as sub_err:
-                        logger.error(f"Failed to subscribe to channel {getattr(user, 'name', '')}: {sub_err}")
+                    if str(user.id) == str(self.bot_id):
+                        self.outbound.set_channel_limit(user.name, Numbers.CHAT_RATE_LIMIT_MODERATOR)
+
+                # Subscribe concurrently, bounded so we don't trip Helix rate limits
+                semaphore = asyncio.Semaphore(Numbers.EVENTSUB_SUBSCRIBE_CONCURRENCY)
+                results = await asyncio.gather(
+                    *(self._subscribe_channel(user, semaphore) for user in users)
+                )
+
+                elapsed = time.perf_counter() - started
+                logger.info(f"Subscribed to {sum(results)}/{len(users)} channels in {elapsed:.2f}s")
         except Exception as e:
             logger.error(f"setup_hook error: {e}")
 
+    async def _fetch_channel_users(self, logins):
+        """Resolve channel logins to users, batching to the Helix limit per request"""
+        batch_size = Numbers.HELIX_MAX_LOGINS_PER_REQUEST
+        batches = [logins[i:i + batch_size] for i in range(0, len(logins), batch_size)]
+        results = await asyncio.gather(
+            *(resilient_call("twitch_helix", self.fetch_users, config=TWITCH_RETRY_CONFIG, logins=batch) for batch in batches)
+        )
+        return [user for batch in results for user in batch]
+
+    async def _fetch_live_streams(self, logins):
+        """Helix Get Streams for one batch of channels; returns {login: started_at} for live ones"""
+        async def list_streams():
+            return [stream async for stream in self.fetch_streams(user_logins=logins, type="live", first=len(logins))]
+
+        streams = await resilient_call("twitch_helix", list_streams, config=TWITCH_RETRY_CONFIG)
+        return {stream.user.name: stream.started_at for stream in streams}
+
+    def get_channel(self, name: str):
+        """Channel handle with send() for messages not triggered by chat (scheduler, announcements)"""
+        user = self.channel_users.get(name.lower())
+        if user is None:
+            return None
+
+        async def send(text: str):
+            return await self.outbound.send(user.name, text, lambda part: user.send_message(part, sender=self.bot_id))
+
+        return SimpleNamespace(name=user.name, send=send)
+
+    async def event_stream_online(self, payload) -> None:
+        """EventSub stream.online: mark the channel live"""
+        live_status.set_online(payload.broadcaster.name, getattr(payload, 'started_at', None))
+
+    async def event_stream_offline(self, payload) -> None:
+        """EventSub stream.offline: mark the channel offline"""
+        live_status.set_offline(payload.broadcaster.name)
+
+    async def _subscribe_channel(self, user, semaphore) -> bool:
+        """Subscribe to one channel's chat with retries; returns True on success"""
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                payloads = (
+                    eventsub.ChatMessageSubscription(broadcaster_user_id=user.id, user_id=self.bot_id),
+                    # Live-state pushes for the shared live status cache
+                    eventsub.StreamOnlineSubscription(broadcaster_user_id=user.id),
+                    eventsub.StreamOfflineSubscription(broadcaster_user_id=user.id),
+                )
+                for payload in payloads:
+                    await resilient_call("twitch_helix", self.subscribe_websocket, config=TWITCH_RETRY_CONFIG, payload=payload)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.info(f"Subscribed to chat messages for channel: {user.name} ({user.id}) in {elapsed_ms:.0f} ms")
+                return True
+            except Exception as sub_err:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.error(f"Failed to subscribe to channel {getattr(user, 'name', '')} after {elapsed_ms:.0f} ms: {sub_err}")
+                return False
+
     def _reset_restart_counter(self):
         """Reset the restart counter after successful initialization"""
         try:
@@ -140,60 +242,124 @@ class MurphyAI(commands.Bot):
 
     def handle_shutdown(self, signum, frame):
         """Handle shutdown signals gracefully"""
+        if self._shutting_down:
+            logger.warning(f"Received signal {signum} again. Forcing exit...")
+            self.save_state()
+            stop_logging()
+            os._exit(1)
+
+        self._shutting_down = True
         logger.info(f"Received signal {signum}. Shutting down gracefully...")
-        self.save_state()
-        sys.exit(0)
 
-    def save_state(self):
-        """Save important bot state to disk for recovery"""
         try:
-            state = {
-                "known_users": list(self.known_users),
-                "cannon_count": self.get_command_count("cannon"),
-                "quadra_count": self.get_command_count("quadra"),
-                "penta_count": self.get_command_count("penta"),
-                "message_count": self.message_count,
-                "command_count": self.command_count,
-                "error_count": self.error_count,
-            }
-            with open(STATE_FILE, 'wb') as f:
-                pickle.dump(state, f)
-            logger.info("Bot state saved successfully")
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            # Not inside the event loop, so exiting directly is safe
+            self.save_state()
+            sys.exit(0)
+
+        # Never raise SystemExit from inside a running loop; hand off to a task instead
+        loop.call_soon_threadsafe(lambda: loop.create_task(self._graceful_shutdown()))
+
+    async def _graceful_shutdown(self):
+        """Write a final checkpoint and close the Twitch connection"""
+        self.outbound.stop()
+        loop_monitor.stop()
+        if self.scheduler:
+            await self.scheduler.stop()
+        await self.metrics_server.stop()
+        ai_command.usage_ledger.rollup()
+        await self.checkpointer.checkpoint_async()
+        await http_client.close_session()
+        try:
+            await self.close()
         except Exception as e:
-            logger.error(f"Failed to save bot state: {e}")
+            logger.error(f"Error while closing bot: {e}")
+
+    def _register_checkpoint_providers(self):
+        """Register every stateful subsystem with the checkpoint manager"""
+        self.checkpointer.register("bot", self._snapshot_bot_state, self._restore_bot_state)
+        self.checkpointer.register("commands", command_handlers.snapshot_state, command_handlers.restore_state)
+        self.checkpointer.register("ai", ai_command.snapshot_state, ai_command.restore_state)
+        # Spend since the last rollup must survive restarts, or budgets could be reset by restarting
+        self.checkpointer.register(
+            "ai_usage", ai_command.usage_ledger.snapshot_state, ai_command.usage_ledger.restore_state
+        )
+        self.checkpointer.register("cooldowns", cooldown_manager.snapshot_state, cooldown_manager.restore_state)
+        self.checkpointer.register("queue", self.queue_manager.snapshot_state, self.queue_manager.restore_state)
+
+    def _register_metrics(self):
+        """Expose subsystem stats() counters as callback metrics"""
+        registry = metrics.registry
+        registry.counter_func("errors_total", "Errors while handling chat", lambda: self.error_count)
+        registry.gauge_func("uptime_seconds", "Seconds since the bot started", lambda: time.time() - self.start_time)
+        registry.gauge_func("outbound_queued", "Chat messages waiting to be sent", lambda: self.outbound.stats()["queued"])
+        registry.counter_func("outbound_sent_total", "Chat messages sent", lambda: self.outbound.stats()["sent"])
+        registry.counter_func("outbound_dropped_total", "Chat messages dropped by backpressure", lambda: self.outbound.stats()["dropped"])
+        registry.gauge_func("ai_queue_queued", "AI requests waiting for a slot", lambda: ai_command.ai_queue.stats()["queued"])
+        registry.gauge_func("ai_queue_running", "AI requests in progress", lambda: ai_command.ai_queue.stats()["running"])
+        registry.gauge_func("ai_concurrency_limit", "Adaptive AI concurrency limit", lambda: ai_command.ai_limiter.stats()["limit"])
+        registry.gauge_func("ai_response_cache_entries", "Exact AI response cache size", lambda: len(ai_command.response_cache))
+        registry.counter_func("ai_similar_cache_hits_total", "Similarity cache hits", lambda: ai_command.semantic_cache.stats()["hits"])
+        registry.counter_func(
+            "ai_similar_cache_lookups_total", "Similarity cache lookups", lambda: ai_command.semantic_cache.stats()["lookups"]
+        )
+        registry.gauge_func("ai_spend_today_dollars", "Estimated AI spend today", lambda: ai_command.usage_ledger.stats()["cost"])
+        registry.counter_func("translation_cache_hits_total", "Translation cache hits", lambda: translator.stats()["hits"])
+        registry.counter_func("translation_cache_misses_total", "Translation cache misses", lambda: translator.stats()["misses"])
+        registry.gauge_func("live_channels", "Channels currently live", lambda: live_status.stats()["live"])
+        registry.gauge_func("scheduled_jobs", "Jobs on the job scheduler", lambda: job_scheduler.stats()["jobs"])
+        registry.counter_func("scheduled_job_failures_total", "Failed job runs", lambda: job_scheduler.stats()["failures"])
+        registry.gauge_func("queue_size", "Players in the main queue", lambda: len(self.queue_manager.queue))
+        registry.gauge_func(
+            "event_loop_lag_p99_seconds", "p99 event loop lag over the recent window", lambda: loop_monitor.percentiles()["p99"]
+        )
+
+    def _snapshot_bot_state(self):
+        """Snapshot bot counters; known users persist through their own mapped file"""
+        self.known_users.flush()
+        return {
+            "message_count": self.message_count,
+            "command_count": self.command_count,
+            "error_count": self.error_count,
+        }
+
+    def _restore_bot_state(self, state):
+        """Restore bot counters, including checkpoints in the legacy flat format"""
+        # Migrate known users from the legacy pickled list
+        legacy_users = state.get("known_users", [])
+        if legacy_users:
+            self.known_users.update(legacy_users)
+            self.known_users.flush()
+            logger.info(f"Migrated {len(legacy_users)} known users into the filter")
+
+        self.message_count = state.get("message_count", 0)
+        self.command_count = state.get("command_count", 0)
+        self.error_count = state.get("error_count", 0)
+
+        # Legacy state stored command counts alongside the bot counters
+        if "cannon_count" in state:
+            command_handlers.set_command_counts(
+                state.get("cannon_count", 0),
+                state.get("quadra_count", 0),
+                state.get("penta_count", 0)
+            )
+
+    def save_state(self):
+        """Save a checkpoint of all subsystems to disk for recovery"""
+        self.checkpointer.checkpoint()
 
     def get_command_count(self, command_name):
         """Helper to get command counts from commands module"""
-        from commands import get_command_count
-        return get_command_count(command_name)
+        return command_handlers.get_command_count(command_name)
 
     def load_state(self):
-        """Load bot state from disk if available"""
-        if os.path.exists(STATE_FILE):
-            try:
-                with open(STATE_FILE, 'rb') as f:
-                    state = pickle.load(f)
-
-                # Restore known users
-                self.known_users = set(state.get("known_users", []))
-
-                # Restore message counts
-                self.message_count = state.get("message_count", 0)
-                self.command_count = state.get("command_count", 0)
-                self.error_count = state.get("error_count", 0)
-
-                # Restore command counts
-                from commands import set_command_counts
-                set_command_counts(
-                    state.get("cannon_count", 0),
-                    state.get("quadra_count", 0),
-                    state.get("penta_count", 0)
-                )
-
-                logger.info("Bot state restored successfully")
-            except Exception as e:
-                logger.error(f"Failed to load bot state: {e}")
-                logger.info("Continuing with default state")
+        """Load bot state from the last checkpoint if available"""
+        if not self.checkpointer.restore():
+            logger.info("Continuing with default state")
 
     def _get_restart_count(self):
         """Get the current restart attempt count"""
@@ -241,20 +407,40 @@ class MurphyAI(commands.Bot):
         nick = getattr(getattr(self, 'user', None), 'name', None) or getattr(self, 'nick', 'Unknown')
         logger.info(f"Logged in as | {nick}")
         try:
-            # Start background tasks without blocking
-            asyncio.create_task(start_scheduler(self))
-            asyncio.get_running_loop().create_task(self.queue_manager.remove_not_available())
+            # Periodic work runs as jobs on the central scheduler
+            self.scheduler = await start_scheduler(self)
+            job_scheduler.add_once("metrics_server", self.metrics_server.start)
+            self.queue_manager.start_cleanup_task()
+            # The checkpointer below covers the AI cache files; only the usage rollup is scheduled here
+            ai_command.start_periodic_save(save_files=False)
+
+            # Start periodic checkpoints (covers the AI cache and conversations)
+            self.checkpointer.start()
 
-            # Start the AI cache save task
-            start_periodic_save(asyncio.get_running_loop())
+            # Take over from the previous instance after a hot restart
+            if self.handoff:
+                asyncio.create_task(self._complete_handoff())
 
             # Start the dynamic command watcher
             from dynamic_commands import DynamicCommandManager
             dynamic_command_manager = DynamicCommandManager()
-            dynamic_command_manager.start_command_watcher(asyncio.get_running_loop())
+            dynamic_command_manager.start_command_watcher()
+
+            # Clean up expired cooldowns
+            cooldown_manager.start_cleanup_task()
+
+            # Measure event loop lag and catch callbacks that block it
+            loop_monitor.threshold = float(os.getenv("LOOP_STALL_MS", Numbers.LOOP_LAG_THRESHOLD * 1000)) / 1000
+            loop_monitor.start(asyncio.get_running_loop())
+
+            # Poll Helix for channels whose live status EventSub hasn't refreshed
+            live_status.start()
 
-            # Start cooldown cleanup task
-            asyncio.create_task(cooldown_manager.start_cleanup_task(asyncio.get_running_loop()))
+            # Reload chat triggers when triggers.json changes
+            trigger_engine.start_watcher()
+
+            # Keep a few jokes prefetched so ?joke answers from memory
+            joke_buffer.start()
 
             # Optional: Announce startup (skipped due to TwitchIO 3.0 message sending changes)
         except Exception as e:
@@ -284,10 +470,25 @@ class MurphyAI(commands.Bot):
 
     # TwitchIO 3.0 changed how messages are sent; we no longer broadcast on ready.
 
+    def _reply(self, ctx, text: str, priority: Priority = Priority.NORMAL):
+        """Queue a reply to a decorated command through the outbound scheduler."""
+        channel = getattr(ctx, 'channel', None) or getattr(ctx, 'room', None)
+        channel_name = getattr(channel, 'name', None) or 'unknown'
+        return self.outbound.send(channel_name, text, ctx.send, priority)
+
+    @staticmethod
+    def _command_priority(command_name: str) -> Priority:
+        """Pick the outbound lane for replies to a legacy command."""
+        if command_name in Commands.MOD_ONLY or command_name in Commands.NO_COOLDOWN:
+            return Priority.MOD
+        if command_name in Commands.FUN:
+            return Priority.FUN
+        return Priority.NORMAL
+
     async def _check_owner_permissions(self, ctx) -> bool:
         """Helper method to check if user is the channel owner."""
         if ctx.author.name.lower() != ctx.channel.name.lower():
-            await ctx.send(Messages.PERMISSION_DENIED_OWNER)
+            await self._reply(ctx, Messages.PERMISSION_DENIED_OWNER)
             return False
         return True
 
@@ -298,45 +499,65 @@ class MurphyAI(commands.Bot):
             return
 
         logger.info(f"Bot restart initiated by channel owner: {ctx.author.name}")
-        await ctx.send(Messages.BOT_RESTART_INITIATED)
+        await self._reply(ctx, Messages.BOT_RESTART_INITIATED, Priority.MOD)
 
-        # Save current state before restarting
-        self.save_state()
-
-        # Restart with exponential backoff protection
+        # State is checkpointed as part of the handoff; this only returns on failure
         await self._restart_bot(initiated_by_user=True)
+        await self._reply(ctx, Messages.BOT_RESTART_FAILED, Priority.MOD)
 
     async def _restart_bot(self, initiated_by_user=False):
-        """Restart the bot immediately without backoff delays"""
-        restart_count = 0
-
+        """Hot-restart the bot: warm up a new worker and hand it our runtime state"""
         if not initiated_by_user:
             # Track restart count but don't use backoff delays
             restart_count = self._increment_restart_count()
             logger.info(f"Restart attempt #{restart_count}")
 
-        # Start new process
+        logger.info(f"Bot hot restart starting (initiated by user: {initiated_by_user})")
         try:
-            # Save current state before restarting
-            self.save_state()
-
-            if sys.platform.startswith('win'):
-                # Windows implementation
-                subprocess.Popen(['start', 'python', __file__], shell=True)
-            else:
-                # Unix implementation
-                subprocess.Popen(['python3', __file__],
-                                start_new_session=True,
-                                stdout=subprocess.DEVNULL,
-                                stderr=subprocess.DEVNULL)
-
-            # Exit current process
-            logger.info(f"Bot restarting - shutting down current instance (initiated by user: {initiated_by_user})")
-            os._exit(0)
+            coordinator = HotRestartCoordinator(self, os.path.abspath(__file__))
+            if await coordinator.restart():
+                logger.info("Shutting down old instance after hot restart")
+                ai_command.usage_ledger.rollup()
+                stop_logging()
+                os._exit(0)
         except Exception as e:
             logger.critical(f"Failed to restart bot: {e}")
             logger.critical(traceback.format_exc())
-            # If we can't restart, try to continue running
+
+        # If we can't restart, keep running and start accepting chat again
+        self.accepting_messages = True
+
+    async def _complete_handoff(self):
+        """Adopt the previous instance's state once our subscriptions are live"""
+        self.handoff.signal_ready()
+        state = await self.handoff.receive_state()
+        if state:
+            self.checkpointer.restore(state)
+            self.last_restart_gap = time.time() - state["released_at"]
+            logger.info(f"Hot restart complete, restart gap: {self.last_restart_gap * 1000:.0f} ms")
+        self.handoff = None
+        self.accepting_messages = True
+
+    @commands.command(name="reload")
+    async def reload_handlers_command(self, ctx) -> None:
+        """Hot reload command handler modules - channel owner only."""
+        if not await self._check_owner_permissions(ctx):
+            return
+
+        try:
+            elapsed_ms, modules = reload_handlers()
+        except ReloadError as e:
+            logger.error(f"Handler reload failed: {e}")
+            await self._reply(ctx, Messages.RELOAD_FAILED.format(error=str(e)[:200]), Priority.MOD)
+            return
+
+        if trigger_engine.load():
+            modules = modules + ["triggers"]
+        if stream_schedule.load_exceptions():
+            modules = modules + ["schedule"]
+        # Point checkpoints at the freshly loaded snapshot/restore functions
+        self._register_checkpoint_providers()
+        await self._reply(ctx, Messages.RELOAD_SUCCESS.format(modules=", ".join(modules), ms=elapsed_ms), Priority.MOD)
 
     @commands.command(name="botstat")
     async def bot_stats(self, ctx) -> None:
@@ -348,10 +569,36 @@ class MurphyAI(commands.Bot):
             f"🔄 Commands executed: {self.command_count}",
             f"⚠️ Errors encountered: {self.error_count}",
             f"👥 Known users: {len(self.known_users)}",
+            f"🚫 Messages filtered: {self.chat_filter.blocked}",
             f"👤 Queue size: {len(self.queue_manager.queue) + len(self.queue_manager.overflow_queue)}"
         ]
+        if self.last_restart_gap is not None:
+            stats.append(f"🔁 Last restart gap: {self.last_restart_gap * 1000:.0f} ms")
 
-        await ctx.send("Bot Statistics:\n" + "\n".join(stats))
+        await self._reply(ctx, "Bot Statistics:\n" + "\n".join(stats))
+
+    @commands.command(name="slowtraces")
+    async def slow_traces(self, ctx, count: int = Numbers.TRACE_DUMP_COUNT) -> None:
+        """Show the slowest recently traced messages with their latency breakdown - mods only."""
+        if not await self._check_mod_permissions(ctx):
+            return
+        if not tracer.enabled:
+            await self._reply(ctx, Messages.TRACING_DISABLED, Priority.MOD)
+            return
+        traces = tracer.slowest(max(1, min(count, Numbers.TRACE_BUFFER_SIZE)))
+        if not traces:
+            await self._reply(ctx, Messages.NO_SLOW_TRACES.format(ms=tracer.slow_ms), Priority.MOD)
+            return
+        await self._reply(ctx, "\n".join(trace.summary() for trace in traces), Priority.MOD)
+
+    async def _handle_traces_endpoint(self, request: web.Request) -> web.Response:
+        """Serve the slowest kept traces as JSON on the local metrics server."""
+        try:
+            count = int(request.query.get("n", Numbers.TRACE_BUFFER_SIZE))
+        except ValueError:
+            count = Numbers.TRACE_BUFFER_SIZE
+        body = {"tracing": tracer.stats(), "traces": [trace.to_dict() for trace in tracer.slowest(count)]}
+        return web.json_response(body, dumps=lambda data: json.dumps(data, default=str))
 
     @commands.command(name="healthcheck")
     async def health_check(self, ctx) -> None:
@@ -367,7 +614,8 @@ class MurphyAI(commands.Bot):
             # Get system info
             process = psutil.Process()
             memory_info = process.memory_info()
-            cpu_percent = process.cpu_percent(interval=0.5)
+            # Sampling CPU waits half a second; keep it off the event loop
+            cpu_percent = await asyncio.to_thread(process.cpu_percent, 0.5)
             memory_percent = psutil.virtual_memory().percent
             disk_percent = psutil.disk_usage('/').percent
 
@@ -387,45 +635,85 @@ class MurphyAI(commands.Bot):
             # Calculate memory usage
             memory_mb = memory_info.rss / 1024 / 1024  # Convert to MB
 
+            outbound = self.outbound.stats()
+            translation = translator.stats()
+            limiter = ai_command.ai_limiter.stats()
+            ai_work = ai_command.ai_queue.stats()
+            similar = ai_command.semantic_cache.stats()
+            spend = ai_command.usage_ledger.stats()
+            live = live_status.stats()
+            jobs = job_scheduler.stats()
+            traces = tracer.stats()
+            lag = loop_monitor.stats()
+            breakers = ", ".join(f"{name} {state}" for name, state in breaker_states().items()) or "none"
+
             health_report = [
                 f"🕒 Timestamp: {current_time}",
                 f"🤖 Bot Status: RUNNING (uptime: {self.get_uptime()})",
                 f"🔌 Twitch Connection: {twitch_status}",
+                f"🔴 Live Status: {live['live']}/{live['channels']} channels live, "
+                f"{live['events']} EventSub updates, {live['polls']} Helix polls ({live['poll_errors']} failed)",
+                f"⏱️ Scheduled Jobs: {jobs['jobs']} jobs, {jobs['runs']} runs, {jobs['failures']} failed, "
+                f"{jobs['missed']} missed, slowest {jobs['slowest'] or 'n/a'} ({jobs['slowest_ms']:.0f}ms)",
                 f"🔃 Restart Count: {self._get_restart_count()}",
+                f"🔁 Last Restart Gap: {f'{self.last_restart_gap * 1000:.0f} ms' if self.last_restart_gap is not None else 'N/A'}",
                 f"🧠 AI Service: {ai_status}",
+                f"🛡️ Circuit Breakers: {breakers}",
+                f"🚦 AI Concurrency: limit {limiter['limit']:.1f}, {limiter['in_flight']} in flight, "
+                f"{limiter['queued']} queued, {limiter['overloads']} overloads, last latency {limiter['last_latency']:.1f}s",
+                f"🧵 AI Queue: {ai_work['queued']} queued, {ai_work['running']} running, "
+                f"{ai_work['expired']} expired, {ai_work['sampled_out']} welcomes sampled out, "
+                f"avg wait {ai_work['avg_wait_ms']:.0f}ms",
+                f"🧠 AI Similarity Cache: {similar['entries']} entries, "
+                f"{similar['hit_rate']:.0%} hit rate ({similar['hits']}/{similar['lookups']})",
+                f"💸 AI Spend Today: ${spend['cost']:.4f} over {spend['requests']} requests "
+                f"({spend['tokens']} tokens), {spend['downgraded']} downgraded, {spend['throttled']} throttled",
                 f"💾 Memory Usage: {memory_mb:.2f} MB ({memory_percent}% system memory used)",
                 f"⚙️ CPU Usage: {cpu_percent}%",
                 f"💿 Disk Usage: {disk_percent}%",
                 f"🔢 Messages Processed: {self.message_count}",
                 f"📊 Commands Processed: {self.command_count}",
+                f"📈 Latency: message p50 {metrics.message_seconds.quantile(0.5) * 1000:.0f}ms / "
+                f"p99 {metrics.message_seconds.quantile(0.99) * 1000:.0f}ms, "
+                f"AI p50 {metrics.ai_latency_seconds.quantile(0.5):.1f}s / p99 {metrics.ai_latency_seconds.quantile(0.99):.1f}s",
+                f"🐢 Event Loop Lag: p50 {lag['p50_ms']:.1f}ms, p95 {lag['p95_ms']:.1f}ms, p99 {lag['p99_ms']:.1f}ms, "
+                f"max {lag['max_ms']:.0f}ms, {lag['stalls']} stalls over {loop_monitor.threshold * 1000:.0f}ms",
+                "🔬 Tracing: " + (
+                    f"{traces['sample_rate']:.0%} sampled, {traces['traced']} traced, "
+                    f"{traces['slow']} over {traces['slow_ms']:.0f}ms" if traces['enabled'] else "off"
+                ),
                 f"⚠️ Errors Encountered: {self.error_count}",
+                f"📤 Outbound: {outbound['sent']} sent, {outbound['queued']} queued (max {outbound['max_depth']}), "
+                f"{outbound['coalesced']} coalesced, {outbound['merged']} merged, {outbound['dropped']} dropped, avg wait {outbound['avg_wait_ms']:.0f} ms",
+                f"🌐 Translation Cache: {translation['entries']} entries, {translation['hit_rate']:.0%} hit rate, "
+                f"{translation['skipped_english']} English skipped",
                 f"💻 System: {system_info} (Python {python_version})",
                 f"👥 Configured Channels: {', '.join(TWITCH_INITIAL_CHANNELS)}"
             ]
 
-            await ctx.send("\n".join(health_report))
+            await self._reply(ctx, "\n".join(health_report), Priority.MOD)
             logger.info("Health check performed")
 
         except Exception as e:
-            await ctx.send(f"Error during health check: {str(e)}")
+            await self._reply(ctx, f"Error during health check: {str(e)}")
             logger.error(f"Health check error: {str(e)}")
             logger.error(traceback.format_exc())
 
     async def event_chat_message(self, payload) -> None:
         """Handle incoming chat messages (TwitchIO 3.x)."""
-        # Let the commands extension handle decorated commands first
-        try:
-            await super().event_chat_message(payload)
-        except Exception:
-            pass
+        # During a hot restart only one instance may answer chat
+        if not self.accepting_messages:
+            return
 
-        # Build a safe adapter compatible with our legacy handlers
-        ctx = None
+        started = time.perf_counter()
         try:
-            ctx = await self.get_context(payload)
-        except Exception:
-            ctx = None
+            with tracer.trace("message"):
+                await self._handle_chat_message(payload)
+        finally:
+            metrics.message_seconds.observe(time.perf_counter() - started)
 
+    async def _handle_chat_message(self, payload) -> None:
+        """Route one chat message through the spam filter, welcomes, commands and triggers."""
         # Extract basic fields with fallbacks
         try:
             author = getattr(payload, 'chatter', None) or getattr(payload, 'author', None)
@@ -452,17 +740,47 @@ class MurphyAI(commands.Bot):
         # Channel name best-effort
         channel_obj = getattr(payload, 'room', None) or getattr(payload, 'channel', None)
         channel_name = getattr(channel_obj, 'name', None) or (TWITCH_INITIAL_CHANNELS[0] if TWITCH_INITIAL_CHANNELS else 'unknown')
-
-        # Legacy adapter to match previous message API
-        message = self._build_message_adapter(payload, ctx, author_name, channel_name, content)
+        tracing.annotate(channel=channel_name, user=author_name)
 
         # Track message count and log
         self.message_count += 1
-        logger.debug(f"[{channel_name}] {author_name}: {content}")
+        metrics.messages_total.inc()
+        # Lazy %-formatting: the line is only built if DEBUG is on and the record is sampled
+        logger.debug("[%s] %s: %s", channel_name, author_name, content)
+
+        # Spam never reaches builtin commands, welcomes, legacy commands or AI
+        is_privileged = bool(getattr(author, 'is_mod', False)) or author_name.lower() == channel_name.lower()
+        with tracing.span("spam_filter"):
+            verdict = self.chat_filter.check(content, is_privileged)
+        if verdict.blocked:
+            metrics.messages_filtered_total.inc()
+            logger.info(
+                "Filtered message from %s (score %.1f: %s)", author_name, verdict.score, ", ".join(verdict.reasons),
+                extra={"channel": channel_name, "user": author_name, "spam_score": verdict.score},
+            )
+            return
+
+        # Let the commands extension handle decorated commands
+        try:
+            with tracing.span("builtin_commands"):
+                await super().event_chat_message(payload)
+        except Exception:
+            pass
+
+        # Build a safe adapter compatible with our legacy handlers
+        ctx = None
+        try:
+            with tracing.span("get_context"):
+                ctx = await self.get_context(payload)
+        except Exception:
+            ctx = None
+
+        # Legacy adapter to match previous message API
+        with tracing.span("adapter"):
+            message = self._build_message_adapter(payload, ctx, author_name, channel_name, content)
 
         # First-time chatter welcome (non-command)
-        if author_name not in self.known_users:
-            self.known_users.add(author_name)
+        if self.known_users.add(author_name):
             if not content.startswith(TWITCH_PREFIX):
                 if random.random() < Numbers.FIRST_TIME_CHATTER_RESPONSE_CHANCE:
                     try:
@@ -470,7 +788,9 @@ class MurphyAI(commands.Bot):
                             f"User {author_name} has joined the chat for the first time and said: '{content}'. "
                             f"Give them a warm welcome."
                         )
-                        await handle_ai_command(self, message, custom_prompt=welcome_prompt)
+                        message.channel.priority = Priority.FUN
+                        with tracing.span("welcome"):
+                            await ai_command.handle_ai_command(self, message, custom_prompt=welcome_prompt)
                         logger.info(f"Sent AI welcome to first-time chatter: {author_name}")
                     except Exception as e:
                         logger.error(f"Error sending AI welcome: {e}")
@@ -480,27 +800,42 @@ class MurphyAI(commands.Bot):
             self.command_count += 1
             command_name = content[len(TWITCH_PREFIX):].split(" ")[0].lower()
             builtin_commands = [cmd.name for cmd in self.commands.values()]
-            if command_name not in builtin_commands:
-                if command_name.startswith("ai"):
+            message.channel.priority = self._command_priority(command_name)
+            tracing.annotate(command=command_name)
+            if command_name in builtin_commands:
+                # Dispatched by the commands extension above
+                metrics.commands_total.labels("builtin").inc()
+            else:
+                route = "ai" if command_name.startswith("ai") else "chat"
+                metrics.commands_total.labels(route).inc()
+                dispatch_started = time.perf_counter()
+                if route == "ai":
                     try:
-                        await handle_ai_command(self, message)
+                        with tracing.span("ai_command"):
+                            await ai_command.handle_ai_command(self, message)
                     except Exception as e:
                         self.error_count += 1
+                        metrics.command_errors_total.labels(route).inc()
                         logger.error(f"Error processing AI command '{content}': {e}")
                         logger.error(traceback.format_exc())
                         await message.channel.send("Error processing AI command. Please try again later.")
                 else:
                     try:
-                        await handle_command(self, message)
+                        with tracing.span("command"):
+                            await command_handlers.handle_command(self, message)
                     except Exception as e:
                         self.error_count += 1
+                        metrics.command_errors_total.labels(route).inc()
                         logger.error(f"Error processing command '{content}': {e}")
                         logger.error(traceback.format_exc())
                         await message.channel.send("Error processing command. Please try again later.")
+                metrics.command_seconds.labels(route).observe(time.perf_counter() - dispatch_started)
         else:
             # Non-command messages: suggestions
             if not content.startswith(TWITCH_PREFIX):
-                await self.suggest_variants(message)
+                message.channel.priority = Priority.FUN
+                with tracing.span("triggers"):
+                    await self.suggest_variants(message)
 
     def _build_message_adapter(self, payload, ctx, author_name: str, channel_name: str, content: str):
         """Create a minimal adapter to satisfy legacy handlers (commands.py, ai_command.py)."""
@@ -509,8 +844,9 @@ class MurphyAI(commands.Bot):
             def __init__(self, name, source):
                 self.name = name
                 self.mention = f"@{name}" if name else "@user"
-                # Best-effort mod flag
+                # Best-effort mod and subscriber flags
                 self.is_mod = bool(getattr(source, 'is_mod', False))
+                self.is_subscriber = bool(getattr(source, 'subscriber', False))
 
         # Channel adapter with send()
         class _Channel:
@@ -519,8 +855,14 @@ class MurphyAI(commands.Bot):
                 self._bot = bot
                 self._ctx = ctx_obj
                 self._payload = payload_obj
+                self.priority = Priority.NORMAL
 
             async def send(self, text: str):
+                # Paced by the bot's outbound scheduler; the span covers queueing and delivery
+                with tracing.span("send"):
+                    return await self._bot.outbound.send(self.name, text, self._deliver, self.priority)
+
+            async def _deliver(self, text: str):
                 # Prefer ctx.send when available, else reply to payload
                 if self._ctx:
                     try:
@@ -547,15 +889,13 @@ class MurphyAI(commands.Bot):
         return _Message(self, content, author_adapter, channel_adapter)
 
     async def suggest_variants(self, message) -> None:
-        for suggest_func in [suggest_alwase_variants, shazdm]:
-            try:
-                suggestions = suggest_func(message.content)
-                if suggestions:
-                    await message.channel.send(random.choice(suggestions))
-            except Exception as e:
-                logger.error(
-                    f"Error in suggest_variants with {suggest_func.__name__}: {str(e)}"
-                )
+        """Send the auto-response of the first chat trigger that fires, if any."""
+        try:
+            response = trigger_engine.respond(message.content, message.channel.name)
+            if response:
+                await message.channel.send(response)
+        except Exception as e:
+            logger.error(f"Error in suggest_variants: {str(e)}")
 
     async def _check_mod_permissions(self, ctx) -> bool:
         """Helper method to check if user has mod permissions."""
@@ -566,10 +906,10 @@ class MurphyAI(commands.Bot):
             chatter_name = getattr(chatter, 'name', '')
             channel_name = getattr(channel, 'name', '')
             if (not is_mod) and (chatter_name.lower() != channel_name.lower()):
-                await ctx.send(Messages.PERMISSION_DENIED_MOD)
+                await self._reply(ctx, Messages.PERMISSION_DENIED_MOD)
                 return False
         except Exception:
-            await ctx.send(Messages.PERMISSION_DENIED_MOD)
+            await self._reply(ctx, Messages.PERMISSION_DENIED_MOD)
             return False
         return True
 
@@ -579,65 +919,67 @@ class MurphyAI(commands.Bot):
             return
 
         if size < 1:
-            await ctx.send("Team size must be at least 1.")
+            await self._reply(ctx, "Team size must be at least 1.", Priority.MOD)
             return
 
-        await ctx.send(self.queue_manager.set_team_size(size))
+        await self._reply(ctx, self.queue_manager.set_team_size(size), Priority.MOD)
 
     @commands.command(name="join")
     async def join_queue(self, ctx) -> None:
         name = getattr(getattr(ctx, 'chatter', None) or getattr(ctx, 'author', None), 'name', '')
-        await ctx.send(self.queue_manager.join_queue(name))
+        await self._reply(ctx, self.queue_manager.join_queue(name))
 
     @commands.command(name="leave")
     async def leave_queue(self, ctx) -> None:
         name = getattr(getattr(ctx, 'chatter', None) or getattr(ctx, 'author', None), 'name', '')
-        await ctx.send(self.queue_manager.leave_queue(name))
+        await self._reply(ctx, self.queue_manager.leave_queue(name))
 
     @commands.command(name="fleave")
     async def force_kick_user(self, ctx, username: str) -> None:
         if not await self._check_mod_permissions(ctx):
             return
-        await ctx.send(self.queue_manager.force_kick(username))
+        await self._reply(ctx, self.queue_manager.force_kick(username), Priority.MOD)
 
     @commands.command(name="fjoin")
     async def force_join_user(self, ctx, username: str) -> None:
         if not await self._check_mod_permissions(ctx):
             return
-        await ctx.send(self.queue_manager.force_join(username))
+        await self._reply(ctx, self.queue_manager.force_join(username), Priority.MOD)
 
     @commands.command(name="moveup")
     async def move_user_up_command(self, ctx, username: str) -> None:
         if not await self._check_mod_permissions(ctx):
             return
-        await ctx.send(self.queue_manager.move_user_up(username))
+        await self._reply(ctx, self.queue_manager.move_user_up(username), Priority.MOD)
 
     @commands.command(name="movedown")
     async def move_user_down_command(self, ctx, username: str) -> None:
         if not await self._check_mod_permissions(ctx):
             return
-        await ctx.send(self.queue_manager.move_user_down(username))
+        await self._reply(ctx, self.queue_manager.move_user_down(username), Priority.MOD)
 
     @commands.command(name="Q")
     async def show_queue(self, ctx) -> None:
         try:
             main_queue_msg, overflow_queue_msg = self.queue_manager.show_queue()
-            await ctx.send(main_queue_msg)
+            lines = [main_queue_msg]
             if overflow_queue_msg != "Overflow Queue is empty.":
-                await ctx.send(overflow_queue_msg)
+                lines.append(overflow_queue_msg)
+            # Split on queue entries by the outbound pipeline if it outgrows one message
+            await self._reply(ctx, "\n".join(lines))
         except Exception as e:
             logger.error(f"Error showing queue: {str(e)}")
-            await ctx.send("An error occurred while showing the queue.")
+            await self._reply(ctx, "An error occurred while showing the queue.")
 
     @commands.command(name="here")
     async def make_available(self, ctx) -> None:
         name = getattr(getattr(ctx, 'chatter', None) or getattr(ctx, 'author', None), 'name', '')
-        await ctx.send(self.queue_manager.make_available(name))
+        await self._reply(ctx, self.queue_manager.make_available(name))
 
     @commands.command(name="nothere")
     async def make_not_available(self, ctx) -> None:
         name = getattr(getattr(ctx, 'chatter', None) or getattr(ctx, 'author', None), 'name', '')
-        await ctx.send(self.queue_manager.make_not_available(name))
+        await self._reply(ctx, self.queue_manager.make_not_available(name))
 
     @commands.command(name="shuffle")
     async def shuffle_queue(self, ctx) -> None:
@@ -645,23 +987,19 @@ class MurphyAI(commands.Bot):
             return
 
         try:
+            # One line per team; the outbound pipeline packs or splits them
             response = self.queue_manager.shuffle_teams()
-            if "\n" in response:
-                team1_response, team2_response = response.split("\n")
-                await ctx.send(team1_response)
-                await ctx.send(team2_response)
-            else:
-                await ctx.send(response)
+            await self._reply(ctx, response, Priority.MOD)
         except Exception as e:
             logger.error(f"Error shuffling queue: {str(e)}")
-            await ctx.send("An error occurred while shuffling the teams.")
+            await self._reply(ctx, "An error occurred while shuffling the teams.", Priority.MOD)
 
     @commands.command(name="clearqueue")
     async def clear_queue_command(self, ctx) -> None:
         if not await self._check_mod_permissions(ctx):
             return
         message = self.queue_manager.clear_queues()
-        await ctx.send(message)
+        await self._reply(ctx, message, Priority.MOD)
 
 
 if __name__ == "__main__":
@@ -50,6 +50,7 @@ a = Analysis(
     binaries=[],
     datas=[
         ('dynamic_commands.json', '.'),
+        ('triggers.json', '.'),
         ('commands.md', '.'),
         ('README.md', '.'),
         ('LICENSE', '.'),
@@ -60,11 +61,11 @@ a = Analysis(
         'twitchio.ext.commands',
         'openai',
         'apscheduler',
-        'googletrans',
         'psutil',
         'watchdog',
         'async_timeout',
         'aiohttp',
+        'numpy',
         'pkg_resources.py2_warn',
         'pkg_resources.markers',
     ],
@@ -73,7 +74,6 @@ a = Analysis(
     runtime_hooks=[],
     excludes=[
         'matplotlib',
-        'numpy',
         'pandas',
         'scipy',
         'tkinter',
@@ -210,6 +210,10 @@ def package_distribution():
         if os.path.exists("dynamic_commands.json"):
             shutil.copy("dynamic_commands.json", dist_dir)
 
+        # Copy triggers.json so auto-responses can be edited next to the executable
+        if os.path.exists("triggers.json"):
+            shutil.copy("triggers.json", dist_dir)
+
         # Create a zip file
         shutil.make_archive("MurphyAI_Bot_Package", "zip", dist_dir)
         print("\n📦 Created distribution package: MurphyAI_Bot_Package.zip")
@@ -0,0 +1,171 @@
+"""
+Spam and abuse filter stage for incoming chat.
+
+Runs first on the message path. Every feature the rules need is computed in
+a single pass over the message. A weighted rule set then scores it, and
+messages scoring at or above the threshold skip welcomes, command dispatch
+and AI calls entirely. Mods and the broadcaster are never filtered.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MessageFeatures:
+    """Character statistics of one message."""
+    length: int
+    upper: int
+    letters: int
+    special: int
+    longest_run: int
+
+    @property
+    def caps_ratio(self) -> float:
+        """Uppercase characters as a share of the whole message."""
+        return self.upper / self.length if self.length else 0.0
+
+    @property
+    def shouting_ratio(self) -> float:
+        """Uppercase letters as a share of all letters."""
+        return self.upper / self.letters if self.letters else 0.0
+
+    @property
+    def special_ratio(self) -> float:
+        return self.special / self.length if self.length else 0.0
+
+    @property
+    def single_char(self) -> bool:
+        """True if the whole message is one character repeated."""
+        return self.length > 0 and self.longest_run == self.length
+
+
+def extract_features(text: str) -> MessageFeatures:
+    """
+    Compute message features in one pass.
+
+    Args:
+        text: Message text
+
+    Returns:
+        The message's features
+    """
+    upper = letters = special = 0
+    run = longest_run = 0
+    previous = None
+    for char in text:
+        if char == previous:
+            run += 1
+        else:
+            run = 1
+            previous = char
+        if run > longest_run:
+            longest_run = run
+        if char.isupper():
+            upper += 1
+        if char.isalpha():
+            letters += 1
+        elif not char.isalnum() and not char.isspace():
+            special += 1
+    return MessageFeatures(len(text), upper, letters, special, longest_run)
+
+
+@dataclass
+class FilterRule:
+    """A weighted spam signal."""
+    name: str
+    weight: float
+    check: Callable[[MessageFeatures], bool]
+
+
+def default_rules() -> List[FilterRule]:
+    """
+    The stock rule set.
+
+    Caps alone are common in emote spam and excited chat, so they only block
+    together with another signal; repeated-character floods block on their own.
+    """
+    return [
+        FilterRule("too_long", 1.0, lambda f: f.length > Numbers.MAX_MESSAGE_LENGTH),
+        FilterRule("single_char", 1.0, lambda f: f.single_char and f.length > Numbers.SPAM_MIN_REPEAT_LENGTH),
+        FilterRule("char_flood", 1.0, lambda f: f.longest_run >= Numbers.SPAM_MAX_CHAR_RUN),
+        FilterRule("special_chars", 0.6, lambda f: f.special_ratio > Numbers.MAX_SPECIAL_CHARS_RATIO),
+        FilterRule(
+            "excessive_caps",
+            0.4,
+            lambda f: f.length > Numbers.SPAM_MIN_CAPS_LENGTH and f.shouting_ratio > Numbers.MAX_EXCESSIVE_CAPS_RATIO,
+        ),
+    ]
+
+
+@dataclass
+class FilterVerdict:
+    """Outcome of filtering one message."""
+    blocked: bool
+    score: float
+    reasons: List[str]
+
+
+ALLOWED = FilterVerdict(False, 0.0, [])
+
+
+class ChatFilter:
+    """Scores chat messages against a weighted rule set."""
+
+    def __init__(self, rules: Optional[Sequence[FilterRule]] = None, threshold: float = Numbers.SPAM_SCORE_THRESHOLD):
+        """
+        Args:
+            rules: Rules to apply; the stock rules if omitted
+            threshold: Score at which a message is blocked
+        """
+        self.rules = list(rules) if rules is not None else default_rules()
+        self.threshold = threshold
+
+        self.checked = 0
+        self.blocked = 0
+        self.rule_hits: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+
+    def check(self, text: str, privileged: bool = False) -> FilterVerdict:
+        """
+        Score a message.
+
+        Args:
+            text: Message text
+            privileged: Mods and the broadcaster bypass the filter
+
+        Returns:
+            The verdict; blocked messages should not reach commands or AI
+        """
+        self.checked += 1
+        if privileged or not text:
+            return ALLOWED
+
+        features = extract_features(text)
+        score = 0.0
+        reasons = []
+        for rule in self.rules:
+            if rule.check(features):
+                score += rule.weight
+                reasons.append(rule.name)
+        if not reasons:
+            return ALLOWED
+
+        for name in reasons:
+            self.rule_hits[name] = self.rule_hits.get(name, 0) + 1
+        blocked = score >= self.threshold
+        if blocked:
+            self.blocked += 1
+        return FilterVerdict(blocked, score, reasons)
+
+    def stats(self) -> Dict[str, object]:
+        """Filter counters for health reporting."""
+        return {
+            "checked": self.checked,
+            "blocked": self.blocked,
+            "block_rate": self.blocked / self.checked if self.checked else 0.0,
+            "rule_hits": dict(self.rule_hits),
+        }
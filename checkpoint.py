@@ -0,0 +1,162 @@
+"""
+Coordinated, crash-consistent state checkpointing for the MurphyAI bot.
+Each subsystem registers a snapshot/restore pair; all of them are captured
+at one point in time and written atomically to a single checkpoint file.
+
+Snapshot functions must return data that the live subsystem will not mutate
+afterwards (copies of mutable containers), since it is serialized off-loop.
+"""
+import asyncio
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from constants import Numbers, Paths
+from job_scheduler import JobScheduler, job_scheduler
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+SnapshotFunc = Callable[[], Any]
+RestoreFunc = Callable[[Any], None]
+
+
+class CheckpointManager:
+    """Captures and restores a consistent snapshot of all registered subsystems."""
+
+    def __init__(
+        self,
+        path: str = Paths.BOT_STATE_FILE,
+        interval: float = Numbers.CHECKPOINT_INTERVAL,
+        legacy_provider: Optional[str] = None,
+    ):
+        self.path = path
+        self.interval = interval
+        # Provider that understands checkpoints written before subsystems existed
+        self.legacy_provider = legacy_provider
+        self._providers: Dict[str, Tuple[SnapshotFunc, RestoreFunc]] = {}
+        self._write_lock = threading.Lock()
+        self.last_checkpoint_time: Optional[float] = None
+        self.last_checkpoint_size = 0
+
+    def register(self, name: str, snapshot: SnapshotFunc, restore: RestoreFunc) -> None:
+        """Register (or replace) the snapshot/restore pair for a subsystem."""
+        self._providers[name] = (snapshot, restore)
+
+    def capture(self) -> Dict[str, Any]:
+        """
+        Snapshot every subsystem at a single point in time.
+
+        Runs without yielding to the event loop, so no handler can mutate state
+        between two subsystems' snapshots. Providers return detached copies,
+        which keeps this step cheap and lets serialization happen elsewhere.
+        """
+        subsystems = {}
+        for name, (snapshot, _) in self._providers.items():
+            try:
+                subsystems[name] = snapshot()
+            except Exception as e:
+                logger.error(f"Failed to snapshot subsystem '{name}': {e}")
+
+        return {
+            "version": CHECKPOINT_VERSION,
+            "timestamp": time.time(),
+            "subsystems": subsystems,
+        }
+
+    def write(self, state: Dict[str, Any]) -> None:
+        """Serialize a captured snapshot and atomically replace the checkpoint file."""
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = f"{self.path}.tmp"
+        with self._write_lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            # Persist the rename itself where the platform allows it
+            if hasattr(os, "O_DIRECTORY"):
+                dir_fd = os.open(os.path.dirname(self.path) or ".", os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+
+        self.last_checkpoint_time = time.time()
+        self.last_checkpoint_size = len(data)
+
+    def checkpoint(self) -> bool:
+        """Capture and write a checkpoint on the calling thread (used at shutdown)."""
+        try:
+            self.write(self.capture())
+            logger.info(f"Checkpoint saved ({self.last_checkpoint_size} bytes)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save checkpoint: {e}")
+            return False
+
+    async def checkpoint_async(self) -> bool:
+        """Capture on the event loop, then serialize, write and fsync in a worker thread."""
+        try:
+            state = self.capture()
+            await asyncio.get_running_loop().run_in_executor(None, self.write, state)
+            logger.debug(f"Checkpoint saved ({self.last_checkpoint_size} bytes)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save checkpoint: {e}")
+            return False
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Read the checkpoint file, returning None if it is missing or unreadable."""
+        if not os.path.exists(self.path):
+            logger.info("No checkpoint found, starting fresh")
+            return None
+
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read checkpoint: {e}")
+            return None
+
+        if "subsystems" not in state and self.legacy_provider:
+            state = {"version": 0, "subsystems": {self.legacy_provider: state}}
+        return state
+
+    def restore(self, state: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Restore every registered subsystem from a checkpoint.
+
+        Args:
+            state: Already-loaded checkpoint; read from disk when omitted
+
+        Returns:
+            True if a checkpoint was applied
+        """
+        if state is None:
+            state = self.load()
+        if state is None:
+            return False
+
+        subsystems = state.get("subsystems", {})
+        for name, (_, restore) in self._providers.items():
+            if name not in subsystems:
+                continue
+            try:
+                restore(subsystems[name])
+            except Exception as e:
+                logger.error(f"Failed to restore subsystem '{name}': {e}")
+
+        logger.info(f"Restored checkpoint with {len(subsystems)} subsystems")
+        return True
+
+    def start(self, scheduler: JobScheduler = job_scheduler) -> None:
+        """Schedule a checkpoint every interval on the job scheduler."""
+        scheduler.add_interval("checkpoint", self.checkpoint_async, self.interval, jitter=Numbers.JOB_DEFAULT_JITTER)
+        logger.info(f"Scheduled checkpoints every {self.interval}s")
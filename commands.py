@@ -3,16 +3,19 @@ Command handling module for the MurphyAI Twitch bot.
 Manages both static and dynamic commands with proper state management.
 """
 import random
-import requests
 import logging
 import datetime
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, Any
 
-from config import TWITCH_PREFIX, STREAM_SCHEDULE
+from config import TWITCH_PREFIX
 from constants import Messages, Commands as CommandLists, Numbers
-from utils import translate_text_to_english
+from jokes import joke_buffer
+from translation import translator
+from live_status import live_status
+from stream_schedule import minutes_between, stream_schedule
 from dynamic_commands import DynamicCommandManager
 from cooldown_manager import cooldown_manager
+from tracing import span
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -20,6 +23,9 @@ logger = logging.getLogger(__name__)
 # Initialize dynamic command manager
 dynamic_commands = DynamicCommandManager()
 
+# Module-level state carried over when handlers are hot reloaded (see reloader.py)
+_RELOAD_STATE = ("command_counters", "dynamic_commands")
+
 
 class CommandCounters:
     """Manages command counters with proper encapsulation."""
@@ -64,6 +70,16 @@ def get_command_count(command_name: str) -> int:
     return command_counters.get(command_name)
 
 
+def snapshot_state() -> Dict[str, Any]:
+    """Snapshot command module state for checkpoints."""
+    return {"command_counters": dict(command_counters.counters)}
+
+
+def restore_state(state: Dict[str, Any]) -> None:
+    """Restore command module state from a checkpoint."""
+    command_counters.counters.update(state.get("command_counters", {}))
+
+
 async def handle_command(bot, message) -> None:
     """
     Main command handler that routes messages to appropriate command functions.
@@ -80,11 +96,12 @@ async def handle_command(bot, message) -> None:
 
     # Check cooldown for non-dynamic commands
     if command not in CommandLists.NO_COOLDOWN:
-        on_cooldown, remaining = cooldown_manager.is_on_cooldown(
-            command,
-            message.author.name,
-            is_mod
-        )
+        with span("cooldown"):
+            on_cooldown, remaining = cooldown_manager.is_on_cooldown(
+                command,
+                message.author.name,
+                is_mod
+            )
         if on_cooldown:
             await message.channel.send(
                 Messages.COMMAND_ON_COOLDOWN.format(
@@ -95,7 +112,8 @@ async def handle_command(bot, message) -> None:
             return
 
     # Check for dynamic command first
-    command_result = dynamic_commands.get_command(command)
+    with span("dynamic_lookup"):
+        command_result = dynamic_commands.get_command(command)
     if command_result:
         response, command_name = command_result
         await message.channel.send(response)
@@ -111,7 +129,8 @@ async def handle_command(bot, message) -> None:
     # Route to specific command handlers
     command_handler = get_command_handler(command)
     if command_handler:
-        await command_handler(message, args)
+        with span(f"handle_{command}"):
+            await command_handler(message, args)
         # Set cooldown after successful command execution
         cooldown_manager.set_cooldown(command, message.author.name)
 
@@ -130,7 +149,8 @@ async def handle_dynamic_command_management(command: str, args: str, message, is
     elif command == "delcmd":
         await handle_delete_command(args, message)
     elif command == "listcmds":
-        await message.channel.send(dynamic_commands.list_commands())
+        page = int(args) if args.isdigit() else 1
+        await message.channel.send(dynamic_commands.list_commands(page))
     elif command == "cmdinfo":
         await handle_command_info(args, message)
 
@@ -197,22 +217,7 @@ async def handle_command_info(args: str, message) -> None:
 
 def get_command_handler(command: str):
     """Get the appropriate handler function for a command."""
-    handlers = {
-        "bye": handle_bye,
-        "brb": handle_brb,
-        "returned": handle_returned,
-        "lurk": handle_lurk,
-        "penta": handle_penta,
-        "quadra": handle_quadra,
-        "cannon": handle_cannon,
-        "latege": handle_latege,
-        "joke": handle_joke,
-        "t": handle_translate,
-        "spam": handle_spam,
-        "youtube": handle_youtube,
-        "coin": handle_coin,
-    }
-    return handlers.get(command)
+    return COMMAND_HANDLERS.get(command)
 
 
 # Individual command handlers
@@ -265,31 +270,33 @@ async def handle_cannon(message, args: str) -> None:
 
 async def handle_latege(message, args: str) -> None:
     """Handle the latege command - check if stream is late."""
-    now = datetime.datetime.now()
-    day_of_week = now.strftime("%A").lower()
-
-    # Get today's scheduled time if available
-    scheduled_time_str = STREAM_SCHEDULE.get(day_of_week)
+    now = stream_schedule.now()
+
+    # Once live, report how the actual start compared to the schedule
+    status = await live_status.get(message.channel.name)
+    if status is not None and status.live:
+        started = status.started_at or now
+        scheduled = stream_schedule.nearest_on_day(started)
+        if scheduled is None:
+            await message.channel.send(Messages.LATEGE_SECRET_STREAM)
+            return
+        minutes = minutes_between(scheduled, started)
+        if minutes > 0:
+            await message.channel.send(Messages.LATEGE_STARTED_LATE.format(minutes=minutes))
+        else:
+            await message.channel.send(Messages.LATEGE_STARTED_EARLY.format(minutes=-minutes))
+        return
 
-    if scheduled_time_str:
-        scheduled_time = datetime.datetime.strptime(scheduled_time_str, "%H:%M").replace(
-            year=now.year, month=now.month, day=now.day
+    previous = stream_schedule.previous_slot(now)
+    upcoming = stream_schedule.next_slot(now)
+    if previous is not None and previous.date() == now.date():  # Stream is late
+        minutes_late = minutes_between(previous, now)
+        await message.channel.send(
+            f"The stream is currently {minutes_late} minutes late! "
+            f"Peks probably lost track of time again latege"
         )
-
-        if scheduled_time < now:  # Stream is late
-            delta = now - scheduled_time
-            minutes_late = delta.seconds // 60
-            await message.channel.send(
-                f"The stream is currently {minutes_late} minutes late! "
-                f"Peks probably lost track of time again latege"
-            )
-        else:  # Stream is early or on time
-            delta = scheduled_time - now
-            minutes_early = delta.seconds // 60
-            await message.channel.send(
-                f"Wow! The stream is actually {minutes_early} minutes early today! "
-                f"A new record? PogChamp"
-            )
+    elif upcoming is not None and upcoming.date() == now.date():  # Not live yet and not due yet
+        await message.channel.send(Messages.LATEGE_STARTS_IN.format(minutes=minutes_between(now, upcoming)))
     else:
         # Check for next scheduled stream
         next_stream_info = find_next_stream(now)
@@ -303,14 +310,11 @@ async def handle_latege(message, args: str) -> None:
 
 
 def find_next_stream(current_time: datetime.datetime) -> Optional[Tuple[str, str]]:
-    """Find the next scheduled stream."""
-    for days_ahead in range(1, 8):
-        future_date = current_time + datetime.timedelta(days=days_ahead)
-        future_day = future_date.strftime("%A").lower()
-        future_stream = STREAM_SCHEDULE.get(future_day)
-        if future_stream:
-            return future_date.strftime("%A"), future_stream
-    return None
+    """Find the next scheduled stream after the current day, as (weekday, "HH:MM")."""
+    slot = stream_schedule.next_day_slot(current_time)
+    if slot is None or (slot.date() - stream_schedule.local(current_time).date()).days > 7:
+        return None
+    return slot.strftime("%A"), slot.strftime("%H:%M")
 
 
 async def handle_joke(message, args: str) -> None:
@@ -318,19 +322,7 @@ async def handle_joke(message, args: str) -> None:
     if random.randint(0, 1) == 0:
         await message.channel.send(Messages.JOKE_NOT_BRINGING_BACK)
     else:
-        try:
-            joke_response = requests.get(
-                "https://icanhazdadjoke.com",
-                headers={"Accept": "application/json"},
-                timeout=5
-            )
-            if joke_response.status_code == 200:
-                joke_data = joke_response.json()
-                await message.channel.send(joke_data["joke"])
-            else:
-                await message.channel.send(Messages.ERROR_JOKE_FETCH)
-        except (requests.RequestException, KeyError):
-            await message.channel.send(Messages.ERROR_JOKE_FETCH)
+        await message.channel.send(joke_buffer.next_joke())
 
 
 async def handle_translate(message, args: str) -> None:
@@ -339,8 +331,10 @@ async def handle_translate(message, args: str) -> None:
         await message.channel.send(Messages.ERROR_TRANSLATION)
         return
 
-    translated_text, source_lang = translate_text_to_english(args)
-    if translated_text and source_lang:
+    translated_text, source_lang = await translator.translate(args)
+    if source_lang == "en":
+        await message.channel.send(Messages.TRANSLATION_ALREADY_ENGLISH)
+    elif translated_text and source_lang:
         await message.channel.send(
             f"Translation Result: {translated_text} (Translated from {source_lang})"
         )
@@ -377,3 +371,21 @@ async def handle_coin(message, args: str) -> None:
     """Handle the coin flip command."""
     result = "Heads" if random.randint(0, 1) == 0 else "Tails"
     await message.channel.send(Messages.COIN_FLIP.format(result=result))
+
+
+# Dispatch table, rebuilt whenever this module is (re)loaded
+COMMAND_HANDLERS = {
+    "bye": handle_bye,
+    "brb": handle_brb,
+    "returned": handle_returned,
+    "lurk": handle_lurk,
+    "penta": handle_penta,
+    "quadra": handle_quadra,
+    "cannon": handle_cannon,
+    "latege": handle_latege,
+    "joke": handle_joke,
+    "t": handle_translate,
+    "spam": handle_spam,
+    "youtube": handle_youtube,
+    "coin": handle_coin,
+}
@@ -17,7 +17,12 @@ class Messages:
         "See known issues here: https://github.com/IHasPeks/Murphy2/issues. "
         "use ?about for more info"
     )
-    BOT_RESTART_INITIATED = "Bot restart initiated. The bot will be back in a few seconds..."
+    BOT_RESTART_INITIATED = "Bot restart initiated. A new instance is warming up and will take over shortly..."
+    BOT_RESTART_FAILED = "Restart failed, the current instance will keep running."
+    RELOAD_SUCCESS = "Reloaded {modules} in {ms:.1f} ms."
+    RELOAD_FAILED = "Reload failed, keeping the current handlers: {error}"
+    TRACING_DISABLED = "Message tracing is off. Set TRACE_SAMPLE_RATE to turn it on."
+    NO_SLOW_TRACES = "No traced messages slower than {ms:.0f} ms yet."
 
     # Queue Messages
     QUEUE_JOINED = "{username} joined main queue. Pos: {position}"
@@ -42,6 +47,8 @@ class Messages:
     COMMAND_USAGE_DELCMD = "Usage: ?delcmd <command_name>"
     COMMAND_USAGE_ADDALIAS = "Usage: ?addalias <command_name> <alias1,alias2,...> <response>"
     NO_DYNAMIC_COMMANDS = "No dynamic commands available."
+    LIST_PAGE_FOOTER = " (page {page}/{pages}, ?listcmds {next} for more)"
+    LIST_LAST_PAGE_FOOTER = " (page {page}/{pages})"
 
     # AI Messages
     AI_UNAVAILABLE = "AI service is currently unavailable. Please try again later."
@@ -51,6 +58,13 @@ class Messages:
     AI_OVERWHELMED = "I'm a bit overwhelmed right now. Please try again in a moment! 🐺"
     AI_TECHNICAL_DIFFICULTIES = "Having some technical difficulties. Please try again later! 🛠️"
     AI_ERROR_GENERIC = "Sorry, I couldn't process that. Please try again later."
+    AI_BUDGET_EXCEEDED = "Today's AI allowance is used up. Try again tomorrow! 💸"
+
+    # Stream Status Messages
+    LATEGE_STARTED_LATE = "Peks went live {minutes} minutes late today latege"
+    LATEGE_STARTED_EARLY = "Peks went live {minutes} minutes early today! A new record? PogChamp"
+    LATEGE_SECRET_STREAM = "No stream was scheduled today, this is a secret stream! PogChamp"
+    LATEGE_STARTS_IN = "Stream is scheduled to start in {minutes} minutes. Not late yet!"
 
     # Permission Messages
     PERMISSION_DENIED_OWNER = "Sorry, this command is restricted to the channel owner only."
@@ -64,6 +78,7 @@ class Messages:
 
     # Error Messages
     ERROR_TRANSLATION = "Couldn't translate text."
+    TRANSLATION_ALREADY_ENGLISH = "That already looks like English."
     ERROR_JOKE_FETCH = "Couldn't fetch a joke at the moment. Try again later!"
     ERROR_INVALID_USERNAME = "Invalid username: {error}"
     ERROR_USER_NOT_FOUND = "{username} not found in queue."
@@ -97,7 +112,6 @@ class Numbers:
     COOLDOWN_GLOBAL_JOKE = 5
 
     # Rate Limiting
-    MAX_REQUESTS_PER_MINUTE = 20
     MAX_REQUESTS_PER_USER_MINUTE = 3
 
     # Cache Settings
@@ -108,6 +122,7 @@ class Numbers:
     # File Settings
     LOG_MAX_BYTES = 10 * 1024 * 1024  # 10MB
     LOG_BACKUP_COUNT = 5
+    LOG_DEBUG_SAMPLE_EVERY = 10  # Keep 1 in N DEBUG records per logger
     MAX_COMMAND_BACKUPS = 10
 
     # Retry Settings
@@ -120,23 +135,130 @@ class Numbers:
     MAX_COMMAND_RESPONSE_LENGTH = 400
     MAX_USERNAME_LENGTH = 25
     MAX_MESSAGE_LENGTH = 500
+    PAGE_FOOTER_RESERVE = 40  # Room for " (page x/y, ?listcmds z for more)"
 
     # Bot Behavior
     FIRST_TIME_CHATTER_RESPONSE_CHANCE = 0.25
+    KNOWN_USERS_CAPACITY = 2_000_000  # Lifetime chatters before the filter degrades
+    KNOWN_USERS_FALSE_POSITIVE_RATE = 0.001
     MAX_RESTART_ATTEMPTS = 5
     INITIAL_BACKOFF_TIME = 5
     PERIODIC_SAVE_INTERVAL = 300  # 5 minutes
+    CHECKPOINT_INTERVAL = 60  # 1 minute
+    HOT_RESTART_READY_TIMEOUT = 60  # Seconds a new worker gets to warm up
+    HOT_RESTART_POLL_INTERVAL = 0.05
     COOLDOWN_CLEANUP_INTERVAL = 300  # 5 minutes
     COMMAND_WATCHER_INTERVAL = 5  # 5 seconds
     NOT_AVAILABLE_TIMEOUT_HOURS = 1
+    NOT_AVAILABLE_CHECK_INTERVAL = 60
+
+    # Job scheduler
+    JOB_MISFIRE_GRACE = 30  # Seconds a run may be late before its misfire policy applies
+    JOB_SHUTDOWN_TIMEOUT = 5  # Seconds running jobs get to finish at shutdown
+    JOB_DEFAULT_JITTER = 5
 
     # Performance
     API_TIMEOUT_SECONDS = 10
+    EVENTSUB_SUBSCRIBE_CONCURRENCY = 10
+    HELIX_MAX_LOGINS_PER_REQUEST = 100
+
+    # Live status cache
+    LIVE_STATUS_POLL_INTERVAL = 60
+    LIVE_STATUS_HELIX_TTL = 120  # Polled statuses are refreshed after this many seconds
+    LIVE_STATUS_EVENTSUB_TTL = 900  # Pushed statuses are trusted longer
+
+    # Metrics endpoint
+    METRICS_PORT = 9108  # Local /metrics port; 0 disables it
+    METRICS_BIND_ATTEMPTS = 5
+    METRICS_BIND_RETRY_DELAY = 2  # Seconds; the old instance holds the port briefly during hot restarts
+
+    # Event loop monitor
+    LOOP_LAG_INTERVAL = 0.5  # Seconds between lag samples
+    LOOP_LAG_THRESHOLD = 0.1  # Lag in seconds logged as a stall, with a stack sample
+    LOOP_LAG_WINDOW = 1200  # Samples kept for percentiles, 10 minutes at the default interval
+    LOOP_STACK_DEPTH = 15  # Frames kept per stack sample
+
+    # Message tracing
+    TRACE_SLOW_MS = 500  # Traced messages at least this slow are kept
+    TRACE_BUFFER_SIZE = 50  # Slow traces kept in memory
+    TRACE_DUMP_COUNT = 3  # Traces ?slowtraces shows by default
+
+    # Stream schedule
+    STREAM_SCHEDULE_HORIZON_DAYS = 35  # Days of slots indexed either side of today
+
+    # Outbound chat (Twitch allows 20 messages per 30s per channel, 100 where the bot is a moderator)
+    CHAT_RATE_LIMIT_PER_CHANNEL = 20
+    CHAT_RATE_LIMIT_MODERATOR = 100
+    CHAT_RATE_LIMIT_GLOBAL = 100
+    CHAT_RATE_WINDOW = 30
+    OUTBOUND_MAX_PENDING_PER_CHANNEL = 50
+
+    # Shared HTTP client
+    HTTP_POOL_LIMIT = 20
+    HTTP_POOL_LIMIT_PER_HOST = 5
+    HTTP_KEEPALIVE_SECONDS = 30
+    HTTP_DNS_CACHE_SECONDS = 300
+    HTTP_TIMEOUT_SECONDS = 5
+    HTTP_CONNECT_TIMEOUT_SECONDS = 3
+    HTTP_BREAKER_FAILURE_THRESHOLD = 5
+    HTTP_BREAKER_RECOVERY_SECONDS = 60
+    AI_BREAKER_FAILURE_THRESHOLD = 5
+    AI_BREAKER_RECOVERY_SECONDS = 30
+
+    # Adaptive OpenAI concurrency (AIMD)
+    AI_LIMIT_INITIAL = 4
+    AI_LIMIT_MIN = 1
+    AI_LIMIT_MAX = 32
+    AI_LATENCY_TARGET_SECONDS = 6.0
+    AI_LIMIT_BACKOFF_FACTOR = 0.5
+    AI_QUEUE_MAX = 50
+    AI_QUEUE_DEADLINE_SECONDS = 20
+    AI_LIMITER_MAX_REQUEUES = 2
+
+    # AI work queue (priorities, deadlines, fair sharing)
+    AI_WORK_QUEUE_MAX = 40
+    AI_COMMAND_DEADLINE_SECONDS = 30  # Drop ?ai requests not started by then
+    AI_WELCOME_DEADLINE_SECONDS = 15  # Welcomes go stale quickly
+    AI_WELCOME_SAMPLE_DEPTH = 5  # Queue depth where welcomes start being sampled
+    AI_WELCOME_SAMPLE_RATE = 0.25  # Fraction of welcomes kept while sampling
+    TWITCH_BREAKER_FAILURE_THRESHOLD = 5
+    TWITCH_BREAKER_RECOVERY_SECONDS = 30
+
+    # Semantic AI response cache
+    SEMANTIC_CACHE_SIZE = 1024
+    SEMANTIC_CACHE_DIMS = 512  # 1024 x 512 float32 = 2 MB
+    SEMANTIC_CACHE_THRESHOLD = 0.85
+
+    # AI usage accounting (dollars per UTC day; 0 disables a budget)
+    AI_USER_DAILY_BUDGET = 0.05
+    AI_CHANNEL_DAILY_BUDGET = 2.00
+    AI_BUDGET_DOWNGRADE_RATIO = 0.8  # Switch to the budget model past 80% of a budget
+    AI_USAGE_RETENTION_DAYS = 30
+
+    # Translation
+    TRANSLATION_CACHE_SIZE = 512
+    TRANSLATION_MIN_WORDS_FOR_DETECTION = 3
+    TRANSLATION_ENGLISH_WORD_RATIO = 0.6
+
+    # Joke prefetching
+    JOKE_BUFFER_SIZE = 8
+    JOKE_RECENT_HISTORY = 50
+    JOKE_REFILL_INTERVAL = 300  # Top up at least every 5 minutes
     HEALTH_CHECK_TIMEOUT = 5
     MAX_SPAM_MESSAGE_LENGTH = 500
     MAX_EXCESSIVE_CAPS_RATIO = 0.7
     MAX_SPECIAL_CHARS_RATIO = 0.5
 
+    # Chat filter
+    SPAM_SCORE_THRESHOLD = 1.0
+    SPAM_MIN_REPEAT_LENGTH = 5  # Longer single-character messages are spam
+    SPAM_MAX_CHAR_RUN = 20  # A character repeated this many times in a row
+    SPAM_MIN_CAPS_LENGTH = 10  # Shorter messages are never judged on caps
+
+    # Chat auto-response triggers
+    TRIGGER_DEFAULT_COOLDOWN = 30
+    TRIGGER_RELOAD_INTERVAL = 5  # Seconds between triggers.json change checks
+
 # Patterns and Regular Expressions
 class Patterns:
     """Regular expression patterns used for validation."""
@@ -153,6 +275,13 @@ class Patterns:
         r'(?:/?|[/?]\S+)$'
     )
 
+    # Script injection removed from user input
+    SCRIPT_INJECTION = [
+        r'<\s*script[^>]*>',
+        r'<\s*/\s*script\s*>',
+        r'alert\s*\(.*?\)',
+    ]
+
     # AI Injection Patterns
     AI_INJECTION_PATTERNS = [
         r'ignore.*previous.*instructions',
@@ -173,13 +302,25 @@ class Paths:
     STATE_DIR = "state"
     AI_CACHE_DIR = "state/ai_cache"
     COMMAND_BACKUPS_DIR = "state/command_backups"
+    HANDOFF_DIR = "state/handoff"
 
     # Files
     BOT_STATE_FILE = "state/bot_state.pkl"
     RESTART_COUNTER_FILE = "state/restart_counter.pkl"
     DYNAMIC_COMMANDS_FILE = "dynamic_commands.json"
+    TRIGGERS_FILE = "triggers.json"
+    SCHEDULE_EXCEPTIONS_FILE = "schedule_exceptions.json"
     AI_CACHE_FILE = "state/ai_cache/ai_response_cache.json"
     CONVERSATIONS_FILE = "state/ai_cache/user_conversations.json"
+    AI_USAGE_FILE = "state/ai_cache/ai_usage.json"
+    KNOWN_USERS_FILE = "state/known_users.bloom"
+
+# External Services
+class Urls:
+    """Endpoints of external HTTP services."""
+
+    DAD_JOKE_API = "https://icanhazdadjoke.com"
+    GOOGLE_TRANSLATE_API = "https://translate.googleapis.com/translate_a/single"
 
 # Command Lists
 class Commands:
@@ -193,7 +334,8 @@ class Commands:
         'moveup', 'movedown', 'restart', 'healthcheck', 'botstat',
         'ai', 'joke', 't', 'spam', 'cannon', 'quadra', 'penta',
         'coin', 'bye', 'brb', 'returned', 'lurk', 'latege',
-        'youtube', 'addcmd', 'delcmd', 'listcmds', 'cmdinfo', 'addalias'
+        'youtube', 'addcmd', 'delcmd', 'listcmds', 'cmdinfo', 'addalias',
+        'reload', 'slowtraces'
     }
 
     # Commands that don't require cooldowns
@@ -202,8 +344,11 @@ class Commands:
     # Mod-only commands
     MOD_ONLY = ['fleave', 'fjoin', 'moveup', 'movedown', 'teamsize', 'shuffle', 'clearqueue']
 
+    # Fun commands, sent at the lowest outbound priority
+    FUN = ['joke', 'spam', 'cannon', 'quadra', 'penta', 'coin']
+
     # Owner-only commands
-    OWNER_ONLY = ['restart', 'healthcheck']
+    OWNER_ONLY = ['restart', 'healthcheck', 'reload']
 
 # Suspicious Patterns
 class Security:
@@ -219,6 +364,16 @@ class Models:
     """Default models and API configurations."""
 
     DEFAULT_OPENAI_MODEL = "gpt-3.5-turbo"
+    AI_BUDGET_MODEL = "gpt-4o-mini"  # Used when a user or channel nears its budget
+
+    # Dollars per million (input, output) tokens
+    PRICING = {
+        "gpt-3.5-turbo": (0.50, 1.50),
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4.1-mini": (0.40, 1.60),
+        "gpt-4.1": (2.00, 8.00),
+    }
     AI_SYSTEM_PROMPT = (
         "You are Murphy, the companion of streamer Peks. Your role is to create funny, "
         "troll-like responses that might annoy the audience, ensuring they include some "
@@ -6,7 +6,10 @@ import time
 import logging
 from typing import Dict, Optional, Tuple
 from functools import wraps
-import asyncio
+
+from constants import Numbers
+from job_scheduler import job_scheduler
+from metrics import cooldown_rejections_total
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +20,6 @@ class CooldownManager:
     def __init__(self):
         # Store last usage times: {command: {user: last_used_timestamp}}
         self.cooldowns: Dict[str, Dict[str, float]] = {}
-        # Import constants
-        from constants import Numbers
 
         # Default cooldown times in seconds for different command types
         self.default_cooldowns = {
@@ -48,6 +49,7 @@ class CooldownManager:
             if command in self.global_cooldowns:
                 global_remaining = self.global_cooldown_times[command] - (current_time - self.global_cooldowns[command])
                 if global_remaining > 0:
+                    cooldown_rejections_total.labels(command).inc()
                     return True, int(global_remaining)
 
         # Mods have reduced cooldowns
@@ -62,6 +64,7 @@ class CooldownManager:
             time_passed = current_time - self.cooldowns[command][user]
             if time_passed < cooldown_time:
                 remaining = int(cooldown_time - time_passed)
+                cooldown_rejections_total.labels(command).inc()
                 return True, remaining
 
         return False, None
@@ -93,12 +96,28 @@ class CooldownManager:
             if not self.cooldowns[command]:
                 del self.cooldowns[command]
 
-    async def start_cleanup_task(self, loop):
-        """Start a background task to clean up old cooldowns."""
-        while True:
-            await asyncio.sleep(300)  # Clean up every 5 minutes
-            self.clear_old_cooldowns()
-            logger.debug(f"Cleaned up cooldowns. Active commands: {len(self.cooldowns)}")
+    def snapshot_state(self) -> Dict[str, Dict]:
+        """Snapshot active cooldowns for checkpoints."""
+        return {
+            "cooldowns": {command: dict(users) for command, users in self.cooldowns.items()},
+            "global_cooldowns": dict(self.global_cooldowns),
+        }
+
+    def restore_state(self, state: Dict[str, Dict]) -> None:
+        """Restore cooldowns from a checkpoint."""
+        self.cooldowns = state.get("cooldowns", {})
+        self.global_cooldowns = state.get("global_cooldowns", {})
+        self.clear_old_cooldowns()
+
+    def _cleanup(self) -> None:
+        self.clear_old_cooldowns()
+        logger.debug(f"Cleaned up cooldowns. Active commands: {len(self.cooldowns)}")
+
+    def start_cleanup_task(self, scheduler=job_scheduler) -> None:
+        """Schedule periodic cleanup of old cooldowns."""
+        scheduler.add_interval(
+            "cooldown_cleanup", self._cleanup, Numbers.COOLDOWN_CLEANUP_INTERVAL, jitter=Numbers.JOB_DEFAULT_JITTER
+        )
 
 
 # Global instance
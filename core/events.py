@@ -29,25 +29,25 @@ class EventHandler:
         logger.info(f"Logged in as | {self.bot.nick}")
         
         try:
-            # Start scheduler
+            # Start the scheduler; it also starts the shared job scheduler
             from scheduler import start_scheduler
-            await start_scheduler(self.bot)
+            self.bot.scheduler = await start_scheduler(self.bot)
             
-            # Start queue cleanup
-            self.bot.queue_manager.start_cleanup_task(self.bot.loop)
+            # Periodic work below runs as jobs on the shared job scheduler
+            self.bot.queue_manager.start_cleanup_task()
             
             # Start AI cache save task
             from ai_command import start_periodic_save
-            start_periodic_save(self.bot.loop)
+            start_periodic_save()
             
             # Start dynamic command watcher
             from dynamic_commands import DynamicCommandManager
             dynamic_command_manager = DynamicCommandManager()
-            dynamic_command_manager.start_command_watcher(self.bot.loop)
+            dynamic_command_manager.start_command_watcher()
             
             # Start cooldown cleanup
             from cooldown_manager import cooldown_manager
-            await cooldown_manager.start_cleanup_task(self.bot.loop)
+            cooldown_manager.start_cleanup_task()
             
             # Send welcome message
             await self._send_welcome_message()
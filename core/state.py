@@ -6,10 +6,11 @@ Handles state persistence and recovery
 import os
 import pickle
 import logging
-from typing import Dict, Set, Any, Optional
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 from constants import Paths
+from known_users import KnownUsers
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ class StateManager:
         self.restart_counter_file = Paths.RESTART_COUNTER_FILE
         
         # Initialize state
-        self.known_users: Set[str] = set()
+        self.known_users = KnownUsers()
         self.start_time = datetime.now().timestamp()
         self.message_count = 0
         self.command_count = 0
@@ -40,8 +41,9 @@ class StateManager:
     def save_state(self) -> None:
         """Save current bot state to disk"""
         try:
+            # Known users persist through their own memory-mapped filter file
+            self.known_users.flush()
             state = {
-                "known_users": list(self.known_users),
                 "start_time": self.start_time,
                 "message_count": self.message_count,
                 "command_count": self.command_count,
@@ -71,7 +73,8 @@ class StateManager:
                 state = pickle.load(f)
             
             # Restore state
-            self.known_users = set(state.get("known_users", []))
+            # Migrate known users from the legacy pickled list
+            self.known_users.update(state.get("known_users", []))
             self.start_time = state.get("start_time", datetime.now().timestamp())
             self.message_count = state.get("message_count", 0)
             self.command_count = state.get("command_count", 0)
@@ -103,11 +106,8 @@ class StateManager:
         self.error_count += 1
 
     def add_known_user(self, username: str) -> bool:
-        """Add a user to known users set. Returns True if user was new"""
-        if username not in self.known_users:
-            self.known_users.add(username)
-            return True
-        return False
+        """Add a user to known users filter. Returns True if user was new"""
+        return self.known_users.add(username)
 
     def get_command_count(self, command: str) -> int:
         """Get count for a specific command"""
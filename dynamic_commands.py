@@ -3,8 +3,10 @@ import os
 import time
 import logging
 import re
-import asyncio
 from typing import Dict, Optional, List, Tuple
+from constants import Messages, Numbers
+from output_utils import paginate
+from job_scheduler import job_scheduler
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -15,7 +17,6 @@ class DynamicCommandManager:
         self.commands_file = "dynamic_commands.json"
         self.backup_dir = os.path.join("state", "command_backups")
         self.last_modified_time = 0
-        self.command_watcher_task = None
 
         # Create backup directory if it doesn't exist
         os.makedirs(self.backup_dir, exist_ok=True)
@@ -198,8 +199,16 @@ class DynamicCommandManager:
 
         return None
 
-    def list_commands(self) -> str:
-        """List all dynamic commands."""
+    def list_commands(self, page: int = 1) -> str:
+        """
+        List dynamic commands, one chat message per page.
+
+        Args:
+            page: 1-based page number; out-of-range pages are clamped
+
+        Returns:
+            The requested page, with a pointer to the next one if there is more
+        """
         if not self.commands:
             return "No dynamic commands available."
 
@@ -218,7 +227,17 @@ class DynamicCommandManager:
             else:
                 command_list.append(name)
 
-        return "Dynamic commands: " + ", ".join(command_list)
+        header = "Dynamic commands: "
+        budget = Numbers.MAX_MESSAGE_LENGTH - len(header) - Numbers.PAGE_FOOTER_RESERVE
+        pages = paginate(command_list, budget)
+        page = min(max(page, 1), len(pages))
+
+        response = header + pages[page - 1]
+        if page < len(pages):
+            response += Messages.LIST_PAGE_FOOTER.format(page=page, pages=len(pages), next=page + 1)
+        elif len(pages) > 1:
+            response += Messages.LIST_LAST_PAGE_FOOTER.format(page=page, pages=len(pages))
+        return response
 
     def get_command_details(self, name: str) -> str:
         """Get detailed information about a command."""
@@ -272,23 +291,19 @@ class DynamicCommandManager:
 
         return "\n".join(details)
 
-    def start_command_watcher(self, loop):
-        """Start a task to watch for changes to the commands file"""
-        if self.command_watcher_task is None:
-            self.command_watcher_task = loop.create_task(self._watch_commands_file())
-            logger.info("Started command file watcher task")
+    def start_command_watcher(self, scheduler=job_scheduler):
+        """Schedule a job that watches for changes to the commands file"""
+        scheduler.add_interval("dynamic_commands_watcher", self._check_commands_file, Numbers.COMMAND_WATCHER_INTERVAL)
+        logger.info("Started command file watcher job")
 
-    async def _watch_commands_file(self):
-        """Watch the commands file for changes and reload when needed"""
-        while True:
-            try:
-                if os.path.exists(self.commands_file):
-                    mod_time = os.path.getmtime(self.commands_file)
-                    # If the file was modified since we last loaded it
-                    if mod_time > self.last_modified_time:
-                        logger.info("Commands file modified externally, reloading...")
-                        self.load_commands()
-            except Exception as e:
-                logger.error(f"Error watching commands file: {e}")
-
-            await asyncio.sleep(5)  # Check every 5 seconds
+    def _check_commands_file(self):
+        """Reload the commands file if it changed since it was last loaded"""
+        try:
+            if os.path.exists(self.commands_file):
+                mod_time = os.path.getmtime(self.commands_file)
+                # If the file was modified since we last loaded it
+                if mod_time > self.last_modified_time:
+                    logger.info("Commands file modified externally, reloading...")
+                    self.load_commands()
+        except Exception as e:
+            logger.error(f"Error watching commands file: {e}")
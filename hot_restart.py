@@ -0,0 +1,153 @@
+"""
+Zero-downtime hot restart for the MurphyAI bot.
+
+The running instance starts a new worker and keeps serving chat while the
+worker imports modules, maps caches and subscribes to EventSub. Once the
+worker reports ready, the old instance stops handling messages, hands over a
+checkpoint of its runtime state (cooldowns, rate limits, counters, queues)
+and exits. The time between the old instance releasing chat and the new one
+accepting it is recorded as the restart gap.
+"""
+import asyncio
+import json
+import logging
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from constants import Numbers, Paths
+
+logger = logging.getLogger(__name__)
+
+# Environment variables passed to the new worker
+HANDOFF_DIR_ENV = "MURPHY_HANDOFF_DIR"
+HANDOFF_PARENT_ENV = "MURPHY_HANDOFF_PARENT_PID"
+
+READY_FILE = "ready.json"
+STATE_FILE = "state.pkl"
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+async def _wait_for_file(path: str, timeout: float, process: Optional[subprocess.Popen] = None) -> bool:
+    """Poll for a file to appear, giving up on timeout or if the process dies."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            return True
+        if process is not None and process.poll() is not None:
+            return False
+        await asyncio.sleep(Numbers.HOT_RESTART_POLL_INTERVAL)
+    return False
+
+
+class HotRestartCoordinator:
+    """Runs in the old instance: starts, waits for and hands state to the new worker."""
+
+    def __init__(self, bot, script: str, handoff_dir: str = Paths.HANDOFF_DIR):
+        self.bot = bot
+        self.script = script
+        self.handoff_dir = handoff_dir
+
+    def _spawn_worker(self) -> subprocess.Popen:
+        shutil.rmtree(self.handoff_dir, ignore_errors=True)
+        os.makedirs(self.handoff_dir, exist_ok=True)
+
+        env = dict(os.environ)
+        env[HANDOFF_DIR_ENV] = os.path.abspath(self.handoff_dir)
+        env[HANDOFF_PARENT_ENV] = str(os.getpid())
+
+        return subprocess.Popen(
+            [sys.executable, self.script],
+            env=env,
+            start_new_session=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    async def restart(self, timeout: float = Numbers.HOT_RESTART_READY_TIMEOUT) -> bool:
+        """
+        Hand over to a freshly started worker.
+
+        Returns:
+            True once state has been handed over, after which the caller must
+            exit. False if the worker failed to become ready; the current
+            instance keeps running in that case.
+        """
+        started_at = time.monotonic()
+        worker = self._spawn_worker()
+        logger.info(f"Started hot restart worker (pid {worker.pid}), waiting for warm-up...")
+
+        ready_path = os.path.join(self.handoff_dir, READY_FILE)
+        if not await _wait_for_file(ready_path, timeout, worker):
+            logger.error(f"Hot restart worker not ready after {timeout}s, keeping current instance")
+            if worker.poll() is None:
+                worker.terminate()
+            shutil.rmtree(self.handoff_dir, ignore_errors=True)
+            return False
+
+        logger.info(f"Worker warmed up in {time.monotonic() - started_at:.2f}s, handing over state")
+
+        # From here on the new worker owns chat; capture state with nothing in flight
+        self.bot.accepting_messages = False
+        state = self.bot.checkpointer.capture()
+        state["released_at"] = time.time()
+        _atomic_write(
+            os.path.join(self.handoff_dir, STATE_FILE),
+            pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+        # Keep the on-disk checkpoint current in case the worker dies later
+        self.bot.checkpointer.write(state)
+
+        logger.info("State handed over to the new worker")
+        return True
+
+
+class HandoffReceiver:
+    """Runs in the new worker: reports readiness and adopts the old instance's state."""
+
+    def __init__(self, handoff_dir: str, parent_pid: Optional[int] = None):
+        self.handoff_dir = handoff_dir
+        self.parent_pid = parent_pid
+
+    @classmethod
+    def from_environment(cls) -> Optional["HandoffReceiver"]:
+        """Return a receiver if this process was started by a hot restart."""
+        handoff_dir = os.environ.pop(HANDOFF_DIR_ENV, None)
+        parent_pid = os.environ.pop(HANDOFF_PARENT_ENV, None)
+        if not handoff_dir:
+            return None
+        return cls(handoff_dir, int(parent_pid) if parent_pid else None)
+
+    def signal_ready(self) -> None:
+        """Tell the old instance that imports, caches and subscriptions are done."""
+        payload = json.dumps({"pid": os.getpid(), "ready_at": time.time()})
+        _atomic_write(os.path.join(self.handoff_dir, READY_FILE), payload.encode("utf-8"))
+
+    async def receive_state(self, timeout: float = Numbers.HOT_RESTART_READY_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """Wait for the old instance to release chat and return its state."""
+        state_path = os.path.join(self.handoff_dir, STATE_FILE)
+        if not await _wait_for_file(state_path, timeout):
+            logger.warning("No state received from the previous instance")
+            return None
+
+        try:
+            with open(state_path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read handed-over state: {e}")
+            return None
+        finally:
+            shutil.rmtree(self.handoff_dir, ignore_errors=True)
@@ -0,0 +1,95 @@
+"""
+Shared HTTP client for outbound API calls.
+
+One pooled aiohttp session is reused for every request so connections stay
+alive between calls, and each external dependency gets its own circuit
+breaker so a dead service fails fast instead of stalling chat commands.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from constants import BOT_NAME, BOT_VERSION, Numbers
+from retry_utils import API_RETRY_CONFIG, CircuitBreaker, RetryConfig, get_circuit_breaker, resilient_call
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared session, creating it on first use in the running loop."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=Numbers.HTTP_POOL_LIMIT,
+            limit_per_host=Numbers.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=Numbers.HTTP_KEEPALIVE_SECONDS,
+            ttl_dns_cache=Numbers.HTTP_DNS_CACHE_SECONDS,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=Numbers.HTTP_TIMEOUT_SECONDS,
+                connect=Numbers.HTTP_CONNECT_TIMEOUT_SECONDS,
+            ),
+            headers={"User-Agent": f"{BOT_NAME}/{BOT_VERSION}"},
+        )
+        _session_loop = loop
+    return _session
+
+
+def get_breaker(dependency: str) -> CircuitBreaker:
+    """Return the circuit breaker guarding an external HTTP dependency."""
+    return get_circuit_breaker(
+        dependency,
+        failure_threshold=Numbers.HTTP_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout=Numbers.HTTP_BREAKER_RECOVERY_SECONDS,
+        expected_exception=(aiohttp.ClientError, asyncio.TimeoutError),
+    )
+
+
+async def get_json(
+    url: str,
+    dependency: str,
+    params: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    retry_config: Optional[RetryConfig] = API_RETRY_CONFIG,
+) -> Any:
+    """
+    GET a URL through the dependency's circuit breaker and decode the JSON body.
+
+    Args:
+        url: URL to fetch
+        dependency: Name of the external service, used to pick the breaker
+        params: Query string parameters
+        headers: Extra request headers
+        retry_config: Backoff for transient failures; None makes a single attempt
+
+    Returns:
+        The decoded JSON body
+
+    Raises:
+        aiohttp.ClientError: On connection errors or non-2xx responses
+        asyncio.TimeoutError: If the request takes longer than the timeout
+        CircuitBreakerOpenError: If the breaker is open
+    """
+    async def _request():
+        async with get_session().get(url, params=params, headers=headers) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    get_breaker(dependency)
+    return await resilient_call(dependency, _request, config=retry_config)
+
+
+async def close_session() -> None:
+    """Close the shared session; a new one is created on the next request."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
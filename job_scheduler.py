@@ -0,0 +1,414 @@
+"""
+Central job scheduler for the bot's background work.
+
+Interval, cron and one-shot jobs share one heap ordered by next run time,
+served by a single runner task that sleeps until the earliest job is due.
+Each job runs in its own task, so a slow job never delays the others, and
+a job that is still running when it comes due again is skipped rather than
+stacked. Jobs can add random jitter to spread load. When a run is missed,
+for example after the loop was blocked or the machine slept, the job's
+misfire policy decides whether it runs late once or waits for its next
+slot. Every job keeps runtime metrics, and shutdown cancels everything
+cleanly.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+# What to do with a run that is more than the grace period late
+MISFIRE_COALESCE = "coalesce"  # Run once now; any further missed runs are dropped
+MISFIRE_SKIP = "skip"  # Drop the late run and wait for the next slot
+MISFIRE_POLICIES = (MISFIRE_COALESCE, MISFIRE_SKIP)
+
+# Field name, minimum and maximum for the five cron fields
+_CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),  # 0 and 7 are both Sunday
+)
+
+
+def _parse_cron_field(spec: str, name: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Cron {name} step must be positive")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            # "5/15" means every 15 from 5
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron {name} value '{part}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    if name == "weekday" and 7 in values:
+        values.discard(7)
+        values.add(0)
+    return values
+
+
+class CronSchedule:
+    """
+    A five-field cron expression: minute hour day month weekday.
+
+    Fields accept ``*``, numbers, ranges (``1-5``), lists (``1,15``) and
+    steps (``*/10``, ``8-18/2``). Weekdays run 0-6 from Sunday, with 7 also
+    meaning Sunday. As in Vixie cron, a job restricted by both day of month
+    and weekday fires when either matches. Times are local.
+    """
+
+    def __init__(self, expression: str):
+        """
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields, got {len(parts)}")
+        self.expression = expression
+        try:
+            fields = [_parse_cron_field(part, *spec) for part, spec in zip(parts, _CRON_FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression '{expression}': {e}") from e
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # isoweekday() is 1-7 from Monday; cron counts 0-6 from Sunday
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        First matching minute strictly after a moment.
+
+        Raises:
+            ValueError: If nothing matches within the next five years (e.g. Feb 31)
+        """
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 5
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+@dataclass
+class Job:
+    """A scheduled callable and its runtime metrics."""
+    name: str
+    func: Callable[[], Any]
+    interval: Optional[float] = None
+    cron: Optional[CronSchedule] = None
+    jitter: float = 0.0
+    misfire: str = MISFIRE_COALESCE
+    misfire_grace: float = Numbers.JOB_MISFIRE_GRACE
+
+    slot: float = 0.0  # Scheduled time before jitter
+    next_run: float = 0.0
+    cancelled: bool = False
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    runs: int = 0
+    failures: int = 0
+    missed: int = 0
+    overlapped: int = 0
+    total_runtime: float = 0.0
+    max_runtime: float = 0.0
+    last_runtime: float = 0.0
+    last_run: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @property
+    def kind(self) -> str:
+        if self.cron is not None:
+            return "cron"
+        return "interval" if self.interval is not None else "once"
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def following(self, due: float, now: float) -> Optional[float]:
+        """
+        The next slot after a run that was due at ``due``, before jitter.
+
+        Missed slots in between are folded into one, so a job never runs
+        several times in a row to catch up.
+        """
+        if self.interval is not None:
+            periods = max(1, math.floor((now - due) / self.interval) + 1)
+            return due + periods * self.interval
+        if self.cron is not None:
+            return self.cron.next_after(datetime.fromtimestamp(max(due, now))).timestamp()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Runtime metrics for health reporting."""
+        return {
+            "kind": self.kind,
+            "runs": self.runs,
+            "failures": self.failures,
+            "missed": self.missed,
+            "overlapped": self.overlapped,
+            "running": self.running,
+            "avg_runtime_ms": self.total_runtime / self.runs * 1000 if self.runs else 0.0,
+            "max_runtime_ms": self.max_runtime * 1000,
+            "last_runtime_ms": self.last_runtime * 1000,
+            "last_error": self.last_error,
+            "next_run": self.next_run if not self.cancelled else None,
+        }
+
+
+class JobScheduler:
+    """Runs interval, cron and one-shot jobs from a single timer heap."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        # (run at, sequence, job); cancelled or replaced entries are skipped when popped
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        # Every job run in progress, including one-shots already off the books
+        self._running: Set[asyncio.Task] = set()
+        self.task: Optional[asyncio.Task] = None
+
+    def _push(self, job: Job, at: float) -> None:
+        job.slot = at
+        if job.jitter:
+            at += random.uniform(0, job.jitter)
+        job.next_run = at
+        heapq.heappush(self._heap, (at, next(self._sequence), job))
+        if self._wakeup is not None and self._heap[0][2] is job:
+            # New earliest job; let the runner recompute its sleep
+            self._wakeup.set()
+
+    def _add(self, job: Job, first_run: float) -> Job:
+        if job.misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy '{job.misfire}'")
+        previous = self.jobs.get(job.name)
+        if previous is not None:
+            # Re-adding a name replaces the job, e.g. after a reload
+            previous.cancelled = True
+        self.jobs[job.name] = job
+        self._push(job, first_run)
+        logger.debug(f"Scheduled {job.kind} job '{job.name}'")
+        return job
+
+    def add_interval(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        seconds: float,
+        jitter: float = 0.0,
+        first_run: Optional[float] = None,
+        misfire: str = MISFIRE_COALESCE,
+    ) -> Job:
+        """
+        Run a callable every ``seconds``.
+
+        Args:
+            name: Unique job name; an existing job with this name is replaced
+            func: Coroutine function or plain function taking no arguments
+            seconds: Interval between runs
+            jitter: Up to this many seconds are added to each run at random
+            first_run: Delay before the first run; one interval if omitted
+            misfire: What to do with late runs, MISFIRE_COALESCE or MISFIRE_SKIP
+        """
+        if seconds <= 0:
+            raise ValueError("Job interval must be positive")
+        delay = seconds if first_run is None else first_run
+        return self._add(Job(name, func, interval=seconds, jitter=jitter, misfire=misfire), time.time() + delay)
+
+    def add_cron(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        expression: str,
+        jitter: float = 0.0,
+        misfire: str = MISFIRE_COALESCE,
+    ) -> Job:
+        """
+        Run a callable on a cron schedule, e.g. ``"0 18 * * 1-5"``.
+
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        cron = CronSchedule(expression)
+        return self._add(
+            Job(name, func, cron=cron, jitter=jitter, misfire=misfire),
+            cron.next_after(datetime.now()).timestamp(),
+        )
+
+    def add_once(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        delay: float = 0.0,
+        misfire: str = MISFIRE_COALESCE,
+    ) -> Job:
+        """Run a callable once after ``delay`` seconds."""
+        return self._add(Job(name, func, misfire=misfire), time.time() + delay)
+
+    def cancel(self, name: str) -> bool:
+        """
+        Remove a job; a run already in progress finishes.
+
+        Returns:
+            True if the job existed
+        """
+        job = self.jobs.pop(name, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def _dispatch(self, job: Job, due: float, now: float) -> None:
+        late = now - due > job.misfire_grace
+        if late:
+            job.missed += 1
+            logger.warning(f"Job '{job.name}' is {now - due:.1f}s late ({job.misfire})")
+
+        if job.running:
+            # Never stack runs of the same job
+            job.overlapped += 1
+            logger.warning(f"Job '{job.name}' is still running, skipping this run")
+        elif not (late and job.misfire == MISFIRE_SKIP):
+            job.task = asyncio.get_running_loop().create_task(self._run_job(job))
+            self._running.add(job.task)
+            job.task.add_done_callback(self._running.discard)
+
+        # Slots stay anchored to the schedule; jitter never accumulates
+        following = job.following(job.slot, now)
+        if following is None:
+            if self.jobs.get(job.name) is job:
+                del self.jobs[job.name]
+        else:
+            self._push(job, following)
+
+    async def _run_job(self, job: Job) -> None:
+        started = time.monotonic()
+        job.last_run = time.time()
+        try:
+            result = job.func()
+            if inspect.isawaitable(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Job '{job.name}' failed: {e}")
+        finally:
+            runtime = time.monotonic() - started
+            job.runs += 1
+            job.total_runtime += runtime
+            job.last_runtime = runtime
+            job.max_runtime = max(job.max_runtime, runtime)
+
+    async def _run(self) -> None:
+        while True:
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                due, _, job = heapq.heappop(self._heap)
+                if due == job.next_run:
+                    self._dispatch(job, due, now)
+                continue
+
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start the runner task."""
+        if self.task is None or self.task.done():
+            self._wakeup = asyncio.Event()
+            self.task = loop.create_task(self._run())
+            logger.info(f"Started job scheduler with {len(self.jobs)} jobs")
+
+    async def shutdown(self, timeout: float = Numbers.JOB_SHUTDOWN_TIMEOUT) -> None:
+        """
+        Stop scheduling and wind down running jobs.
+
+        Jobs in progress get ``timeout`` seconds to finish before they are
+        cancelled.
+        """
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        running = list(self._running)
+        for job in self.jobs.values():
+            job.cancelled = True
+        self.jobs.clear()
+        self._heap.clear()
+        if not running:
+            return
+        _, pending = await asyncio.wait(running, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Cancelled {len(pending)} jobs still running at shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler totals and the slowest job, for health reporting."""
+        jobs = list(self.jobs.values())
+        slowest = max(jobs, key=lambda job: job.max_runtime, default=None)
+        return {
+            "jobs": len(jobs),
+            "running": len(self._running),
+            "runs": sum(job.runs for job in jobs),
+            "failures": sum(job.failures for job in jobs),
+            "missed": sum(job.missed for job in jobs),
+            "slowest": slowest.name if slowest and slowest.runs else None,
+            "slowest_ms": slowest.max_runtime * 1000 if slowest else 0.0,
+        }
+
+    def job_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-job runtime metrics."""
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+
+# Global job scheduler, shared by every background task
+job_scheduler = JobScheduler()
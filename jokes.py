@@ -0,0 +1,126 @@
+"""
+Prefetched joke buffer for the ?joke command.
+
+A scheduled job keeps a small ring buffer of jokes topped up from the joke
+API so ?joke answers from memory. Jokes shown recently are skipped, and an
+offline corpus covers upstream outages and a cold buffer.
+"""
+import logging
+import random
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Sequence
+
+from constants import Numbers
+from job_scheduler import JobScheduler, job_scheduler
+from utils import fetch_joke
+
+logger = logging.getLogger(__name__)
+
+JokeSource = Callable[[], Awaitable[Optional[str]]]
+
+FALLBACK_JOKES = (
+    "I'm reading a book about anti-gravity. It's impossible to put down.",
+    "Why don't skeletons fight each other? They don't have the guts.",
+    "I used to hate facial hair, but then it grew on me.",
+    "What do you call a fake noodle? An impasta.",
+    "Why did the scarecrow win an award? He was outstanding in his field.",
+    "I only know 25 letters of the alphabet. I don't know y.",
+    "What do you call a bear with no teeth? A gummy bear.",
+    "Why can't a bicycle stand on its own? It's two tired.",
+    "I would tell you a joke about construction, but I'm still working on it.",
+    "What did the ocean say to the beach? Nothing, it just waved.",
+    "Why did the math book look sad? It had too many problems.",
+    "How do you organize a space party? You planet.",
+    "What do you call cheese that isn't yours? Nacho cheese.",
+    "Why don't eggs tell jokes? They'd crack each other up.",
+    "I'm on a seafood diet. I see food and I eat it.",
+    "What do you call a factory that makes okay products? A satisfactory.",
+    "Why did the coffee file a police report? It got mugged.",
+    "How does a penguin build its house? Igloos it together.",
+    "What's brown and sticky? A stick.",
+    "Why did the golfer bring two pairs of pants? In case he got a hole in one.",
+)
+
+
+class JokeBuffer:
+    """Ring buffer of prefetched jokes with dedup and an offline fallback."""
+
+    def __init__(
+        self,
+        source: JokeSource = fetch_joke,
+        size: int = Numbers.JOKE_BUFFER_SIZE,
+        history: int = Numbers.JOKE_RECENT_HISTORY,
+        fallback: Sequence[str] = FALLBACK_JOKES,
+    ):
+        self.source = source
+        self.size = size
+        self.fallback = fallback
+        self.buffer: Deque[str] = deque(maxlen=size)
+        self.recent: Deque[str] = deque(maxlen=history)
+        self._scheduler: Optional[JobScheduler] = None
+        self._refilling = False
+
+        self.served_from_buffer = 0
+        self.served_from_fallback = 0
+
+    def _is_repeat(self, joke: str) -> bool:
+        return joke in self.recent or joke in self.buffer
+
+    def next_joke(self) -> str:
+        """Return a joke immediately and schedule a refill."""
+        if self.buffer:
+            joke = self.buffer.popleft()
+            self.served_from_buffer += 1
+        else:
+            fresh = [j for j in self.fallback if j not in self.recent]
+            joke = random.choice(fresh or self.fallback)
+            self.served_from_fallback += 1
+
+        self.recent.append(joke)
+        if self._scheduler is not None and not self._refilling:
+            # Top up now rather than at the next interval; re-adding replaces a pending run
+            self._scheduler.add_once("joke_refill_now", self._refill_job)
+        return joke
+
+    async def refill(self) -> int:
+        """
+        Top the buffer up from the joke source.
+
+        Returns:
+            Number of jokes added
+        """
+        added = 0
+        attempts = 0
+        while len(self.buffer) < self.size and attempts < self.size * 2:
+            attempts += 1
+            joke = await self.source()
+            if joke is None:
+                # Upstream is failing; the fallback covers us until the next round
+                break
+            if self._is_repeat(joke):
+                continue
+            self.buffer.append(joke)
+            added += 1
+        return added
+
+    async def _refill_job(self) -> None:
+        # The interval job and an early wakeup must not fetch at the same time
+        if self._refilling:
+            return
+        self._refilling = True
+        try:
+            added = await self.refill()
+        finally:
+            self._refilling = False
+        if added:
+            logger.debug(f"Prefetched {added} jokes ({len(self.buffer)} buffered)")
+
+    def start(self, scheduler: JobScheduler = job_scheduler) -> None:
+        """Schedule the prefetcher, starting with an immediate fill."""
+        self._scheduler = scheduler
+        scheduler.add_interval("joke_refill", self._refill_job, Numbers.JOKE_REFILL_INTERVAL, first_run=0)
+        logger.info("Scheduled joke prefetcher")
+
+
+# Global joke buffer instance
+joke_buffer = JokeBuffer()
@@ -0,0 +1,166 @@
+"""
+Compact known-user tracking for first-time chatter detection.
+Backed by a persisted Bloom filter that is memory-mapped at startup.
+"""
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+from typing import Iterable, Optional
+
+from constants import Numbers, Paths
+
+logger = logging.getLogger(__name__)
+
+# File layout: magic, number of bits, number of hash functions, approximate item count
+_HEADER = struct.Struct("<8sQQQ")
+_MAGIC = b"MURPHYBF"
+
+
+def optimal_parameters(capacity: int, false_positive_rate: float) -> tuple:
+    """
+    Calculate Bloom filter size for a target capacity and false-positive rate.
+
+    Returns:
+        Tuple of (num_bits, num_hashes)
+    """
+    capacity = max(1, capacity)
+    num_bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+    num_bits = max(8, (num_bits + 7) // 8 * 8)
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class KnownUsers:
+    """
+    Probabilistic set of usernames seen in chat.
+
+    Membership checks can return a false positive (a new chatter treated as known)
+    at roughly the configured rate, but never a false negative. The bit array is
+    memory-mapped from disk, so startup cost does not grow with the number of users.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = Paths.KNOWN_USERS_FILE,
+        capacity: int = Numbers.KNOWN_USERS_CAPACITY,
+        false_positive_rate: float = Numbers.KNOWN_USERS_FALSE_POSITIVE_RATE,
+    ):
+        self.path = path
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self._file = None
+        self._buffer = None
+        self.num_bits, self.num_hashes = optimal_parameters(capacity, false_positive_rate)
+        self.count = 0
+        self._open()
+
+    def _open(self) -> None:
+        """Map the filter file into memory, creating it if needed."""
+        if not self.path:
+            self._buffer = bytearray(_HEADER.size + self.num_bits // 8)
+            self._write_header()
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < _HEADER.size:
+                self._create_file()
+
+            self._file = open(self.path, "r+b")
+            self._buffer = mmap.mmap(self._file.fileno(), 0)
+            magic, num_bits, num_hashes, count = _HEADER.unpack_from(self._buffer, 0)
+            if magic != _MAGIC or len(self._buffer) != _HEADER.size + num_bits // 8:
+                raise ValueError("invalid known users file")
+
+            # An existing filter keeps the parameters it was built with
+            self.num_bits, self.num_hashes, self.count = num_bits, num_hashes, count
+            logger.info(
+                f"Loaded known users filter: ~{self.count} users, "
+                f"{len(self._buffer) // 1024} KiB mapped"
+            )
+        except Exception as e:
+            logger.error(f"Failed to map known users filter, using in-memory filter: {e}")
+            self.close()
+            self._buffer = bytearray(_HEADER.size + self.num_bits // 8)
+            self._write_header()
+
+    def _create_file(self) -> None:
+        """Create an empty (sparse) filter file."""
+        with open(self.path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, 0))
+            f.truncate(_HEADER.size + self.num_bits // 8)
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, self.num_bits, self.num_hashes, self.count)
+
+    def _positions(self, username: str):
+        """Yield the bit positions for a username using double hashing."""
+        digest = hashlib.blake2b(username.lower().encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1  # Odd step so probes never collapse onto one position
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, username: str) -> bool:
+        buffer = self._buffer
+        offset = _HEADER.size
+        for pos in self._positions(username):
+            if not buffer[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, username: str) -> bool:
+        """
+        Add a username to the filter.
+
+        Returns:
+            True if the user was not seen before
+        """
+        buffer = self._buffer
+        offset = _HEADER.size
+        is_new = False
+        for pos in self._positions(username):
+            index = offset + (pos >> 3)
+            mask = 1 << (pos & 7)
+            if not buffer[index] & mask:
+                buffer[index] |= mask
+                is_new = True
+
+        if is_new:
+            self.count += 1
+            self._write_header()
+            if self.count == self.capacity:
+                logger.warning(
+                    f"Known users filter reached its capacity of {self.capacity}; "
+                    f"false-positive rate will rise above {self.false_positive_rate}"
+                )
+        return is_new
+
+    def update(self, usernames: Iterable[str]) -> None:
+        """Add many usernames, e.g. when migrating a legacy known_users list."""
+        for username in usernames:
+            self.add(username)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def flush(self) -> None:
+        """Flush dirty pages of the mapped filter to disk."""
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush known users filter: {e}")
+
+    def close(self) -> None:
+        """Flush and unmap the filter."""
+        if isinstance(self._buffer, mmap.mmap):
+            self.flush()
+            self._buffer.close()
+        self._buffer = None
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,187 @@
+"""
+Shared live-status cache for the channels the bot is in.
+
+EventSub ``stream.online`` / ``stream.offline`` notifications update the
+cache the moment a stream starts or ends. A background poller refreshes
+entries that have gone stale from Helix Get Streams, batching up to 100
+channels per request. That covers missed notifications and channels
+without a subscription. The scheduler, ?latege and any other handler read
+from here instead of asking Twitch themselves.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from constants import Numbers
+from job_scheduler import JobScheduler, job_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Takes channel logins, returns {login: started_at} for those currently live
+LiveFetcher = Callable[[List[str]], Awaitable[Dict[str, datetime]]]
+# Called with (channel, previous live state or None if unknown, new status) on changes
+StatusListener = Callable[[str, Optional[bool], "ChannelStatus"], Awaitable[None]]
+
+
+@dataclass
+class ChannelStatus:
+    """Last known live state of one channel."""
+    live: bool
+    started_at: Optional[datetime]
+    source: str  # "eventsub" or "helix"
+    updated_at: float
+
+    def age(self) -> float:
+        return time.monotonic() - self.updated_at
+
+
+class LiveStatusCache:
+    """Live state per channel, pushed by EventSub and topped up by Helix polling."""
+
+    def __init__(
+        self,
+        fetch_live: Optional[LiveFetcher] = None,
+        helix_ttl: float = Numbers.LIVE_STATUS_HELIX_TTL,
+        eventsub_ttl: float = Numbers.LIVE_STATUS_EVENTSUB_TTL,
+        poll_interval: float = Numbers.LIVE_STATUS_POLL_INTERVAL,
+        batch_size: int = Numbers.HELIX_MAX_LOGINS_PER_REQUEST,
+    ):
+        """
+        Args:
+            fetch_live: Helix lookup for one batch of channels
+            helix_ttl: Seconds a polled status stays fresh
+            eventsub_ttl: Seconds an EventSub status stays fresh; longer since pushes are reliable
+            poll_interval: Seconds between background refreshes
+            batch_size: Channels per Helix request
+        """
+        self.fetch_live = fetch_live
+        self.helix_ttl = helix_ttl
+        self.eventsub_ttl = eventsub_ttl
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+
+        self.channels: set = set()
+        self._statuses: Dict[str, ChannelStatus] = {}
+        self._listeners: List[StatusListener] = []
+        self._refreshing: Optional[asyncio.Future] = None
+
+        self.polls = 0
+        self.poll_errors = 0
+        self.events = 0
+
+    def track(self, channels: Iterable[str]) -> None:
+        """Add channels to the background refresh."""
+        self.channels.update(channel.lower() for channel in channels)
+
+    def add_listener(self, listener: StatusListener) -> None:
+        """Register a coroutine called whenever a channel goes live or offline."""
+        self._listeners.append(listener)
+
+    def _update(self, channel: str, live: bool, started_at: Optional[datetime], source: str) -> None:
+        channel = channel.lower()
+        previous = self._statuses.get(channel)
+        status = ChannelStatus(live, started_at if live else None, source, time.monotonic())
+        self._statuses[channel] = status
+        if previous is None or previous.live != live:
+            logger.info(f"{channel} is now {'live' if live else 'offline'} (via {source})")
+            for listener in self._listeners:
+                asyncio.get_running_loop().create_task(
+                    listener(channel, previous.live if previous else None, status)
+                )
+
+    def set_online(self, channel: str, started_at: Optional[datetime] = None) -> None:
+        """Record a stream.online notification."""
+        self.events += 1
+        self._update(channel, True, started_at, "eventsub")
+
+    def set_offline(self, channel: str) -> None:
+        """Record a stream.offline notification."""
+        self.events += 1
+        self._update(channel, False, None, "eventsub")
+
+    def status(self, channel: str) -> Optional[ChannelStatus]:
+        """Cached status, fresh or not; None if never seen."""
+        return self._statuses.get(channel.lower())
+
+    def _is_fresh(self, status: ChannelStatus) -> bool:
+        ttl = self.eventsub_ttl if status.source == "eventsub" else self.helix_ttl
+        return status.age() < ttl
+
+    async def get(self, channel: str) -> Optional[ChannelStatus]:
+        """
+        Status of a channel, refreshing it from Helix if stale.
+
+        Returns:
+            The status, or None if it is unknown and could not be fetched
+        """
+        channel = channel.lower()
+        self.channels.add(channel)
+        status = self._statuses.get(channel)
+        if status is None or not self._is_fresh(status):
+            await self.refresh()
+            status = self._statuses.get(channel)
+        return status
+
+    async def is_live(self, channel: str) -> bool:
+        """True if the channel is known to be live."""
+        status = await self.get(channel)
+        return bool(status and status.live)
+
+    async def refresh(self) -> None:
+        """Poll Helix for every tracked channel whose status is stale."""
+        if self._refreshing is not None:
+            # One refresh at a time; callers arriving meanwhile share it
+            await asyncio.shield(self._refreshing)
+            return
+        self._refreshing = asyncio.get_running_loop().create_future()
+        try:
+            await self._poll_stale()
+        finally:
+            self._refreshing.set_result(None)
+            self._refreshing = None
+
+    async def _poll_stale(self) -> None:
+        if self.fetch_live is None:
+            return
+        stale = sorted(
+            channel for channel in self.channels
+            if channel not in self._statuses or not self._is_fresh(self._statuses[channel])
+        )
+        if not stale:
+            return
+        batches = [stale[i:i + self.batch_size] for i in range(0, len(stale), self.batch_size)]
+        results = await asyncio.gather(*(self.fetch_live(batch) for batch in batches), return_exceptions=True)
+        for batch, result in zip(batches, results):
+            self.polls += 1
+            if isinstance(result, BaseException):
+                # Keep the last known state rather than guessing
+                self.poll_errors += 1
+                logger.warning(f"Live status poll failed for {len(batch)} channels: {result}")
+                continue
+            live = {login.lower(): started_at for login, started_at in result.items()}
+            for channel in batch:
+                self._update(channel, channel in live, live.get(channel), "helix")
+
+    def start(self, scheduler: JobScheduler = job_scheduler) -> None:
+        """Schedule the background Helix refresh, starting with an immediate one."""
+        scheduler.add_interval(
+            "live_status_poll", self.refresh, self.poll_interval, jitter=Numbers.JOB_DEFAULT_JITTER, first_run=0
+        )
+        logger.info(f"Scheduled live status polling for {len(self.channels)} channels")
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters for health reporting."""
+        return {
+            "channels": len(self.channels),
+            "live": sum(1 for status in self._statuses.values() if status.live),
+            "events": self.events,
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+        }
+
+
+# Global live status cache, wired to Helix and EventSub by the bot
+live_status = LiveStatusCache()
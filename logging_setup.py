@@ -0,0 +1,204 @@
+"""
+Non-blocking, structured logging for the bot.
+
+Loggers only put records on an in-memory queue through a QueueHandler. A
+QueueListener thread does the formatting and the file and console writes,
+so log I/O never runs on the event loop. The log file gets one JSON object
+per line; fields passed through ``extra=`` become JSON fields. The console
+keeps the familiar text format. High-volume DEBUG output can be sampled,
+and each subsystem can have its own level, e.g. ``ai_command=DEBUG``.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+from constants import Numbers, Paths
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Chatty libraries kept quiet unless a level is set for them explicitly
+DEFAULT_SUBSYSTEM_LEVELS = {
+    "twitchio": "WARNING",
+    "aiohttp": "WARNING",
+    "openai": "WARNING",
+    "httpx": "WARNING",
+}
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every ``every`` records below ``level`` per logger.
+
+    Records at or above ``level`` always pass. Sampled records carry a
+    ``sampled`` field saying how many records each one stands for.
+    """
+
+    def __init__(self, every: int = Numbers.LOG_DEBUG_SAMPLE_EVERY, level: int = logging.INFO):
+        super().__init__()
+        self.every = max(1, every)
+        self.level = level
+        self._counts: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.level or self.every == 1:
+            return True
+        count = self._counts.get(record.name, 0)
+        self._counts[record.name] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats the whole record on the calling thread. This one
+    only resolves the message arguments, which may change after the call, and
+    renders any traceback to text, since exc_info can't safely cross threads.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """
+    Parse per-subsystem levels.
+
+    Args:
+        spec: Comma separated ``logger=LEVEL`` pairs, e.g. "ai_command=DEBUG,outbound=WARNING"
+
+    Raises:
+        ValueError: If a pair or level is invalid
+    """
+    levels = {}
+    for pair in spec.split(","):
+        if not pair.strip():
+            continue
+        name, sep, level = pair.partition("=")
+        level = level.strip().upper()
+        if not sep or not name.strip() or not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid log level setting '{pair.strip()}'")
+        levels[name.strip()] = level
+    return levels
+
+
+def setup_logging(
+    level: str = "INFO",
+    log_file: str = "murphyai.log",
+    subsystem_levels: Optional[Dict[str, str]] = None,
+    debug_sample_every: int = Numbers.LOG_DEBUG_SAMPLE_EVERY,
+    json_file: bool = True,
+) -> QueueListener:
+    """
+    Route all logging through a background writer thread.
+
+    Replaces any handlers already on the root logger, so calling it again
+    reconfigures logging cleanly.
+
+    Args:
+        level: Root log level
+        log_file: File name inside the logs directory
+        subsystem_levels: Logger name -> level overrides, on top of DEFAULT_SUBSYSTEM_LEVELS
+        debug_sample_every: Keep one in this many DEBUG records per logger; 1 keeps all
+        json_file: Write JSON lines to the log file rather than text
+
+    Returns:
+        The running listener
+    """
+    global _listener
+    stop_logging()
+
+    os.makedirs(Paths.LOGS_DIR, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        os.path.join(Paths.LOGS_DIR, log_file),
+        maxBytes=Numbers.LOG_MAX_BYTES,
+        backupCount=Numbers.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonFormatter() if json_file else logging.Formatter(TEXT_FORMAT))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = AsyncQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(debug_sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    root.addHandler(queue_handler)
+
+    for name, subsystem_level in {**DEFAULT_SUBSYSTEM_LEVELS, **(subsystem_levels or {})}.items():
+        logging.getLogger(name).setLevel(subsystem_level)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    # The writer thread is a daemon; flush what's queued on a normal exit
+    atexit.register(stop_logging)
+    return _listener
+
+
+def setup_logging_from_env(level: str, log_file: str) -> QueueListener:
+    """
+    setup_logging() with the optional settings read from the environment.
+
+    LOG_LEVELS holds per-subsystem levels, LOG_DEBUG_SAMPLE the DEBUG
+    sampling rate and LOG_FORMAT ("json" or "text") the log file format.
+    """
+    return setup_logging(
+        level,
+        log_file,
+        subsystem_levels=parse_levels(os.getenv("LOG_LEVELS", "")),
+        debug_sample_every=int(os.getenv("LOG_DEBUG_SAMPLE", Numbers.LOG_DEBUG_SAMPLE_EVERY)),
+        json_file=os.getenv("LOG_FORMAT", "json").lower() != "text",
+    )
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
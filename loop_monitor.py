@@ -0,0 +1,154 @@
+"""
+Event-loop lag monitor and blocked-loop detector.
+
+A sampler task sleeps for a fixed interval and records how late it wakes
+up. That delay is time the loop spent running something else, so it is a
+direct measure of how long chat handling would have waited. A watchdog
+thread watches the sampler's heartbeat. When the loop stops ticking for
+longer than the threshold, it grabs the loop thread's current stack while
+the offending callback is still running. When the loop recovers, the lag
+and the stacks are logged together, so blocking calls (synchronous I/O,
+pickling, psutil sampling) show up with the code that made them.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from constants import Numbers
+from metrics import loop_lag_seconds, loop_stalls_total
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measures event-loop scheduling delay and samples the stack of long stalls."""
+
+    def __init__(
+        self,
+        interval: float = Numbers.LOOP_LAG_INTERVAL,
+        threshold: float = Numbers.LOOP_LAG_THRESHOLD,
+        window: int = Numbers.LOOP_LAG_WINDOW,
+        stack_depth: int = Numbers.LOOP_STACK_DEPTH,
+    ):
+        """
+        Args:
+            interval: Seconds between lag samples
+            threshold: Lag in seconds that counts as a stall and gets a stack sample
+            window: Recent samples kept for percentiles
+            stack_depth: Frames kept per stack sample
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._stacks: List[str] = []
+        self._last_tick = 0.0
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self.task: Optional[asyncio.Task] = None
+
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_stall: Optional[Dict[str, Any]] = None
+
+    def record(self, lag: float) -> None:
+        """Record one lag sample, logging it with any stack samples if it was a stall."""
+        lag = max(0.0, lag)
+        self._samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        loop_lag_seconds.observe(lag)
+        # Swap rather than clear; the watchdog thread may be appending
+        stacks, self._stacks = self._stacks, []
+        if lag < self.threshold:
+            return
+        self.stalls += 1
+        loop_stalls_total.inc()
+        self.last_stall = {"lag_ms": round(lag * 1000, 1), "at": time.time(), "stack": stacks[-1] if stacks else None}
+        if stacks:
+            logger.warning(
+                "Event loop blocked for %.0fms; loop thread was in:\n%s", lag * 1000, stacks[-1],
+                extra={"lag_ms": round(lag * 1000, 1), "stack_samples": len(stacks)},
+            )
+        else:
+            logger.warning("Event loop lagged %.0fms", lag * 1000, extra={"lag_ms": round(lag * 1000, 1)})
+
+    def percentiles(self) -> Dict[str, float]:
+        """p50, p95 and p99 lag over the recent window, in seconds."""
+        if not self._samples:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        ordered = sorted(self._samples)
+        last = len(ordered) - 1
+        return {f"p{q}": ordered[min(last, int(last * q / 100 + 0.5))] for q in (50, 95, 99)}
+
+    def sample_stack(self) -> Optional[str]:
+        """Stack of the loop thread as it is right now; called from the watchdog."""
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        return "".join(traceback.format_stack(frame, limit=self.stack_depth))
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.record(time.monotonic() - expected)
+
+    def _watch(self) -> None:
+        # Check a few times per threshold so a stall is caught while it's happening
+        poll = max(self.threshold / 2, 0.01)
+        reported_tick = None
+        while not self._stop.wait(poll):
+            tick = self._last_tick
+            if not tick or tick == reported_tick:
+                continue
+            if time.monotonic() - tick - self.interval >= self.threshold:
+                stack = self.sample_stack()
+                if stack:
+                    self._stacks.append(stack)
+                # One sample per stall is enough to name the culprit
+                reported_tick = tick
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start the sampler on the loop and the watchdog thread."""
+        if self.task is not None and not self.task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = 0.0
+        self._stop.clear()
+        self.task = loop.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Started event loop monitor (stall threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self) -> None:
+        """Stop the sampler and the watchdog."""
+        self._stop.set()
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag percentiles in milliseconds and stall counts for health reporting."""
+        percentiles = self.percentiles()
+        return {
+            "samples": len(self._samples),
+            "p50_ms": percentiles["p50"] * 1000,
+            "p95_ms": percentiles["p95"] * 1000,
+            "p99_ms": percentiles["p99"] * 1000,
+            "max_ms": self.max_lag * 1000,
+            "stalls": self.stalls,
+        }
+
+
+# Global loop monitor, started by the bot once it is connected
+loop_monitor = LoopMonitor()
@@ -7,47 +7,16 @@ import logging
 import os
 import sys
 import traceback
-from logging.handlers import RotatingFileHandler
 
 from config import LOG_LEVEL, LOG_FILE, ENVIRONMENT
-from constants import Numbers
+from logging_setup import setup_logging_from_env, stop_logging
 from core import MurphyAI
 
 
 def setup_logging() -> None:
     """Setup logging configuration"""
-    log_level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    
-    # Create formatters
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    
-    # Create file handler with rotation
-    file_handler = RotatingFileHandler(
-        os.path.join("logs", LOG_FILE),
-        maxBytes=Numbers.LOG_MAX_BYTES,
-        backupCount=Numbers.LOG_BACKUP_COUNT
-    )
-    file_handler.setFormatter(formatter)
-    
-    # Create console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    
-    # Configure root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    
-    # Set specific log levels for noisy libraries
-    logging.getLogger("twitchio").setLevel(logging.WARNING)
-    logging.getLogger("aiohttp").setLevel(logging.WARNING)
-    logging.getLogger("openai").setLevel(logging.WARNING)
+    # Writes happen on a background thread; see logging_setup
+    setup_logging_from_env(LOG_LEVEL, LOG_FILE)
 
 
 def main() -> None:
@@ -79,6 +48,7 @@ def main() -> None:
                     subprocess.Popen(['start', 'python', __file__], shell=True)
                 else:
                     subprocess.Popen(['python3', __file__])
+                stop_logging()
                 os._exit(1)
             except Exception as restart_error:
                 logger.critical(f"Failed to restart bot: {restart_error}")
@@ -0,0 +1,357 @@
+"""
+In-process metrics registry with a Prometheus text endpoint.
+
+Counters, gauges and histograms are plain Python objects updated on the
+event loop thread. Recording is an attribute add, or a bisect plus an add
+for histograms, with no locks and no allocation once a label set has been
+seen. Subsystems that already keep their own counters (outbound queue,
+caches, limiter) are exposed through callback metrics that read ``stats()``
+at scrape time, so they cost nothing between scrapes. A small aiohttp
+server serves the registry on a local ``/metrics`` endpoint.
+"""
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from a cache hit to a slow OpenAI call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base for a metric family with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """
+        The child metric for one label set, created on first use.
+
+        Raises:
+            ValueError: If the number of values doesn't match the label names
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """A monotonically increasing total."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Add to an unlabeled counter."""
+        self._children[()].value += amount
+
+    @property
+    def value(self) -> float:
+        return self._children[()].value
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self._children[()].value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound holding the q-th observation; 0 with no data."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.bounds + (math.inf,), self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return math.inf
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, e.g. latencies."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        """Record into an unlabeled histogram."""
+        self._children[()].observe(value)
+
+    def time(self):
+        """Context manager observing the elapsed seconds of its block."""
+        return self._children[()].time()
+
+    def quantile(self, q: float) -> float:
+        return self._children[()].quantile(q)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}"
+            labels = _label_text(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge read from a function at scrape time."""
+
+    def __init__(self, name: str, help_text: str, func: Callable[[], float], kind: str = "gauge"):
+        self.kind = kind
+        self.func = func
+        super().__init__(name, help_text)
+
+    def _new_child(self) -> None:
+        return None
+
+    def _samples(self) -> Iterator[str]:
+        try:
+            yield f"{self.name} {_format_value(self.func())}"
+        except Exception as e:
+            logger.debug(f"Metric {self.name} unavailable: {e}")
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self, prefix: str = "murphy_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None and not isinstance(metric, CallbackMetric):
+            # Module reloads re-declare their metrics; keep the running totals
+            if type(existing) is type(metric) and existing.labelnames == metric.labelnames:
+                return existing
+            raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help_text, labelnames))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labelnames, buckets))
+
+    def gauge_func(self, name: str, help_text: str, func: Callable[[], float]) -> CallbackMetric:
+        """Register (or replace) a gauge read from ``func`` at scrape time."""
+        return self._register(CallbackMetric(self.prefix + name, help_text, func, "gauge"))
+
+    def counter_func(self, name: str, help_text: str, func: Callable[[], float]) -> CallbackMetric:
+        """Register (or replace) a counter read from ``func`` at scrape time."""
+        return self._register(CallbackMetric(self.prefix + name, help_text, func, "counter"))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(self.prefix + name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+class MetricsServer:
+    """Serves the registry over HTTP on a local port."""
+
+    def __init__(self, registry: "MetricsRegistry", host: str = "127.0.0.1", port: int = Numbers.METRICS_PORT):
+        """
+        Args:
+            registry: Metrics to serve
+            host: Interface to bind; keep it local unless scraped from elsewhere
+            port: Port to listen on; 0 disables the server
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.app.router.add_get("/metrics", self._handle_metrics)
+        self._runner: Optional[web.AppRunner] = None
+
+    def add_route(self, path: str, handler) -> None:
+        """Serve another local debug endpoint alongside /metrics; call before start()."""
+        self.app.router.add_get(path, handler)
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> bool:
+        """
+        Start listening.
+
+        Returns:
+            True if the server is listening; a busy port (e.g. the previous
+            instance during a hot restart) is retried a few times in the background
+        """
+        if not self.port or self._runner is not None:
+            return self._runner is not None
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        try:
+            for attempt in range(Numbers.METRICS_BIND_ATTEMPTS):
+                try:
+                    await web.TCPSite(runner, self.host, self.port).start()
+                except OSError as e:
+                    if attempt == 0:
+                        logger.warning(f"Metrics port {self.port} busy, retrying: {e}")
+                    await asyncio.sleep(Numbers.METRICS_BIND_RETRY_DELAY)
+                    continue
+                self._runner = runner
+                logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+                return True
+        except asyncio.CancelledError:
+            await runner.cleanup()
+            raise
+        await runner.cleanup()
+        logger.error(f"Could not bind metrics port {self.port}; metrics endpoint disabled")
+        return False
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# Global registry shared by every module
+registry = MetricsRegistry()
+
+# Chat path
+messages_total = registry.counter("messages_total", "Chat messages received")
+messages_filtered_total = registry.counter("messages_filtered_total", "Chat messages dropped by the spam filter")
+message_seconds = registry.histogram("message_handling_seconds", "Time spent handling one chat message")
+commands_total = registry.counter("commands_total", "Commands dispatched", ("route",))
+command_errors_total = registry.counter("command_errors_total", "Commands that raised", ("route",))
+command_seconds = registry.histogram("command_dispatch_seconds", "Time spent dispatching one command", ("route",))
+cooldown_rejections_total = registry.counter(
+    "cooldown_rejections_total", "Commands refused because they were on cooldown", ("command",)
+)
+
+# AI
+ai_requests_total = registry.counter("ai_requests_total", "AI requests by how they were answered", ("outcome",))
+ai_latency_seconds = registry.histogram("ai_latency_seconds", "OpenAI completion latency, queueing included")
+ai_tokens_total = registry.counter("ai_tokens_total", "OpenAI tokens used", ("kind",))
+ai_cost_dollars_total = registry.counter("ai_cost_dollars_total", "Estimated OpenAI spend in dollars")
+
+# Event loop
+loop_lag_seconds = registry.histogram("event_loop_lag_seconds", "How late the event loop ran a timer")
+loop_stalls_total = registry.counter("event_loop_stalls_total", "Times the event loop was blocked past the stall threshold")
@@ -0,0 +1,300 @@
+"""
+Outbound chat message scheduler.
+
+All chat output goes through one queue per channel so that Twitch's send
+limits are respected centrally instead of by each handler. Messages are
+paced by per-channel and global token buckets, served in priority order,
+and identical pending messages are coalesced into one send. Long replies
+are split to Twitch's message length, and short messages for the same
+reply target that pile up behind the rate limit are merged so they go out
+in fewer sends.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from constants import Numbers
+from output_utils import LINE_JOINER, split_message
+
+logger = logging.getLogger(__name__)
+
+SendFunc = Callable[[str], Awaitable[Any]]
+
+
+class Priority(IntEnum):
+    """Send lanes; lower values are sent first."""
+    MOD = 0
+    NORMAL = 1
+    FUN = 2
+
+
+class TokenBucket:
+    """Token bucket allowing `capacity` sends per `period` seconds."""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class OutboundMessage:
+    """A queued chat message; ordered by priority, then arrival."""
+    priority: int
+    seq: int
+    text: str = field(compare=False)
+    send_func: SendFunc = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+    dropped: bool = field(compare=False, default=False)
+
+
+class _ChannelLane:
+    """Pending messages and pacing state for one channel."""
+
+    def __init__(self, name: str, bucket: TokenBucket):
+        self.name = name
+        self.bucket = bucket
+        self.heap: List[OutboundMessage] = []
+        self.pending_texts: Dict[str, OutboundMessage] = {}
+        self.size = 0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class OutboundQueue:
+    """Central outbound send queue with rate limiting, priorities and coalescing."""
+
+    def __init__(
+        self,
+        channel_limit: int = Numbers.CHAT_RATE_LIMIT_PER_CHANNEL,
+        global_limit: int = Numbers.CHAT_RATE_LIMIT_GLOBAL,
+        window: float = Numbers.CHAT_RATE_WINDOW,
+        max_pending: int = Numbers.OUTBOUND_MAX_PENDING_PER_CHANNEL,
+        message_limit: int = Numbers.MAX_MESSAGE_LENGTH,
+    ):
+        self.channel_limit = channel_limit
+        self.message_limit = message_limit
+        self.window = window
+        self.max_pending = max_pending
+        self.global_bucket = TokenBucket(global_limit, window)
+        self._lanes: Dict[str, _ChannelLane] = {}
+        self._channel_limits: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+        # Backpressure metrics
+        self.sent_count = 0
+        self.coalesced_count = 0
+        self.merged_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.total_wait = 0.0
+        self.max_depth = 0
+
+    def set_channel_limit(self, channel: str, limit: int) -> None:
+        """Override a channel's limit, e.g. 100 per window where the bot is a moderator."""
+        self._channel_limits[channel] = limit
+        if channel in self._lanes:
+            self._lanes[channel].bucket = TokenBucket(limit, self.window)
+
+    def _lane(self, channel: str) -> _ChannelLane:
+        lane = self._lanes.get(channel)
+        if lane is None:
+            limit = self._channel_limits.get(channel, self.channel_limit)
+            lane = _ChannelLane(channel, TokenBucket(limit, self.window))
+            self._lanes[channel] = lane
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.get_running_loop().create_task(self._run_lane(lane))
+        return lane
+
+    def send(self, channel: str, text: str, send_func: SendFunc, priority: Priority = Priority.NORMAL) -> asyncio.Future:
+        """
+        Queue a message for a channel, split into as many sends as its length needs.
+
+        Returns:
+            Future resolved once every part is delivered; its result is the
+            send result (a list for split messages), or None if dropped or failed
+        """
+        parts = split_message(text, self.message_limit)
+        if not parts:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(None)
+            return future
+        if len(parts) == 1:
+            return self._enqueue(channel, parts[0], send_func, priority)
+        return asyncio.gather(*(self._enqueue(channel, part, send_func, priority) for part in parts))
+
+    def _enqueue(self, channel: str, text: str, send_func: SendFunc, priority: Priority) -> asyncio.Future:
+        """Queue a single chat-sized message."""
+        lane = self._lane(channel)
+
+        # An identical message already waiting will say the same thing
+        pending = lane.pending_texts.get(text)
+        if pending is not None:
+            self.coalesced_count += 1
+            if priority < pending.priority:
+                self._reprioritize(lane, pending, priority)
+            return pending.future
+
+        message = OutboundMessage(
+            priority=int(priority),
+            seq=next(self._seq),
+            text=text,
+            send_func=send_func,
+            future=asyncio.get_running_loop().create_future(),
+        )
+
+        if lane.size >= self.max_pending:
+            victim = max((m for m in lane.heap if not m.dropped), default=None)
+            if victim is None or victim < message:
+                # Everything queued matters more than this message
+                self._record_drop(channel, message)
+                return message.future
+            self._discard(lane, victim)
+            self._record_drop(channel, victim)
+
+        heapq.heappush(lane.heap, message)
+        lane.pending_texts[text] = message
+        lane.size += 1
+        self.max_depth = max(self.max_depth, lane.size)
+        lane.wakeup.set()
+        return message.future
+
+    def _reprioritize(self, lane: _ChannelLane, message: OutboundMessage, priority: Priority) -> None:
+        """Move a pending message into a more urgent lane."""
+        self._discard(lane, message)
+        promoted = OutboundMessage(
+            priority=int(priority),
+            seq=message.seq,
+            text=message.text,
+            send_func=message.send_func,
+            future=message.future,
+            enqueued_at=message.enqueued_at,
+        )
+        heapq.heappush(lane.heap, promoted)
+        lane.pending_texts[promoted.text] = promoted
+        lane.size += 1
+
+    def _discard(self, lane: _ChannelLane, message: OutboundMessage) -> None:
+        """Lazily remove a message from a lane's heap."""
+        message.dropped = True
+        lane.size -= 1
+        if lane.pending_texts.get(message.text) is message:
+            del lane.pending_texts[message.text]
+
+    def _record_drop(self, channel: str, message: OutboundMessage) -> None:
+        self.dropped_count += 1
+        if not message.future.done():
+            message.future.set_result(None)
+        logger.warning(f"Outbound queue for {channel} full, dropped message (priority {message.priority})")
+
+    async def _run_lane(self, lane: _ChannelLane) -> None:
+        """Deliver one channel's messages as fast as the rate limits allow."""
+        while True:
+            while lane.heap and lane.heap[0].dropped:
+                heapq.heappop(lane.heap)
+
+            if not lane.heap:
+                lane.wakeup.clear()
+                await lane.wakeup.wait()
+                continue
+
+            delay = max(lane.bucket.delay(), self.global_bucket.delay())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            batch = self._take_batch(lane)
+            text = LINE_JOINER.join(message.text for message in batch)
+
+            lane.bucket.consume()
+            self.global_bucket.consume()
+            now = time.monotonic()
+            self.total_wait += sum(now - message.enqueued_at for message in batch)
+
+            try:
+                result = await batch[0].send_func(text)
+                self.sent_count += len(batch)
+            except Exception as e:
+                self.failed_count += len(batch)
+                logger.error(f"Failed to send message to {lane.name}: {e}")
+                result = None
+
+            for message in batch:
+                if not message.future.done():
+                    message.future.set_result(result)
+
+    def _pop(self, lane: _ChannelLane) -> OutboundMessage:
+        message = heapq.heappop(lane.heap)
+        lane.size -= 1
+        if lane.pending_texts.get(message.text) is message:
+            del lane.pending_texts[message.text]
+        return message
+
+    def _take_batch(self, lane: _ChannelLane) -> List[OutboundMessage]:
+        """Pop the next message plus any following ones for the same target that fit in one send."""
+        batch = [self._pop(lane)]
+        length = len(batch[0].text)
+        while lane.heap:
+            head = lane.heap[0]
+            if head.dropped:
+                heapq.heappop(lane.heap)
+                continue
+            # Each handler's send_func replies to its own message; never post one user's answer on another's
+            if head.send_func != batch[0].send_func:
+                break
+            length += len(LINE_JOINER) + len(head.text)
+            if length > self.message_limit:
+                break
+            batch.append(self._pop(lane))
+        self.merged_count += len(batch) - 1
+        return batch
+
+    def depth(self, channel: Optional[str] = None) -> int:
+        """Number of messages waiting, for one channel or all of them."""
+        if channel is not None:
+            lane = self._lanes.get(channel)
+            return lane.size if lane else 0
+        return sum(lane.size for lane in self._lanes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Backpressure metrics for health reporting."""
+        return {
+            "sent": self.sent_count,
+            "queued": self.depth(),
+            "max_depth": self.max_depth,
+            "coalesced": self.coalesced_count,
+            "merged": self.merged_count,
+            "dropped": self.dropped_count,
+            "failed": self.failed_count,
+            "avg_wait_ms": (self.total_wait / self.sent_count * 1000) if self.sent_count else 0.0,
+        }
+
+    def stop(self) -> None:
+        """Cancel all delivery tasks."""
+        for lane in self._lanes.values():
+            if lane.task:
+                lane.task.cancel()
+                lane.task = None
@@ -0,0 +1,101 @@
+"""
+Output formatting helpers for chat replies.
+
+Twitch drops anything past 500 characters and does not render newlines, so
+long replies are split into messages on line, item and word boundaries and
+short lines are packed together to keep the number of sends down.
+"""
+from typing import List, Sequence
+
+from constants import Numbers
+
+LINE_JOINER = " | "
+ITEM_SEPARATOR = ", "
+
+
+def _split_segment(segment: str, budget: int, separators: Sequence[str] = (ITEM_SEPARATOR, " ")) -> List[str]:
+    """Split one line that does not fit, preferring item boundaries over word boundaries."""
+    if len(segment) <= budget:
+        return [segment]
+    if not separators:
+        return [segment[i:i + budget] for i in range(0, len(segment), budget)]
+
+    separator, finer = separators[0], separators[1:]
+    pieces = segment.split(separator)
+    if len(pieces) == 1:
+        return _split_segment(segment, budget, finer)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if len(candidate) <= budget:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        parts = _split_segment(piece, budget, finer)
+        chunks.extend(parts[:-1])
+        current = parts[-1]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_segments(segments: Sequence[str], budget: int = Numbers.MAX_MESSAGE_LENGTH, joiner: str = LINE_JOINER) -> List[str]:
+    """
+    Greedily combine segments into as few messages as fit the budget.
+
+    Args:
+        segments: Pieces of text, each already within the budget
+        budget: Maximum characters per message
+        joiner: Text placed between combined segments
+
+    Returns:
+        List of messages
+    """
+    messages: List[str] = []
+    current = ""
+    for segment in segments:
+        candidate = f"{current}{joiner}{segment}" if current else segment
+        if len(candidate) <= budget:
+            current = candidate
+        else:
+            messages.append(current)
+            current = segment
+    if current:
+        messages.append(current)
+    return messages
+
+
+def split_message(text: str, budget: int = Numbers.MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Split text into chat-sized messages without truncating it.
+
+    Each line becomes a segment, oversized lines are broken on ", " then on
+    spaces, and the segments are packed back together with " | ".
+
+    Args:
+        text: Text to send, possibly containing newlines
+        budget: Maximum characters per message
+
+    Returns:
+        List of messages, empty if the text is blank
+    """
+    segments: List[str] = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if line:
+            segments.extend(_split_segment(line, budget))
+    return pack_segments(segments, budget)
+
+
+def paginate(items: Sequence[str], budget: int, separator: str = ITEM_SEPARATOR) -> List[str]:
+    """
+    Group list items into pages that each fit the budget.
+
+    Returns:
+        List of pages, each the items joined by the separator
+    """
+    segments = [segment for item in items for segment in _split_segment(item, budget)]
+    return pack_segments(segments, budget, separator)
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-import asyncio
 import random
 import os
 
+from constants import Numbers
+from job_scheduler import job_scheduler
+
 
 class QueueManager:
     def __init__(self, state_file_path: str | None = None):
@@ -150,15 +152,14 @@ class QueueManager:
             return f"{username} is marked as here."
         return f"{username} was not marked as not available."
 
-    async def remove_not_available(self):
-        while True:
-            now = datetime.now()
-            to_remove = [
-                user for user, time in self.not_available.items() if time <= now
-            ]
-            for user in to_remove:
-                self.leave_queue(user)
-            await asyncio.sleep(60)
+    def remove_not_available(self):
+        """Drop users whose not-available time has run out from the queue."""
+        now = datetime.now()
+        to_remove = [
+            user for user, time in self.not_available.items() if time <= now
+        ]
+        for user in to_remove:
+            self.leave_queue(user)
 
     def clear_queues(self):
         self.queue.clear()  # Clear the main queue
@@ -169,8 +170,8 @@ class QueueManager:
             self.queue.append(default_user)
         return "All queues have been cleared."
 
-    def start_cleanup_task(self, loop):
-        loop.create_task(self.remove_not_available())
+    def start_cleanup_task(self, scheduler=job_scheduler):
+        scheduler.add_interval("queue_not_available", self.remove_not_available, Numbers.NOT_AVAILABLE_CHECK_INTERVAL)
 
     def shuffle_teams(self):
         if len(self.queue) < self.team_size * 2:
@@ -251,6 +252,24 @@ class QueueManager:
                 break
         return {"success": True, "message": "shuffled"}
 
+    def snapshot_state(self):
+        """Snapshot queues for checkpoints."""
+        return {
+            "queue": list(self.queue),
+            "overflow_queue": list(self.overflow_queue),
+            "not_available": dict(self.not_available),
+            "team_size": self.team_size,
+            "main_queue_size": self.main_queue_size,
+        }
+
+    def restore_state(self, state):
+        """Restore queues from a checkpoint, keeping the main_queue alias intact."""
+        self.queue[:] = state.get("queue", self.queue)
+        self.overflow_queue[:] = state.get("overflow_queue", self.overflow_queue)
+        self.not_available = dict(state.get("not_available", {}))
+        self.team_size = int(state.get("team_size", self.team_size))
+        self.main_queue_size = int(state.get("main_queue_size", self.main_queue_size))
+
     def save_state(self):
         if not self._state_file:
             return
@@ -0,0 +1,87 @@
+"""
+Hot reload of command handler modules without restarting the bot.
+
+A reloadable module lists the module-level names that hold runtime state in
+a `_RELOAD_STATE` tuple. Those objects are carried over into the re-executed
+module so counters, caches, conversations and rate-limit windows survive.
+"""
+import importlib
+import importlib.util
+import logging
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+RELOADABLE_MODULES = ("commands", "ai_command")
+
+
+class ReloadError(Exception):
+    """Raised when a module could not be reloaded; the old code stays active."""
+
+
+def _check_source(name: str) -> None:
+    """Compile the module's current source so syntax errors never reach the live module."""
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ReloadError(f"Module '{name}' not found")
+    try:
+        spec.loader.get_code(name)
+    except SyntaxError as e:
+        raise ReloadError(f"Syntax error in {name}: {e}") from e
+
+
+def reload_module(name: str) -> None:
+    """
+    Re-import a module in place, migrating its declared runtime state.
+
+    On failure the module's previous namespace is restored.
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        raise ReloadError(f"Module '{name}' is not loaded")
+
+    _check_source(name)
+
+    previous_namespace = dict(module.__dict__)
+    carried_state: Dict[str, object] = {
+        attr: module.__dict__[attr]
+        for attr in getattr(module, "_RELOAD_STATE", ())
+        if attr in module.__dict__
+    }
+
+    try:
+        importlib.reload(module)
+    except Exception as e:
+        module.__dict__.clear()
+        module.__dict__.update(previous_namespace)
+        raise ReloadError(f"Failed to reload {name}: {e}") from e
+
+    module.__dict__.update(carried_state)
+
+
+def reload_handlers(module_names: Sequence[str] = RELOADABLE_MODULES) -> Tuple[float, List[str]]:
+    """
+    Reload handler modules.
+
+    Returns:
+        Tuple of (elapsed milliseconds, names of reloaded modules)
+
+    Raises:
+        ReloadError: If any module fails; modules reloaded before it keep their new code
+    """
+    start = time.perf_counter()
+
+    # Reject the whole batch up front if any source does not compile
+    for name in module_names:
+        _check_source(name)
+
+    reloaded = []
+    for name in module_names:
+        reload_module(name)
+        reloaded.append(name)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Reloaded {', '.join(reloaded)} in {elapsed_ms:.1f} ms")
+    return elapsed_ms, reloaded
@@ -4,9 +4,11 @@ Retry utilities for handling API failures with exponential backoff.
 import asyncio
 import logging
 import random
-from typing import TypeVar, Callable, Optional, Union, Any
+import time
+from typing import TypeVar, Callable, Dict, Optional, Tuple, Union, Any
 from functools import wraps
 import aiohttp
+import openai
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +59,7 @@ async def retry_with_backoff(
         config = RetryConfig()
 
     last_exception = None
+    name = getattr(func, '__name__', type(func).__name__)
 
     for attempt in range(config.max_attempts):
         try:
@@ -65,7 +68,7 @@ async def retry_with_backoff(
             last_exception = e
 
             if attempt == config.max_attempts - 1:
-                logger.error(f"All {config.max_attempts} attempts failed for {func.__name__}")
+                logger.error(f"All {config.max_attempts} attempts failed for {name}")
                 raise
 
             # Calculate delay with exponential backoff
@@ -79,7 +82,7 @@ async def retry_with_backoff(
                 delay *= (0.5 + random.random())
 
             logger.warning(
-                f"Attempt {attempt + 1}/{config.max_attempts} failed for {func.__name__}: {str(e)}. "
+                f"Attempt {attempt + 1}/{config.max_attempts} failed for {name}: {str(e)}. "
                 f"Retrying in {delay:.2f} seconds..."
             )
 
@@ -105,6 +108,10 @@ def with_retry(config: Optional[RetryConfig] = None):
     return decorator
 
 
+class CircuitBreakerOpenError(Exception):
+    """Raised without calling the dependency while its circuit breaker is open."""
+
+
 class CircuitBreaker:
     """
     Circuit breaker pattern for preventing cascading failures.
@@ -113,8 +120,10 @@ class CircuitBreaker:
         self,
         failure_threshold: int = 5,
         recovery_timeout: float = 60.0,
-        expected_exception: type = Exception
+        expected_exception: Union[type, Tuple[type, ...]] = Exception,
+        name: Optional[str] = None
     ):
+        self.name = name
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.expected_exception = expected_exception
@@ -126,49 +135,120 @@ class CircuitBreaker:
     async def call(self, func: Callable[..., T], *args, **kwargs) -> T:
         """
         Execute a function through the circuit breaker.
+
+        Raises:
+            CircuitBreakerOpenError: If the breaker is open and not yet due a trial call
         """
+        name = self.name or getattr(func, '__name__', type(func).__name__)
         if self.state == 'open':
             if self.last_failure_time and \
-               (asyncio.get_event_loop().time() - self.last_failure_time) > self.recovery_timeout:
+               (time.monotonic() - self.last_failure_time) > self.recovery_timeout:
                 self.state = 'half-open'
-                logger.info(f"Circuit breaker entering half-open state for {func.__name__}")
+                logger.info(f"Circuit breaker entering half-open state for {name}")
             else:
-                raise Exception(f"Circuit breaker is open for {func.__name__}")
+                raise CircuitBreakerOpenError(f"Circuit breaker is open for {name}")
 
         try:
             result = await func(*args, **kwargs)
 
             if self.state == 'half-open':
                 self.state = 'closed'
-                self.failure_count = 0
-                logger.info(f"Circuit breaker closed for {func.__name__}")
+                logger.info(f"Circuit breaker closed for {name}")
 
+            # Only consecutive failures count towards opening
+            self.failure_count = 0
             return result
 
         except self.expected_exception as e:
             self.failure_count += 1
-            self.last_failure_time = asyncio.get_event_loop().time()
+            self.last_failure_time = time.monotonic()
 
-            if self.failure_count >= self.failure_threshold:
+            if self.state == 'half-open' or self.failure_count >= self.failure_threshold:
                 self.state = 'open'
                 logger.error(
-                    f"Circuit breaker opened for {func.__name__} after "
+                    f"Circuit breaker opened for {name} after "
                     f"{self.failure_count} failures"
                 )
 
             raise
 
+    def describe(self) -> str:
+        """Human-readable state for health reports."""
+        if self.state == 'open' and self.last_failure_time:
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.last_failure_time))
+            return f"OPEN (retry in {retry_in:.0f}s)"
+        if self.failure_count:
+            return f"{self.state.upper()} ({self.failure_count} recent failures)"
+        return self.state.upper()
+
+
+# One breaker per external dependency, shared by every caller
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(
+    dependency: str,
+    failure_threshold: int = 5,
+    recovery_timeout: float = 60.0,
+    expected_exception: Union[type, Tuple[type, ...]] = Exception
+) -> CircuitBreaker:
+    """
+    Return the named breaker for a dependency, creating it on first use.
+
+    The settings only apply when the breaker is created.
+    """
+    breaker = _breakers.get(dependency)
+    if breaker is None:
+        breaker = CircuitBreaker(failure_threshold, recovery_timeout, expected_exception, name=dependency)
+        _breakers[dependency] = breaker
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current state of every registered breaker, for ?healthcheck."""
+    return {name: breaker.describe() for name, breaker in sorted(_breakers.items())}
+
+
+async def resilient_call(
+    dependency: str,
+    func: Callable[..., T],
+    *args,
+    config: Optional[RetryConfig] = None,
+    **kwargs
+) -> T:
+    """
+    Call an external dependency through its circuit breaker, retrying with backoff.
+
+    A whole retry sequence counts as one breaker failure, and an open
+    breaker fails fast without calling the dependency.
+
+    Args:
+        dependency: Name of the registered breaker
+        func: The async function to execute
+        config: Retry configuration; None makes a single attempt
+
+    Raises:
+        CircuitBreakerOpenError: If the dependency's breaker is open
+    """
+    breaker = get_circuit_breaker(dependency)
+    if config is None:
+        return await breaker.call(func, *args, **kwargs)
+    return await breaker.call(retry_with_backoff, func, config, *args, **kwargs)
+
 
 # Pre-configured retry configs for common use cases
+# Transient OpenAI failures; rate limits and bad requests are not retried here
+OPENAI_TRANSIENT_ERRORS = (
+    openai.APIConnectionError,  # Includes APITimeoutError
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
 OPENAI_RETRY_CONFIG = RetryConfig(
     max_attempts=3,
     initial_delay=1.0,
     max_delay=10.0,
-    exceptions=(
-        aiohttp.ClientError,
-        asyncio.TimeoutError,
-        ConnectionError,
-    )
+    exceptions=OPENAI_TRANSIENT_ERRORS
 )
 
 TWITCH_RETRY_CONFIG = RetryConfig(
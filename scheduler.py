@@ -1,6 +1,7 @@
 """
 Task scheduler module for the MurphyAI Twitch bot.
-Handles periodic tasks and stream status checking.
+Handles periodic messages and stream status announcements on top of the
+central job scheduler.
 """
 import asyncio
 import random
@@ -8,8 +9,11 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Tuple
 
-from config import TWITCH_INITIAL_CHANNELS, STREAM_SCHEDULE
+from config import TWITCH_INITIAL_CHANNELS
 from constants import Numbers, Security
+from job_scheduler import MISFIRE_SKIP, JobScheduler, job_scheduler
+from live_status import ChannelStatus, live_status
+from stream_schedule import stream_schedule
 from type_definitions import BotProtocol, ChannelName
 
 logger = logging.getLogger(__name__)
@@ -20,62 +24,55 @@ class StreamStatusChecker:
 
     def __init__(self, bot: BotProtocol):
         self.bot = bot
-        self.message_count = 0
-        self.max_messages = 3
-        self.check_interval = 300  # 5 minutes in seconds
 
     async def start(self) -> None:
-        """Start the stream status checking task."""
-        await self.check_stream_status()
+        """Announce stream starts from the shared live status cache."""
+        live_status.add_listener(self.on_status_change)
 
-    async def check_stream_status(self) -> None:
+    async def on_status_change(self, channel: str, was_live: Optional[bool], status: ChannelStatus) -> None:
         """
-        Checks if the streamer is live and sends a message indicating how early or late the stream is,
-        or if it's a secret stream. Only sends the message 3 times.
-        """
-        while self.message_count < self.max_messages:
-            message = await self._generate_status_message()
-
-            if message and await self._is_streamer_live():
-                await self._broadcast_message(message)
-                self.message_count += 1
+        Send the early/late/secret stream message when a channel goes live.
 
-            await asyncio.sleep(self.check_interval)
-
-    async def _generate_status_message(self) -> Optional[str]:
+        A channel first seen live by polling (e.g. the bot restarted mid-stream)
+        is not announced; only real offline-to-live transitions and EventSub
+        stream.online notifications are.
+        """
+        if not status.live:
+            return
+        if was_live is None and status.source != "eventsub":
+            return
+        message = self._generate_status_message(status.started_at)
+        if message:
+            await self._send(channel, message)
+
+    def _generate_status_message(self, started: Optional[datetime] = None) -> str:
         """Generate appropriate status message based on stream schedule."""
-        now = datetime.now()
-        day_of_week = now.strftime("%A").lower()
-        scheduled_time_str = STREAM_SCHEDULE.get(day_of_week)
-
-        if scheduled_time_str:
-            scheduled_time = datetime.strptime(scheduled_time_str, "%H:%M").replace(
-                year=now.year, month=now.month, day=now.day
-            )
-
-            if scheduled_time < now:  # Stream is late
-                return self._generate_late_message(now - scheduled_time)
-            else:  # Stream is early
-                return self._generate_early_message(scheduled_time - now)
-        else:
+        started = started or stream_schedule.now()
+        scheduled = stream_schedule.nearest_on_day(started)
+        if scheduled is None:
             # No scheduled time for today, assume it's a secret stream
             return self._generate_secret_stream_message()
+        if scheduled < started:  # Stream is late
+            return self._generate_late_message(started - scheduled)
+        return self._generate_early_message(scheduled - started)
 
     def _generate_late_message(self, delta: timedelta) -> str:
         """Generate a random message for when the stream is late."""
+        seconds = int(delta.total_seconds())
         late_messages = [
-            f"Can you believe it? The stream is {delta.seconds} seconds late! Maybe Peks got lost on the way to the chair.",
-            f"Oops! Looks like the stream is running {delta.seconds} seconds behind. Time to spam Peks!",
-            f"Streamer's timekeeping 101: Being {delta.seconds} seconds late is fashionable, right?",
+            f"Can you believe it? The stream is {seconds} seconds late! Maybe Peks got lost on the way to the chair.",
+            f"Oops! Looks like the stream is running {seconds} seconds behind. Time to spam Peks!",
+            f"Streamer's timekeeping 101: Being {seconds} seconds late is fashionable, right?",
         ]
         return random.choice(late_messages)
 
     def _generate_early_message(self, delta: timedelta) -> str:
         """Generate a random message for when the stream is early."""
+        seconds = int(delta.total_seconds())
         early_messages = [
-            f"Breaking news: The stream is {delta.seconds} seconds early! Quick, someone check if Peks is feeling ok!",
-            f"Alert! The stream is {delta.seconds} seconds ahead of schedule. Is this a new record?",
-            f"Whoa, {delta.seconds} seconds early? Peks must've been eager to stream today!",
+            f"Breaking news: The stream is {seconds} seconds early! Quick, someone check if Peks is feeling ok!",
+            f"Alert! The stream is {seconds} seconds ahead of schedule. Is this a new record?",
+            f"Whoa, {seconds} seconds early? Peks must've been eager to stream today!",
         ]
         return random.choice(early_messages)
 
@@ -83,95 +80,85 @@ class StreamStatusChecker:
         """Generate a message for unscheduled streams."""
         return "Surprise! It looks like we've got a secret stream on our hands. What mysteries will Peks unveil today?"
 
-    async def _is_streamer_live(self) -> bool:
-        """Check if the streamer is currently live."""
-        # TODO: Implement actual Twitch API check
-        # For now, return True as placeholder
-        return True
-
-    async def _broadcast_message(self, message: str) -> None:
-        """Broadcast a message to all connected channels."""
-        for channel_name in TWITCH_INITIAL_CHANNELS:
-            try:
-                channel = self.bot.get_channel(channel_name)
-                if channel:
-                    await channel.send(message)
-                else:
-                    logger.warning(f"Failed to get channel: {channel_name}")
-            except Exception as e:
-                logger.error(f"Error sending message to {channel_name}: {e}")
+    async def _send(self, channel_name: ChannelName, message: str) -> None:
+        """Send a message to one channel."""
+        try:
+            channel = self.bot.get_channel(channel_name)
+            if channel:
+                await channel.send(message)
+            else:
+                logger.warning(f"Failed to get channel: {channel_name}")
+        except Exception as e:
+            logger.error(f"Error sending message to {channel_name}: {e}")
 
 
 class PeriodicMessageSender:
     """Handles sending periodic messages to channels."""
 
-    def __init__(self, bot: BotProtocol):
+    def __init__(self, bot: BotProtocol, jobs: JobScheduler = job_scheduler):
         self.bot = bot
-        self.tasks: List[asyncio.Task] = []
+        self.jobs = jobs
+        self.job_names: List[str] = []
 
     async def add_periodic_message(
         self,
-        interval_hours: float,
+        interval_hours: Optional[float] = None,
         message: str = "Remember to stay hydrated and take breaks!",
-        channels: Optional[List[ChannelName]] = None
+        channels: Optional[List[ChannelName]] = None,
+        cron: Optional[str] = None,
     ) -> None:
         """
-        Add a periodic message task.
+        Add a periodic message job.
 
         Args:
             interval_hours: Interval in hours between messages
             message: The message to send
             channels: List of channels to send to (defaults to all initial channels)
+            cron: Cron expression to send on instead of an interval, e.g. "0 18 * * 5"
         """
-        task = asyncio.create_task(
-            self._send_periodic_messages(interval_hours, message, channels)
-        )
-        self.tasks.append(task)
+        name = f"periodic_message_{len(self.job_names) + 1}"
 
-    async def _send_periodic_messages(
-        self,
-        interval_hours: float,
-        message: str,
-        channels: Optional[List[ChannelName]] = None
-    ) -> None:
-        """Send periodic messages to specified channels."""
-        channels = channels or TWITCH_INITIAL_CHANNELS
-        interval_seconds = interval_hours * 3600
-
-        while True:
-            await asyncio.sleep(interval_seconds)
-
-            for channel_name in channels:
-                try:
-                    channel = self.bot.get_channel(channel_name)
-                    if channel:
-                        await channel.send(message)
-                    else:
-                        logger.warning(f"Failed to get channel: {channel_name}")
-                except Exception as e:
-                    logger.error(f"Error sending periodic message to {channel_name}: {e}")
+        async def send() -> None:
+            await self._send_periodic_message(message, channels)
+
+        if cron:
+            self.jobs.add_cron(name, send, cron, misfire=MISFIRE_SKIP)
+        else:
+            # A reminder hours late is worse than none
+            self.jobs.add_interval(name, send, interval_hours * 3600, misfire=MISFIRE_SKIP)
+        self.job_names.append(name)
+
+    async def _send_periodic_message(self, message: str, channels: Optional[List[ChannelName]] = None) -> None:
+        """Send a periodic message to specified channels."""
+        for channel_name in channels or TWITCH_INITIAL_CHANNELS:
+            try:
+                channel = self.bot.get_channel(channel_name)
+                if channel:
+                    await channel.send(message)
+                else:
+                    logger.warning(f"Failed to get channel: {channel_name}")
+            except Exception as e:
+                logger.error(f"Error sending periodic message to {channel_name}: {e}")
 
     def cancel_all(self) -> None:
-        """Cancel all periodic message tasks."""
-        for task in self.tasks:
-            task.cancel()
-        self.tasks.clear()
+        """Cancel all periodic message jobs."""
+        for name in self.job_names:
+            self.jobs.cancel(name)
+        self.job_names.clear()
 
 
 class Scheduler:
-    """Main scheduler that manages all scheduled tasks."""
+    """Main scheduler that owns the bot's scheduled work."""
 
-    def __init__(self, bot: BotProtocol):
+    def __init__(self, bot: BotProtocol, jobs: JobScheduler = job_scheduler):
         self.bot = bot
+        self.jobs = jobs
         self.stream_checker = StreamStatusChecker(bot)
-        self.message_sender = PeriodicMessageSender(bot)
-        self.tasks: List[asyncio.Task] = []
+        self.message_sender = PeriodicMessageSender(bot, jobs)
 
     async def start(self) -> None:
-        """Start all scheduled tasks."""
-        # Start stream status checker
-        stream_task = asyncio.create_task(self.stream_checker.start())
-        self.tasks.append(stream_task)
+        """Register scheduled work and start the job runner."""
+        await self.stream_checker.start()
 
         # Add any periodic messages here (currently disabled)
         # await self.message_sender.add_periodic_message(
@@ -179,27 +166,27 @@ class Scheduler:
         #     message="Remember to follow and subscribe!"
         # )
 
+        self.jobs.start(asyncio.get_running_loop())
         logger.info("Scheduler started successfully")
 
-    def stop(self) -> None:
-        """Stop all scheduled tasks."""
-        # Cancel stream checker tasks
-        for task in self.tasks:
-            task.cancel()
-
-        # Cancel periodic message tasks
+    async def stop(self) -> None:
+        """Cancel every job, giving running ones a moment to finish."""
         self.message_sender.cancel_all()
-
+        await self.jobs.shutdown()
         logger.info("Scheduler stopped")
 
 
 # Legacy function for backwards compatibility
-async def start_scheduler(bot: BotProtocol) -> None:
+async def start_scheduler(bot: BotProtocol) -> Scheduler:
     """
     Start the scheduler for the bot.
 
     Args:
         bot: The bot instance
+
+    Returns:
+        The running scheduler, so it can be stopped on shutdown
     """
     scheduler = Scheduler(bot)
     await scheduler.start()
+    return scheduler
@@ -0,0 +1,149 @@
+"""
+Similarity cache tier for AI responses.
+
+Chat keeps asking the same question in slightly different words, which the
+exact ``user:prompt`` cache never matches. Prompts here are embedded locally
+as hashed word and character n-gram vectors (no model download, CPU only),
+kept in a fixed-size matrix, and a new prompt reuses the answer of the most
+similar recent prompt when cosine similarity clears a threshold.
+"""
+import logging
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Words that carry no meaning for matching; "murphy" is how chat addresses the bot
+STOP_WORDS = frozenset("""
+a an the is are was were be to of and or in on at for with it this that do does
+did can could would should please pls hey hi yo murphy murphyai
+""".split())
+
+
+def _features(text: str) -> List[str]:
+    words = [w for w in _TOKEN_RE.findall(text.casefold()) if w not in STOP_WORDS]
+    features = [f"w:{word}" for word in words]
+    # Character trigrams tolerate typos and plural/verb endings
+    for word in words:
+        padded = f" {word} "
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def embed(text: str, dims: int = Numbers.SEMANTIC_CACHE_DIMS) -> np.ndarray:
+    """
+    Embed text as a unit-length hashed n-gram vector.
+
+    Features are bag-of-words plus character trigrams, so word order does not
+    matter. crc32 keeps hashes stable across processes, and a sign bit from
+    the hash keeps collisions from piling up in one direction.
+
+    Args:
+        text: Text to embed
+        dims: Vector size
+
+    Returns:
+        float32 vector of length dims; all zeros if the text has no features
+    """
+    vector = np.zeros(dims, dtype=np.float32)
+    for feature in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        # Whole words matter more than fragments
+        weight = 2.0 if feature.startswith("w:") else 1.0
+        vector[h % dims] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """Bounded nearest-neighbour cache of recent prompt/response pairs."""
+
+    def __init__(
+        self,
+        max_entries: int = Numbers.SEMANTIC_CACHE_SIZE,
+        threshold: float = Numbers.SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = Numbers.CACHE_EXPIRY_SECONDS,
+        dims: int = Numbers.SEMANTIC_CACHE_DIMS,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dims = dims
+
+        # Preallocated so memory stays fixed at max_entries * dims floats
+        self._vectors = np.zeros((max_entries, dims), dtype=np.float32)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._next_slot = 0
+        self._count = 0
+
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def lookup(self, prompt: str) -> Optional[str]:
+        """
+        Find the answer to the most similar recent prompt.
+
+        Returns:
+            The cached response, or None if nothing is similar enough
+        """
+        self.lookups += 1
+        if not self._count:
+            return None
+        query = embed(prompt, self.dims)
+        if not query.any():
+            return None
+
+        scores = self._vectors[:self._count] @ query
+        now = time.time()
+        # Best candidates first; skip any that have expired
+        for slot in np.argsort(scores)[::-1]:
+            score = float(scores[slot])
+            if score < self.threshold:
+                break
+            entry = self._entries[slot]
+            if entry["timestamp"] + self.ttl > now:
+                self.hits += 1
+                logger.info(f"Semantic cache hit ({score:.2f}): '{prompt[:40]}' ~ '{entry['prompt'][:40]}'")
+                return entry["response"]
+        return None
+
+    def add(self, prompt: str, response: str) -> None:
+        """Remember a response, replacing the oldest entry when full."""
+        vector = embed(prompt, self.dims)
+        if not vector.any():
+            return
+        slot = self._next_slot
+        self._vectors[slot] = vector
+        self._entries[slot] = {"prompt": prompt, "response": response, "timestamp": time.time()}
+        self._next_slot = (slot + 1) % self.max_entries
+        self._count = min(self._count + 1, self.max_entries)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._vectors[:] = 0
+        self._entries = [None] * self.max_entries
+        self._next_slot = 0
+        self._count = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate and size for health reporting."""
+        return {
+            "entries": self._count,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "memory_kb": self._vectors.nbytes / 1024,
+        }
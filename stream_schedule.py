@@ -0,0 +1,275 @@
+"""
+Compiled stream schedule shared by ?latege and the stream announcements.
+
+The weekly schedule from config (one or more "HH:MM" times per weekday),
+plus one-off exceptions for specific dates, is compiled once into a sorted
+list of timezone-aware slots covering a window around today. Next, previous
+and per-day lookups are a bisect into that list. The window is rebuilt when
+the clock drifts near its edge, so there is no string parsing or walking
+through days on the request path. Slots are built in the streamer's
+timezone, so daylight saving changes keep streams at the right wall time.
+"""
+import json
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Dict, Iterable, List, Optional, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from constants import Numbers, Paths
+
+logger = logging.getLogger(__name__)
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+TimesSpec = Union[None, str, Iterable[str]]
+
+
+def parse_times(spec: TimesSpec) -> List[time]:
+    """
+    Parse one day's stream times.
+
+    Args:
+        spec: "18:00", "14:00, 20:30", a list of such strings, or empty for no stream
+
+    Returns:
+        Sorted start times
+
+    Raises:
+        ValueError: If a time is not HH:MM
+    """
+    if not spec:
+        return []
+    parts = spec.split(",") if isinstance(spec, str) else spec
+    times = set()
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            hour, minute = part.split(":")
+            times.add(time(int(hour), int(minute)))
+        except ValueError as e:
+            raise ValueError(f"Invalid stream time '{part}', expected HH:MM") from e
+    return sorted(times)
+
+
+def _zone(name: Union[None, str, tzinfo]) -> Optional[tzinfo]:
+    if isinstance(name, tzinfo):
+        return name
+    if not name:
+        # The host's local time, as the plain-string schedule always assumed. None
+        # rather than today's fixed offset, so each date gets its own DST offset
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone '{name}'") from e
+
+
+class StreamSchedule:
+    """Weekly stream slots with per-date exceptions, indexed for fast lookups."""
+
+    def __init__(
+        self,
+        weekly: Optional[Dict[str, TimesSpec]] = None,
+        tz: Union[None, str, tzinfo] = None,
+        exceptions: Optional[Dict[str, TimesSpec]] = None,
+        horizon_days: int = Numbers.STREAM_SCHEDULE_HORIZON_DAYS,
+    ):
+        """
+        Args:
+            weekly: Day name -> stream times, as in config.STREAM_SCHEDULE; if
+                omitted, config.STREAM_SCHEDULE is loaded on first use
+            tz: Timezone name the times are in; the host's local time if omitted
+            exceptions: "YYYY-MM-DD" -> stream times replacing that day's; empty cancels the day
+            horizon_days: Days indexed either side of today
+        """
+        self.horizon_days = horizon_days
+        self.configure(weekly or {}, tz, exceptions)
+        self._config_pending = weekly is None
+
+    def configure(
+        self,
+        weekly: Dict[str, TimesSpec],
+        tz: Union[None, str, tzinfo] = None,
+        exceptions: Optional[Dict[str, TimesSpec]] = None,
+    ) -> None:
+        """
+        Replace the schedule.
+
+        Raises:
+            ValueError: If a time, date or timezone is invalid
+        """
+        weekly = {day.lower(): times for day, times in weekly.items()}
+        # None means the host's local time; naive datetimes and astimezone(None) use its rules
+        self.zone = _zone(tz)
+        self._weekly = [parse_times(weekly.get(day)) for day in DAYS]
+        self._exceptions: Dict[date, List[time]] = {}
+        for day, times in (exceptions or {}).items():
+            try:
+                self._exceptions[date.fromisoformat(day)] = parse_times(times)
+            except ValueError as e:
+                raise ValueError(f"Invalid schedule exception for '{day}': {e}") from e
+        # Slot start times in UTC, sorted; rebuilt lazily around the current date
+        self._slots: List[datetime] = []
+        self._window: Optional[tuple] = None
+        self._config_pending = False
+
+    def set_timezone(self, tz: Union[None, str, tzinfo]) -> None:
+        """
+        Change the timezone the weekly times are in, keeping the schedule.
+
+        Raises:
+            ValueError: If the timezone is unknown
+        """
+        self.zone = _zone(tz)
+        self._window = None
+
+    def load_config(self) -> None:
+        """
+        Load the weekly schedule from config.STREAM_SCHEDULE and the exceptions file.
+
+        Raises:
+            ImportError: If there is no config module
+            ValueError: If a time is invalid
+        """
+        from config import STREAM_SCHEDULE
+
+        self._config_pending = False
+        weekly = {day.lower(): times for day, times in STREAM_SCHEDULE.items()}
+        self._weekly = [parse_times(weekly.get(day)) for day in DAYS]
+        self._window = None
+        self.load_exceptions()
+
+    def _ensure_loaded(self) -> None:
+        """Load config.STREAM_SCHEDULE on first use when nothing configured this schedule."""
+        if not self._config_pending:
+            return
+        try:
+            self.load_config()
+        except (ImportError, ValueError) as e:
+            self._config_pending = False
+            logger.error(f"Could not load the stream schedule from config: {e}")
+
+    def load_exceptions(self, path: str = Paths.SCHEDULE_EXCEPTIONS_FILE) -> int:
+        """
+        Load one-off exceptions from a JSON file of {"YYYY-MM-DD": times}.
+
+        A missing or broken file leaves the current exceptions in place.
+
+        Returns:
+            Number of exceptions loaded
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            exceptions = {date.fromisoformat(day): parse_times(times) for day, times in data.items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Error loading schedule exceptions: {e}")
+            return 0
+        self._exceptions = exceptions
+        self._window = None
+        logger.info(f"Loaded {len(exceptions)} stream schedule exceptions")
+        return len(exceptions)
+
+    def times_on(self, day: date) -> List[time]:
+        """Scheduled start times for a date, after exceptions."""
+        self._ensure_loaded()
+        if day in self._exceptions:
+            return self._exceptions[day]
+        return self._weekly[day.weekday()]
+
+    def _compile(self, around: date) -> None:
+        start = around - timedelta(days=self.horizon_days)
+        end = around + timedelta(days=self.horizon_days)
+        slots = []
+        day = start
+        while day <= end:
+            for at in self.times_on(day):
+                # Naive when the zone is host local; astimezone applies that date's offset
+                slots.append(datetime.combine(day, at, tzinfo=self.zone).astimezone(timezone.utc))
+            day += timedelta(days=1)
+        slots.sort()
+        self._slots = slots
+        # Rebuild once a lookup gets within a week of either edge
+        margin = timedelta(days=min(7, self.horizon_days // 2))
+        self._window = (start + margin, end - margin)
+        logger.debug(f"Compiled {len(slots)} stream slots from {start} to {end}")
+
+    def _index(self, moment: datetime) -> datetime:
+        """Make a moment aware and UTC, rebuilding the index if it left the window."""
+        self._ensure_loaded()
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=self.zone)
+        day = moment.astimezone(self.zone).date()
+        if self._window is None or not self._window[0] <= day <= self._window[1]:
+            self._compile(day)
+        return moment.astimezone(timezone.utc)
+
+    def now(self) -> datetime:
+        """Current time in the schedule's timezone."""
+        return datetime.now(self.zone) if self.zone is not None else datetime.now().astimezone()
+
+    def local(self, moment: datetime) -> datetime:
+        """A moment in the schedule's timezone; naive moments are taken as already local."""
+        if moment.tzinfo is None and self.zone is not None:
+            return moment.replace(tzinfo=self.zone)
+        return moment.astimezone(self.zone)
+
+    def next_slot(self, after: Optional[datetime] = None) -> Optional[datetime]:
+        """First slot at or after a moment (default now), or None if none is indexed."""
+        moment = self._index(after or self.now())
+        index = bisect_left(self._slots, moment)
+        return self._slots[index].astimezone(self.zone) if index < len(self._slots) else None
+
+    def previous_slot(self, before: Optional[datetime] = None) -> Optional[datetime]:
+        """Last slot at or before a moment (default now), or None if none is indexed."""
+        moment = self._index(before or self.now())
+        index = bisect_right(self._slots, moment)
+        return self._slots[index - 1].astimezone(self.zone) if index else None
+
+    def slots_on(self, day: date) -> List[datetime]:
+        """Every slot on a local date, in order."""
+        start = self._index(datetime.combine(day, time.min, tzinfo=self.zone))
+        end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=self.zone).astimezone(timezone.utc)
+        return [
+            slot.astimezone(self.zone)
+            for slot in self._slots[bisect_left(self._slots, start):bisect_left(self._slots, end)]
+        ]
+
+    def nearest_on_day(self, moment: datetime) -> Optional[datetime]:
+        """
+        The slot on a moment's local date closest to it.
+
+        Returns:
+            The slot, or None if nothing is scheduled that day
+        """
+        moment = self.local(moment)
+        slots = self.slots_on(moment.date())
+        if not slots:
+            return None
+        return min(slots, key=lambda slot: abs((slot - moment).total_seconds()))
+
+    def next_day_slot(self, moment: Optional[datetime] = None) -> Optional[datetime]:
+        """First slot on a later local date than a moment (default now)."""
+        moment = self.local(moment or self.now())
+        tomorrow = datetime.combine(moment.date() + timedelta(days=1), time.min, tzinfo=self.zone)
+        return self.next_slot(tomorrow)
+
+
+def minutes_between(start: datetime, end: datetime) -> int:
+    """
+    Whole minutes from start to end; negative if end comes first.
+
+    Unlike ``timedelta.seconds`` this is correct for negative deltas and
+    for deltas longer than a day.
+    """
+    return int((end - start).total_seconds() // 60)
+
+
+# Global stream schedule; loads config.STREAM_SCHEDULE on first use, and the bot sets its timezone
+stream_schedule = StreamSchedule()
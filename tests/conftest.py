@@ -4,7 +4,11 @@ Pytest configuration and fixtures for MurphyAI bot tests
 
 import pytest
 import os
+import json
 import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
 from unittest.mock import AsyncMock, MagicMock
 from typing import Dict, Any
 
@@ -74,3 +78,38 @@ def mock_openai_response():
     response.choices = [MagicMock()]
     response.choices[0].message.content = "This is a test AI response"
     return response
+
+
+class _StubAPIHandler(BaseHTTPRequestHandler):
+    """Serves canned JSON responses registered on the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        status, body = self.server.routes.get(urlparse(self.path).path, (404, {"error": "not found"}))
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_http_server():
+    """Stand-in for external HTTP APIs; set server.routes[path] = (status, json_body)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAPIHandler)
+    server.routes = {}
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
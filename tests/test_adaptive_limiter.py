@@ -0,0 +1,177 @@
+"""
+Tests for the adaptive AI concurrency limiter
+"""
+
+import asyncio
+import time
+import pytest
+from adaptive_limiter import AdaptiveLimiter, LimiterRejectedError, parse_retry_after
+
+
+class Overloaded(Exception):
+    """Stand-in for a 429 response"""
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+
+def classify(exc):
+    if isinstance(exc, Overloaded):
+        return True, exc.retry_after
+    return False, None
+
+
+def make_limiter(**overrides):
+    settings = dict(initial_limit=2, min_limit=1, max_limit=8, latency_target=1.0,
+                    backoff_factor=0.5, max_queue=10, classify=classify, name="test")
+    settings.update(overrides)
+    return AdaptiveLimiter(**settings)
+
+
+class TestRetryAfter:
+    """Test Retry-After parsing"""
+
+    def test_seconds_and_dates(self):
+        """Test both header forms and junk values"""
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert 0 <= parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestAdaptiveLimiter:
+    """Test AIMD adjustments and queueing"""
+
+    @pytest.mark.asyncio
+    async def test_limit_grows_while_healthy(self):
+        """Test additive increase under saturating, healthy load"""
+        limiter = make_limiter()
+
+        async def fast():
+            await asyncio.sleep(0.001)
+
+        for _ in range(10):
+            await asyncio.gather(limiter.call(fast), limiter.call(fast))
+        assert limiter.limit > 2
+
+    @pytest.mark.asyncio
+    async def test_overload_halves_limit_once_per_round(self):
+        """Test multiplicative decrease without collapsing on a burst of 429s"""
+        limiter = make_limiter(initial_limit=8)
+
+        async def rejected():
+            await asyncio.sleep(0.01)
+            raise Overloaded()
+
+        results = await asyncio.gather(
+            *(limiter.call(rejected, max_requeues=0) for _ in range(8)), return_exceptions=True
+        )
+        assert all(isinstance(r, Overloaded) for r in results)
+        assert limiter.limit == 4
+        assert limiter.overloads == 8
+
+    @pytest.mark.asyncio
+    async def test_slow_responses_reduce_limit(self):
+        """Test that latency above target counts as congestion"""
+        limiter = make_limiter(initial_limit=4, latency_target=0.01)
+
+        async def slow():
+            await asyncio.sleep(0.03)
+
+        await limiter.call(slow)
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_excess_requests_queue(self):
+        """Test that concurrency never exceeds the limit"""
+        limiter = make_limiter(initial_limit=2)
+        active = 0
+        peak = 0
+
+        async def work():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        await asyncio.gather(*(limiter.call(work) for _ in range(6)))
+        assert peak <= 2
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_deadline_rejects_queued_request(self):
+        """Test that a queued request gives up at its deadline"""
+        limiter = make_limiter(initial_limit=1)
+        release = asyncio.Event()
+
+        async def hold():
+            await release.wait()
+
+        holder = asyncio.create_task(limiter.call(hold))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LimiterRejectedError):
+            await limiter.call(hold, deadline=time.monotonic() + 0.02)
+
+        release.set()
+        await holder
+        assert limiter.in_flight == 0
+        assert limiter.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_and_requeues(self):
+        """Test that Retry-After blocks dispatch and the request is retried"""
+        limiter = make_limiter()
+        calls = []
+
+        async def flaky():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise Overloaded(retry_after=0.05)
+            return "ok"
+
+        assert await limiter.call(flaky, deadline=time.monotonic() + 1) == "ok"
+        assert calls[1] - calls[0] >= 0.045
+
+    @pytest.mark.asyncio
+    async def test_no_requeue_past_the_deadline(self):
+        """Test that an overload whose Retry-After outlasts the deadline fails with that error"""
+        limiter = make_limiter()
+        calls = []
+
+        async def overloaded():
+            calls.append(time.monotonic())
+            raise Overloaded(retry_after=5)
+
+        with pytest.raises(Overloaded):
+            await limiter.call(overloaded, deadline=time.monotonic() + 1)
+        assert len(calls) == 1
+        assert limiter.rejected == 0
+
+    @pytest.mark.asyncio
+    async def test_requeue_that_misses_the_deadline_raises_last_error(self):
+        """Test that a requeued call still waiting for a slot at its deadline re-raises its last error"""
+        limiter = make_limiter(initial_limit=1)
+        release = asyncio.Event()
+        calls = []
+        holder = []
+
+        async def hold():
+            await release.wait()
+
+        async def overloaded():
+            calls.append(time.monotonic())
+            # Someone else grabs the freed slot before the requeue gets it
+            holder.append(asyncio.create_task(limiter.call(hold)))
+            await asyncio.sleep(0)
+            raise Overloaded()
+
+        with pytest.raises(Overloaded):
+            await limiter.call(overloaded, deadline=time.monotonic() + 0.05)
+        assert len(calls) == 1
+
+        release.set()
+        await asyncio.gather(*holder)
+        assert limiter.in_flight == 0
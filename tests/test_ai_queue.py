@@ -0,0 +1,126 @@
+"""
+Tests for the AI work queue
+"""
+
+import asyncio
+import time
+import pytest
+from ai_queue import AIPriority, AIWorkQueue
+
+
+class Worker:
+    """Records the order requests run in, blocking until released"""
+
+    def __init__(self):
+        self.order = []
+        self.gate = asyncio.Event()
+
+    def job(self, label):
+        async def run():
+            await self.gate.wait()
+            self.order.append(label)
+            return label
+        return run
+
+
+def later(seconds=30):
+    return time.monotonic() + seconds
+
+
+class TestAIWorkQueue:
+    """Test priorities, fairness, deadlines and welcome sampling"""
+
+    @pytest.mark.asyncio
+    async def test_runs_immediately_with_capacity(self):
+        """Test that a request runs straight away when capacity is free"""
+        queue = AIWorkQueue(capacity=lambda: 2)
+        worker = Worker()
+        worker.gate.set()
+        assert await queue.submit("alice", AIPriority.COMMAND, worker.job("a"), later()) == "a"
+        assert queue.stats()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_privileged_requests_run_first(self):
+        """Test that mod requests overtake queued commands and welcomes"""
+        queue = AIWorkQueue(capacity=lambda: 1)
+        worker = Worker()
+        futures = [
+            queue.submit("first", AIPriority.COMMAND, worker.job("first"), later()),
+            queue.submit("newbie", AIPriority.WELCOME, worker.job("welcome"), later()),
+            queue.submit("viewer", AIPriority.COMMAND, worker.job("command"), later()),
+            queue.submit("mod", AIPriority.PRIVILEGED, worker.job("mod"), later()),
+        ]
+        worker.gate.set()
+        await asyncio.gather(*futures)
+        assert worker.order == ["first", "mod", "command", "welcome"]
+
+    @pytest.mark.asyncio
+    async def test_users_share_fairly(self):
+        """Test that one user's backlog does not starve another user"""
+        queue = AIWorkQueue(capacity=lambda: 1)
+        worker = Worker()
+        futures = [queue.submit("spammer", AIPriority.COMMAND, worker.job(f"s{i}"), later()) for i in range(4)]
+        futures.append(queue.submit("quiet", AIPriority.COMMAND, worker.job("q"), later()))
+        worker.gate.set()
+        await asyncio.gather(*futures)
+        assert worker.order == ["s0", "s1", "q", "s2", "s3"]
+
+    @pytest.mark.asyncio
+    async def test_stale_requests_are_dropped(self):
+        """Test that a request still queued at its deadline resolves to None"""
+        queue = AIWorkQueue(capacity=lambda: 1)
+        worker = Worker()
+        running = queue.submit("alice", AIPriority.COMMAND, worker.job("a"), later())
+        stale = queue.submit("bob", AIPriority.COMMAND, worker.job("b"), later(0.01))
+
+        assert await stale is None
+        worker.gate.set()
+        await running
+        assert worker.order == ["a"]
+        assert queue.stats()["expired"] == 1
+        assert queue.depth() == 0
+
+    @pytest.mark.asyncio
+    async def test_welcomes_are_sampled_when_deep(self, monkeypatch):
+        """Test that welcomes are sampled out once the queue is deep"""
+        monkeypatch.setattr("ai_queue.random.random", lambda: 0.9)
+        queue = AIWorkQueue(capacity=lambda: 1, welcome_sample_depth=2, welcome_sample_rate=0.25)
+        worker = Worker()
+        commands = [queue.submit(f"user{i}", AIPriority.COMMAND, worker.job(i), later()) for i in range(3)]
+
+        welcome = queue.submit("newbie", AIPriority.WELCOME, worker.job("welcome"), later())
+        assert welcome.done() and welcome.result() is None
+        assert queue.stats()["sampled_out"] == 1
+        worker.gate.set()
+        assert await asyncio.gather(*commands) == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_sheds_lower_priority(self):
+        """Test that a full queue drops a welcome to make room for a command"""
+        queue = AIWorkQueue(capacity=lambda: 1, max_depth=2, welcome_sample_depth=10)
+        worker = Worker()
+        queue.submit("alice", AIPriority.COMMAND, worker.job("a"), later())
+        welcome = queue.submit("newbie", AIPriority.WELCOME, worker.job("welcome"), later())
+        queue.submit("bob", AIPriority.COMMAND, worker.job("b"), later())
+        command = queue.submit("carol", AIPriority.COMMAND, worker.job("c"), later())
+
+        assert welcome.done() and welcome.result() is None
+        assert not command.done()
+        rejected = queue.submit("dave", AIPriority.WELCOME, worker.job("d"), later())
+        assert rejected.done() and rejected.result() is None
+
+        worker.gate.set()
+        await command
+        assert worker.order == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_the_caller(self):
+        """Test that a failing request raises from its future and frees capacity"""
+        queue = AIWorkQueue(capacity=lambda: 1)
+
+        async def broken():
+            raise RuntimeError("api down")
+
+        with pytest.raises(RuntimeError):
+            await queue.submit("alice", AIPriority.COMMAND, broken, later())
+        assert queue.running == 0
@@ -0,0 +1,73 @@
+"""
+Tests for the chat spam filter stage
+"""
+
+from chat_filter import ChatFilter, FilterRule, extract_features
+
+
+class TestExtractFeatures:
+    """Test single-pass feature extraction"""
+
+    def test_counts(self):
+        """Test caps, special characters and runs are counted"""
+        features = extract_features("HEY!! heyyy")
+        assert features.length == 11
+        assert features.upper == 3
+        assert features.letters == 8
+        assert features.special == 2
+        assert features.longest_run == 3
+
+    def test_single_char(self):
+        """Test detection of one repeated character"""
+        assert extract_features("aaaaaa").single_char
+        assert not extract_features("aaaaab").single_char
+
+    def test_empty(self):
+        """Test that an empty message has zero ratios"""
+        features = extract_features("")
+        assert features.caps_ratio == 0.0
+        assert features.special_ratio == 0.0
+
+
+class TestChatFilter:
+    """Test scoring and blocking"""
+
+    def test_normal_chat_passes(self):
+        """Test that ordinary messages and commands are allowed"""
+        chat_filter = ChatFilter()
+        for text in ["murphy who is peks", "?join", "LUL", "?ai what is love"]:
+            assert not chat_filter.check(text).blocked
+
+    def test_floods_are_blocked(self):
+        """Test that repeated-character floods are blocked"""
+        chat_filter = ChatFilter()
+        verdict = chat_filter.check("GGGGGGGGGGGGGGGGGGGGGGGGG")
+        assert verdict.blocked
+        assert "single_char" in verdict.reasons
+        assert chat_filter.check("lol " + "!" * 30).blocked
+
+    def test_caps_alone_is_not_enough(self):
+        """Test that excited all-caps chat is scored but not blocked"""
+        verdict = ChatFilter().check("KEKW KEKW KEKW KEKW")
+        assert not verdict.blocked
+        assert verdict.reasons == ["excessive_caps"]
+
+    def test_caps_with_symbols_is_blocked(self):
+        """Test that signals add up to a block"""
+        verdict = ChatFilter().check("FREE V-BUCKS $$$$ @@@@ #### !!!!")
+        assert verdict.blocked
+        assert set(verdict.reasons) >= {"excessive_caps", "special_chars"}
+
+    def test_privileged_users_bypass(self):
+        """Test that mods are never filtered"""
+        chat_filter = ChatFilter()
+        assert not chat_filter.check("A" * 50, privileged=True).blocked
+
+    def test_custom_rules(self):
+        """Test that the rule set and threshold are configurable"""
+        chat_filter = ChatFilter(
+            rules=[FilterRule("long", 0.5, lambda f: f.length > 5)],
+            threshold=0.5,
+        )
+        assert chat_filter.check("hello world").blocked
+        assert chat_filter.stats()["rule_hits"] == {"long": 1}
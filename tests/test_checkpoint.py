@@ -0,0 +1,111 @@
+"""
+Tests for coordinated state checkpointing
+"""
+
+import os
+import pickle
+import pytest
+from checkpoint import CheckpointManager
+from job_scheduler import JobScheduler
+from cooldown_manager import CooldownManager
+from queue_manager import QueueManager
+
+
+class TestCheckpointManager:
+    """Test checkpoint capture and recovery"""
+
+    @pytest.fixture
+    def checkpoint_path(self, temp_state_dir):
+        """Path for a throwaway checkpoint file"""
+        return os.path.join(temp_state_dir, "bot_state.pkl")
+
+    def test_round_trip_restores_all_subsystems(self, checkpoint_path):
+        """Test that every registered subsystem is restored"""
+        counters = {"message_count": 42}
+        queue = QueueManager()
+        queue.join_queue("player1")
+
+        manager = CheckpointManager(checkpoint_path)
+        manager.register("bot", lambda: dict(counters), counters.update)
+        manager.register("queue", queue.snapshot_state, queue.restore_state)
+        assert manager.checkpoint() is True
+
+        counters["message_count"] = 0
+        queue.clear_queues()
+        assert manager.restore() is True
+
+        assert counters["message_count"] == 42
+        assert "player1" in queue.queue
+        assert queue.main_queue is queue.queue
+
+    def test_snapshot_is_detached_from_live_state(self, checkpoint_path):
+        """Test that changes after capture do not leak into the snapshot"""
+        cooldowns = CooldownManager()
+        cooldowns.set_cooldown("ai", "testuser")
+
+        manager = CheckpointManager(checkpoint_path)
+        manager.register("cooldowns", cooldowns.snapshot_state, cooldowns.restore_state)
+        snapshot = manager.capture()
+        cooldowns.set_cooldown("ai", "otheruser")
+
+        assert "otheruser" not in snapshot["subsystems"]["cooldowns"]["cooldowns"]["ai"]
+
+    def test_write_is_atomic(self, checkpoint_path):
+        """Test that no temporary file is left behind"""
+        manager = CheckpointManager(checkpoint_path)
+        manager.register("bot", lambda: {"message_count": 1}, lambda state: None)
+        manager.checkpoint()
+
+        assert os.path.exists(checkpoint_path)
+        assert not os.path.exists(checkpoint_path + ".tmp")
+
+    def test_failing_provider_does_not_block_others(self, checkpoint_path):
+        """Test that one broken subsystem does not lose the rest"""
+        restored = {}
+
+        def broken_snapshot():
+            raise RuntimeError("boom")
+
+        manager = CheckpointManager(checkpoint_path)
+        manager.register("broken", broken_snapshot, lambda state: None)
+        manager.register("bot", lambda: {"message_count": 7}, restored.update)
+        manager.checkpoint()
+        manager.restore()
+
+        assert restored == {"message_count": 7}
+
+    def test_restores_legacy_flat_state(self, checkpoint_path):
+        """Test that pre-checkpoint state files are handed to the legacy provider"""
+        with open(checkpoint_path, "wb") as f:
+            pickle.dump({"message_count": 99, "cannon_count": 3}, f)
+
+        restored = {}
+        manager = CheckpointManager(checkpoint_path, legacy_provider="bot")
+        manager.register("bot", lambda: {}, restored.update)
+
+        assert manager.restore() is True
+        assert restored["message_count"] == 99
+
+    def test_missing_checkpoint(self, checkpoint_path):
+        """Test starting without a checkpoint"""
+        manager = CheckpointManager(checkpoint_path)
+        assert manager.restore() is False
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_async(self, checkpoint_path):
+        """Test that the off-loop checkpoint writes the file"""
+        manager = CheckpointManager(checkpoint_path)
+        manager.register("bot", lambda: {"message_count": 5}, lambda state: None)
+
+        assert await manager.checkpoint_async() is True
+        assert manager.last_checkpoint_size > 0
+        assert os.path.exists(checkpoint_path)
+
+    def test_start_schedules_a_job(self, checkpoint_path):
+        """Test that periodic checkpoints run as a job on the scheduler"""
+        manager = CheckpointManager(checkpoint_path, interval=30)
+        scheduler = JobScheduler()
+        manager.start(scheduler)
+        job = scheduler.jobs["checkpoint"]
+        assert job.interval == 30
+        assert job.func == manager.checkpoint_async
@@ -0,0 +1,75 @@
+"""
+Tests for hot restart state handoff
+"""
+
+import asyncio
+import json
+import os
+import pytest
+from unittest.mock import MagicMock
+from checkpoint import CheckpointManager
+from hot_restart import HotRestartCoordinator
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_SOURCE = """
+import asyncio, json, sys, time
+sys.path.insert(0, {repo!r})
+from hot_restart import HandoffReceiver
+
+async def main():
+    receiver = HandoffReceiver.from_environment()
+    receiver.signal_ready()
+    state = await receiver.receive_state(timeout=10)
+    with open({out!r}, "w") as f:
+        json.dump({{
+            "message_count": state["subsystems"]["bot"]["message_count"],
+            "gap": time.time() - state["released_at"],
+        }}, f)
+
+asyncio.run(main())
+"""
+
+
+class TestHotRestart:
+    """Test the old/new instance handoff protocol"""
+
+    @pytest.fixture
+    def bot(self, tmp_path):
+        """Minimal bot with a checkpoint manager"""
+        bot = MagicMock()
+        bot.accepting_messages = True
+        bot.checkpointer = CheckpointManager(str(tmp_path / "bot_state.pkl"))
+        bot.checkpointer.register("bot", lambda: {"message_count": 123}, lambda state: None)
+        return bot
+
+    @pytest.mark.asyncio
+    async def test_state_is_handed_to_worker(self, bot, tmp_path):
+        """Test that a ready worker receives the old instance's state"""
+        out_path = tmp_path / "received.json"
+        script = tmp_path / "worker.py"
+        script.write_text(WORKER_SOURCE.format(repo=REPO_ROOT, out=str(out_path)))
+
+        coordinator = HotRestartCoordinator(bot, str(script), str(tmp_path / "handoff"))
+        assert await coordinator.restart(timeout=10) is True
+        assert bot.accepting_messages is False
+
+        for _ in range(100):
+            if out_path.exists():
+                break
+            await asyncio.sleep(0.05)
+
+        received = json.loads(out_path.read_text())
+        assert received["message_count"] == 123
+        assert 0 <= received["gap"] < 5
+        assert os.path.exists(bot.checkpointer.path)
+
+    @pytest.mark.asyncio
+    async def test_failed_worker_keeps_current_instance(self, bot, tmp_path):
+        """Test that a worker that dies before ready does not take over"""
+        script = tmp_path / "worker.py"
+        script.write_text("raise SystemExit(1)\n")
+
+        coordinator = HotRestartCoordinator(bot, str(script), str(tmp_path / "handoff"))
+        assert await coordinator.restart(timeout=10) is False
+        assert bot.accepting_messages is True
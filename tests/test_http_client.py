@@ -0,0 +1,63 @@
+"""
+Tests for the shared HTTP client
+"""
+
+import pytest
+import http_client
+import retry_utils
+
+
+class TestHTTPClient:
+    """Test session pooling and per-dependency circuit breakers"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_breakers(self, monkeypatch):
+        """Isolate breaker state between tests"""
+        monkeypatch.setattr(retry_utils, "_breakers", {})
+
+    @pytest.mark.asyncio
+    async def test_session_is_reused(self, local_http_server):
+        """Test that consecutive requests share one pooled session"""
+        local_http_server.routes["/ping"] = (200, {"ok": True})
+
+        first = http_client.get_session()
+        assert await http_client.get_json(f"{local_http_server.url}/ping", "ping") == {"ok": True}
+        assert await http_client.get_json(f"{local_http_server.url}/ping", "ping") == {"ok": True}
+        assert http_client.get_session() is first
+
+        await http_client.close_session()
+        assert first.closed
+
+    @pytest.mark.asyncio
+    async def test_breaker_opens_after_failures(self, local_http_server, monkeypatch):
+        """Test that a failing dependency stops being called"""
+        monkeypatch.setattr(http_client.Numbers, "HTTP_BREAKER_FAILURE_THRESHOLD", 2)
+        url = f"{local_http_server.url}/down"
+        local_http_server.routes["/down"] = (500, {})
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                await http_client.get_json(url, "flaky", retry_config=None)
+        assert http_client.get_breaker("flaky").state == "open"
+
+        with pytest.raises(retry_utils.CircuitBreakerOpenError, match="Circuit breaker is open for flaky"):
+            await http_client.get_json(url, "flaky", retry_config=None)
+        assert len(local_http_server.requests) == 2
+
+        # Other dependencies are unaffected
+        local_http_server.routes["/up"] = (200, {"ok": True})
+        assert await http_client.get_json(f"{local_http_server.url}/up", "healthy") == {"ok": True}
+        await http_client.close_session()
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self, local_http_server, monkeypatch):
+        """Test that a failing request is retried before giving up"""
+        monkeypatch.setattr(retry_utils.API_RETRY_CONFIG, "initial_delay", 0)
+        local_http_server.routes["/down"] = (503, {})
+
+        with pytest.raises(Exception):
+            await http_client.get_json(f"{local_http_server.url}/down", "retried")
+        assert len(local_http_server.requests) == retry_utils.API_RETRY_CONFIG.max_attempts
+        # The whole retry sequence is a single breaker failure
+        assert http_client.get_breaker("retried").failure_count == 1
+        await http_client.close_session()
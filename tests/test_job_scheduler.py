@@ -0,0 +1,214 @@
+"""
+Tests for the central job scheduler
+"""
+
+import asyncio
+import time
+from datetime import datetime
+import pytest
+from job_scheduler import MISFIRE_COALESCE, MISFIRE_SKIP, CronSchedule, JobScheduler
+
+
+class TestCronSchedule:
+    """Test cron expression parsing and next-run calculation"""
+
+    def test_every_minute(self):
+        """Test that * * * * * fires on the next minute"""
+        cron = CronSchedule("* * * * *")
+        assert cron.next_after(datetime(2026, 3, 4, 10, 15, 30)) == datetime(2026, 3, 4, 10, 16)
+
+    def test_steps_ranges_and_lists(self):
+        """Test */n steps, ranges and lists"""
+        cron = CronSchedule("*/15 9-17 * * *")
+        assert cron.next_after(datetime(2026, 3, 4, 10, 16)) == datetime(2026, 3, 4, 10, 30)
+        assert cron.next_after(datetime(2026, 3, 4, 17, 45)) == datetime(2026, 3, 5, 9, 0)
+        assert CronSchedule("0 8,20 * * *").next_after(datetime(2026, 3, 4, 9, 0)) == datetime(2026, 3, 4, 20, 0)
+
+    def test_weekdays(self):
+        """Test that weekdays count from Sunday and 7 also means Sunday"""
+        # 2026-03-04 is a Wednesday
+        assert CronSchedule("0 18 * * 5").next_after(datetime(2026, 3, 4, 12, 0)) == datetime(2026, 3, 6, 18, 0)
+        assert CronSchedule("0 12 * * 7").next_after(datetime(2026, 3, 4, 12, 0)) == datetime(2026, 3, 8, 12, 0)
+        assert CronSchedule("0 12 * * 0").weekdays == CronSchedule("0 12 * * 7").weekdays
+
+    def test_day_or_weekday(self):
+        """Test that a restricted day of month and weekday match on either"""
+        cron = CronSchedule("0 0 15 * 1")
+        # Monday the 9th comes before the 15th
+        assert cron.next_after(datetime(2026, 3, 4, 12, 0)) == datetime(2026, 3, 9, 0, 0)
+
+    def test_rolls_over_months_and_years(self):
+        """Test month and year rollover"""
+        assert CronSchedule("0 0 1 1 *").next_after(datetime(2026, 3, 4)) == datetime(2027, 1, 1)
+        assert CronSchedule("30 6 31 * *").next_after(datetime(2026, 4, 1)) == datetime(2026, 5, 31, 6, 30)
+
+    def test_invalid_expressions(self):
+        """Test that malformed expressions raise ValueError"""
+        for expression in ["* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "a * * * *"]:
+            with pytest.raises(ValueError):
+                CronSchedule(expression)
+        with pytest.raises(ValueError):
+            CronSchedule("0 0 31 2 *").next_after(datetime(2026, 1, 1))
+
+
+class TestJobScheduler:
+    """Test running, cancelling and measuring jobs"""
+
+    @pytest.mark.asyncio
+    async def test_interval_job_repeats(self):
+        """Test that an interval job runs repeatedly and records metrics"""
+        scheduler = JobScheduler()
+        runs = []
+        scheduler.add_interval("tick", lambda: runs.append(1), 0.02, first_run=0)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.11)
+        await scheduler.shutdown()
+        assert 3 <= len(runs) <= 7
+        assert scheduler.stats()["jobs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_one_shot_runs_once(self):
+        """Test that a one-shot job runs once and is then removed"""
+        scheduler = JobScheduler()
+        runs = []
+
+        async def job():
+            runs.append(1)
+
+        scheduler.add_once("once", job, delay=0.01)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.05)
+        assert runs == [1]
+        assert "once" not in scheduler.jobs
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_earlier_job_wakes_runner(self):
+        """Test that a job added after start runs on time despite a later job"""
+        scheduler = JobScheduler()
+        runs = []
+        scheduler.add_once("later", lambda: runs.append("later"), delay=60)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0)
+        scheduler.add_once("soon", lambda: runs.append("soon"), delay=0.01)
+        await asyncio.sleep(0.05)
+        assert runs == ["soon"]
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded(self):
+        """Test that a failing job is counted and keeps its schedule"""
+        scheduler = JobScheduler()
+
+        def boom():
+            raise RuntimeError("boom")
+
+        job = scheduler.add_interval("boom", boom, 0.02, first_run=0)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.05)
+        assert job.failures >= 2
+        assert job.last_error == "boom"
+        assert scheduler.job_stats()["boom"]["runs"] == job.runs
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_running_job_is_not_stacked(self):
+        """Test that a job still running when due again is skipped"""
+        scheduler = JobScheduler()
+        started = []
+
+        async def slow():
+            started.append(1)
+            await asyncio.sleep(0.08)
+
+        job = scheduler.add_interval("slow", slow, 0.02, first_run=0)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.07)
+        assert started == [1]
+        assert job.overlapped >= 2
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancel(self):
+        """Test that a cancelled job never runs"""
+        scheduler = JobScheduler()
+        runs = []
+        scheduler.add_once("once", lambda: runs.append(1), delay=0.01)
+        assert scheduler.cancel("once") is True
+        assert scheduler.cancel("once") is False
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.03)
+        assert runs == []
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_readding_replaces_job(self):
+        """Test that adding a job under an existing name replaces it"""
+        scheduler = JobScheduler()
+        runs = []
+        scheduler.add_once("job", lambda: runs.append("old"), delay=0.01)
+        scheduler.add_once("job", lambda: runs.append("new"), delay=0.01)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.03)
+        assert runs == ["new"]
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_misfire_policies(self):
+        """Test that late runs are coalesced into one or skipped"""
+        scheduler = JobScheduler()
+        runs = []
+        coalesce = scheduler.add_interval("coalesce", lambda: runs.append("coalesce"), 10, first_run=0)
+        skip = scheduler.add_interval("skip", lambda: runs.append("skip"), 10, first_run=0, misfire=MISFIRE_SKIP)
+        for job in (coalesce, skip):
+            job.misfire_grace = 1
+        # Pretend the loop was blocked for 35 seconds
+        past = time.time() - 35
+        scheduler._heap = [(past, i, job) for i, job in enumerate((coalesce, skip))]
+        for job in (coalesce, skip):
+            job.slot = job.next_run = past
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.02)
+        assert runs == ["coalesce"]
+        assert coalesce.missed == skip.missed == 1
+        # Both resume on their original grid instead of catching up
+        assert coalesce.next_run == pytest.approx(past + 40)
+        assert skip.next_run == pytest.approx(past + 40)
+        assert coalesce.misfire == MISFIRE_COALESCE
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_jitter_does_not_drift(self):
+        """Test that jitter delays runs without moving the schedule"""
+        scheduler = JobScheduler()
+        job = scheduler.add_interval("jittered", lambda: None, 10, jitter=2)
+        assert job.slot <= job.next_run <= job.slot + 2
+        assert job.following(job.slot, job.slot) == job.slot + 10
+
+    @pytest.mark.asyncio
+    async def test_shutdown_cancels_running_jobs(self):
+        """Test that shutdown waits briefly, then cancels jobs that keep running"""
+        scheduler = JobScheduler()
+        cancelled = asyncio.Event()
+
+        async def stuck():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        scheduler.add_once("stuck", stuck)
+        scheduler.start(asyncio.get_running_loop())
+        await asyncio.sleep(0.01)
+        await scheduler.shutdown(timeout=0.01)
+        assert cancelled.is_set()
+        assert scheduler.task is None
+
+    def test_invalid_arguments(self):
+        """Test that bad intervals and misfire policies are rejected"""
+        scheduler = JobScheduler()
+        with pytest.raises(ValueError):
+            scheduler.add_interval("zero", lambda: None, 0)
+        with pytest.raises(ValueError):
+            scheduler.add_once("bad", lambda: None, misfire="later")
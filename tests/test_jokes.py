@@ -0,0 +1,84 @@
+"""
+Tests for the prefetched joke buffer
+"""
+
+import asyncio
+import pytest
+from jokes import JokeBuffer
+from job_scheduler import JobScheduler
+
+
+class FakeJokeAPI:
+    """Joke source returning canned jokes, or None once exhausted"""
+
+    def __init__(self, jokes):
+        self.jokes = list(jokes)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.jokes.pop(0) if self.jokes else None
+
+
+class TestJokeBuffer:
+    """Test prefetching, dedup and fallback"""
+
+    @pytest.mark.asyncio
+    async def test_refill_and_serve_from_buffer(self):
+        """Test that jokes are served from the prefetched buffer in order"""
+        buffer = JokeBuffer(FakeJokeAPI(["one", "two", "three"]), size=2, fallback=["offline"])
+
+        assert await buffer.refill() == 2
+        assert buffer.next_joke() == "one"
+        assert buffer.next_joke() == "two"
+        assert buffer.served_from_buffer == 2
+
+    @pytest.mark.asyncio
+    async def test_recent_jokes_are_skipped(self):
+        """Test that a joke shown recently is not buffered again"""
+        buffer = JokeBuffer(FakeJokeAPI(["one", "one", "two"]), size=2, fallback=["offline"])
+
+        await buffer.refill()
+        assert list(buffer.buffer) == ["one", "two"]
+
+        buffer.next_joke()
+        buffer.source = FakeJokeAPI(["one"])
+        await buffer.refill()
+        assert list(buffer.buffer) == ["two"]
+
+    def test_fallback_when_empty(self):
+        """Test that an empty buffer answers from the offline corpus without repeats"""
+        buffer = JokeBuffer(FakeJokeAPI([]), size=2, fallback=["a", "b"])
+
+        first = buffer.next_joke()
+        second = buffer.next_joke()
+        assert {first, second} == {"a", "b"}
+        assert buffer.served_from_fallback == 2
+
+    @pytest.mark.asyncio
+    async def test_outage_stops_refill_early(self):
+        """Test that a failing upstream is not hammered"""
+        api = FakeJokeAPI([])
+        buffer = JokeBuffer(api, size=5, fallback=["offline"])
+
+        assert await buffer.refill() == 0
+        assert api.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_background_refill_after_use(self):
+        """Test that serving a joke wakes the prefetcher"""
+        api = FakeJokeAPI(["one", "two", "three"])
+        buffer = JokeBuffer(api, size=2, fallback=["offline"])
+        scheduler = JobScheduler()
+        buffer.start(scheduler)
+        scheduler.start(asyncio.get_running_loop())
+        try:
+            await asyncio.sleep(0.05)
+            assert len(buffer.buffer) == 2
+
+            buffer.next_joke()
+            await asyncio.sleep(0.05)
+            assert list(buffer.buffer) == ["two", "three"]
+            assert scheduler.job_stats()["joke_refill"]["runs"] == 1
+        finally:
+            await scheduler.shutdown()
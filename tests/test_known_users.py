@@ -0,0 +1,74 @@
+"""
+Tests for the known users Bloom filter
+"""
+
+import os
+import pytest
+from known_users import KnownUsers, optimal_parameters
+
+
+class TestKnownUsers:
+    """Test probabilistic known user tracking"""
+
+    @pytest.fixture
+    def filter_path(self, temp_state_dir):
+        """Path for a throwaway filter file"""
+        return os.path.join(temp_state_dir, "known_users.bloom")
+
+    def test_add_reports_new_users(self, filter_path):
+        """Test that add returns True only the first time"""
+        known = KnownUsers(filter_path, capacity=1000, false_positive_rate=0.01)
+
+        assert known.add("testuser") is True
+        assert known.add("testuser") is False
+        assert "testuser" in known
+        assert len(known) == 1
+        known.close()
+
+    def test_usernames_are_case_insensitive(self, filter_path):
+        """Test that Twitch usernames match regardless of case"""
+        known = KnownUsers(filter_path, capacity=1000, false_positive_rate=0.01)
+        known.add("TestUser")
+
+        assert "testuser" in known
+        known.close()
+
+    def test_persists_across_reopen(self, filter_path):
+        """Test that the mapped filter survives a restart"""
+        known = KnownUsers(filter_path, capacity=1000, false_positive_rate=0.01)
+        known.update(["user1", "user2", "user3"])
+        known.close()
+
+        reopened = KnownUsers(filter_path, capacity=1000, false_positive_rate=0.01)
+        assert "user1" in reopened
+        assert "user3" in reopened
+        assert len(reopened) == 3
+        reopened.close()
+
+    def test_existing_file_keeps_its_parameters(self, filter_path):
+        """Test that reopening with other settings does not corrupt the filter"""
+        known = KnownUsers(filter_path, capacity=1000, false_positive_rate=0.01)
+        known.add("user1")
+        num_bits = known.num_bits
+        known.close()
+
+        reopened = KnownUsers(filter_path, capacity=50000, false_positive_rate=0.0001)
+        assert reopened.num_bits == num_bits
+        assert "user1" in reopened
+        reopened.close()
+
+    def test_false_positive_rate_is_bounded(self):
+        """Test that the observed false-positive rate stays near the target"""
+        known = KnownUsers(None, capacity=5000, false_positive_rate=0.01)
+        known.update(f"user{i}" for i in range(5000))
+
+        false_positives = sum(f"stranger{i}" in known for i in range(10000))
+        assert false_positives / 10000 < 0.03
+
+    def test_optimal_parameters(self):
+        """Test filter sizing for capacity and error rate"""
+        num_bits, num_hashes = optimal_parameters(1_000_000, 0.01)
+
+        # Roughly 9.6 bits and 7 hashes per element at 1%
+        assert 9_000_000 < num_bits < 10_000_000
+        assert num_hashes == 7
@@ -0,0 +1,138 @@
+"""
+Tests for the shared live-status cache
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from live_status import LiveStatusCache
+import job_scheduler
+from job_scheduler import JobScheduler
+
+STARTED = datetime(2026, 1, 1, 18, 0, tzinfo=timezone.utc)
+
+
+class FakeHelix:
+    """Stands in for Helix Get Streams, recording each batch it is asked for"""
+
+    def __init__(self, live=None, fail=False):
+        self.live = live or {}
+        self.fail = fail
+        self.batches = []
+
+    async def fetch(self, logins):
+        self.batches.append(list(logins))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("helix down")
+        return {login: self.live[login] for login in logins if login in self.live}
+
+
+class TestLiveStatusCache:
+    """Test EventSub updates, Helix polling and freshness"""
+
+    @pytest.mark.asyncio
+    async def test_eventsub_online_and_offline(self):
+        """Test that stream.online/offline notifications update the cache"""
+        cache = LiveStatusCache()
+        cache.set_online("Peks", STARTED)
+        assert cache.status("peks").live is True
+        assert cache.status("peks").started_at == STARTED
+        assert cache.status("peks").source == "eventsub"
+        cache.set_offline("peks")
+        assert cache.status("peks").live is False
+        assert cache.status("peks").started_at is None
+        assert cache.stats()["events"] == 2
+
+    @pytest.mark.asyncio
+    async def test_listeners_fire_on_transitions_only(self):
+        """Test that listeners see each change once with the previous state"""
+        cache = LiveStatusCache()
+        seen = []
+
+        async def listener(channel, was_live, status):
+            seen.append((channel, was_live, status.live))
+
+        cache.add_listener(listener)
+        cache.set_online("peks")
+        cache.set_online("peks")
+        cache.set_offline("peks")
+        await asyncio.sleep(0)
+        assert seen == [("peks", None, True), ("peks", True, False)]
+
+    @pytest.mark.asyncio
+    async def test_polls_in_batches_of_batch_size(self):
+        """Test that stale channels are looked up at most batch_size per request"""
+        channels = [f"channel{i:03d}" for i in range(250)]
+        helix = FakeHelix(live={"channel007": STARTED})
+        cache = LiveStatusCache(fetch_live=helix.fetch, batch_size=100)
+        cache.track(channels)
+        await cache.refresh()
+        assert [len(batch) for batch in helix.batches] == [100, 100, 50]
+        assert cache.status("channel007").live is True
+        assert cache.status("channel008").live is False
+        assert cache.stats()["live"] == 1
+
+    @pytest.mark.asyncio
+    async def test_fresh_entries_are_not_polled(self):
+        """Test that channels with a fresh status are skipped by the poller"""
+        helix = FakeHelix()
+        cache = LiveStatusCache(fetch_live=helix.fetch)
+        cache.track(["peks", "other"])
+        cache.set_online("peks", STARTED)
+        await cache.refresh()
+        assert helix.batches == [["other"]]
+        await cache.refresh()
+        assert len(helix.batches) == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_entries_are_refreshed(self):
+        """Test that get() goes back to Helix once the TTL has passed"""
+        helix = FakeHelix(live={"peks": STARTED})
+        cache = LiveStatusCache(fetch_live=helix.fetch, helix_ttl=0)
+        assert (await cache.get("peks")).live is True
+        helix.live = {}
+        assert await cache.is_live("peks") is False
+        assert len(helix.batches) == 2
+
+    @pytest.mark.asyncio
+    async def test_poll_error_keeps_last_state(self):
+        """Test that a failed poll keeps the last known state"""
+        helix = FakeHelix(fail=True)
+        cache = LiveStatusCache(fetch_live=helix.fetch, eventsub_ttl=0)
+        cache.set_online("peks", STARTED)
+        assert await cache.is_live("peks") is True
+        assert cache.stats()["poll_errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_channel_without_fetcher(self):
+        """Test that an unknown channel is reported as not live"""
+        cache = LiveStatusCache()
+        assert await cache.get("peks") is None
+        assert await cache.is_live("peks") is False
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_share_one_poll(self):
+        """Test that callers arriving during a refresh wait for it instead of polling again"""
+        helix = FakeHelix(live={"peks": STARTED})
+        cache = LiveStatusCache(fetch_live=helix.fetch)
+        results = await asyncio.gather(*(cache.is_live("peks") for _ in range(5)))
+        assert results == [True] * 5
+        assert len(helix.batches) == 1
+
+    @pytest.mark.asyncio
+    async def test_start_polls_as_a_scheduled_job(self, monkeypatch):
+        """Test that the background refresh runs on the job scheduler, first run immediately"""
+        monkeypatch.setattr(job_scheduler.random, "uniform", lambda low, high: low)
+        helix = FakeHelix(live={"peks": STARTED})
+        cache = LiveStatusCache(fetch_live=helix.fetch, poll_interval=60)
+        cache.track(["peks"])
+        scheduler = JobScheduler()
+        cache.start(scheduler)
+        scheduler.start(asyncio.get_running_loop())
+        try:
+            await asyncio.sleep(0.05)
+            assert cache.status("peks").live is True
+            assert scheduler.job_stats()["live_status_poll"]["runs"] == 1
+        finally:
+            await scheduler.shutdown()
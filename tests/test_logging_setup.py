@@ -0,0 +1,130 @@
+"""
+Tests for the queued, structured logging setup
+"""
+
+import json
+import logging
+import sys
+import pytest
+import logging_setup
+from logging_setup import AsyncQueueHandler, JsonFormatter, SamplingFilter, parse_levels
+
+
+def make_record(msg="hello %s", args=("world",), level=logging.INFO, name="test", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+@pytest.fixture
+def isolated_logging(tmp_path, monkeypatch):
+    """Run setup_logging against a temp logs dir and restore the root logger after"""
+    monkeypatch.setattr(logging_setup.Paths, "LOGS_DIR", str(tmp_path))
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield tmp_path
+    logging_setup.stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestJsonFormatter:
+    """Test JSON record formatting"""
+
+    def test_fields_and_extras(self):
+        """Test that the message is resolved and extra= fields are included"""
+        entry = json.loads(JsonFormatter().format(make_record(user="alice", cost=0.5)))
+        assert entry["msg"] == "hello world"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "test"
+        assert entry["user"] == "alice"
+        assert entry["cost"] == 0.5
+        assert "args" not in entry
+
+    def test_exception_text(self):
+        """Test that tracebacks end up in the exc field"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        assert "ValueError: boom" in entry["exc"]
+
+
+class TestSamplingFilter:
+    """Test DEBUG sampling"""
+
+    def test_samples_debug_per_logger(self):
+        """Test that one in N DEBUG records pass for each logger"""
+        sampler = SamplingFilter(every=5)
+        kept = [sampler.filter(make_record(level=logging.DEBUG)) for _ in range(20)]
+        assert sum(kept) == 4
+        assert sampler.filter(make_record(level=logging.DEBUG, name="other"))
+
+    def test_info_and_above_always_pass(self):
+        """Test that records at or above INFO are never sampled"""
+        sampler = SamplingFilter(every=100)
+        assert all(sampler.filter(make_record(level=logging.WARNING)) for _ in range(10))
+
+    def test_sampled_records_are_marked(self):
+        """Test that kept DEBUG records say how many records they stand for"""
+        record = make_record(level=logging.DEBUG)
+        SamplingFilter(every=3).filter(record)
+        assert record.sampled == 3
+
+
+class TestAsyncQueueHandler:
+    """Test preparing records for the writer thread"""
+
+    def test_prepare_resolves_args_only(self):
+        """Test that arguments are frozen but formatting is left to the listener"""
+        args = ["world"]
+        record = make_record(args=(args,), msg="hello %s")
+        prepared = AsyncQueueHandler(None).prepare(record)
+        args.append("later")
+        assert prepared.msg == "hello ['world']"
+        assert prepared.args is None
+        assert not hasattr(prepared, "asctime")
+
+
+class TestParseLevels:
+    """Test per-subsystem level parsing"""
+
+    def test_valid(self):
+        """Test parsing several pairs"""
+        assert parse_levels("ai_command=debug, outbound=WARNING") == {"ai_command": "DEBUG", "outbound": "WARNING"}
+        assert parse_levels("") == {}
+
+    def test_invalid(self):
+        """Test that malformed pairs raise ValueError"""
+        for spec in ["ai_command", "ai_command=LOUD", "=DEBUG"]:
+            with pytest.raises(ValueError):
+                parse_levels(spec)
+
+
+class TestSetupLogging:
+    """Test the full queue/listener pipeline"""
+
+    def test_writes_json_lines_off_thread(self, isolated_logging):
+        """Test that records reach the log file as JSON through the listener"""
+        listener = logging_setup.setup_logging("INFO", "bot.log", subsystem_levels={"noisy": "ERROR"})
+        assert [type(h) for h in logging.getLogger().handlers] == [AsyncQueueHandler]
+        logging.getLogger("chat").info("message from %s", "alice", extra={"channel": "peks"})
+        logging.getLogger("noisy").warning("dropped")
+        logging_setup.stop_logging()
+        assert listener._thread is None
+
+        lines = [json.loads(line) for line in (isolated_logging / "bot.log").read_text().splitlines()]
+        assert [line["msg"] for line in lines] == ["message from alice"]
+        assert lines[0]["channel"] == "peks"
+
+    def test_reconfigure_replaces_handlers(self, isolated_logging):
+        """Test that calling setup_logging twice leaves one queue handler"""
+        logging_setup.setup_logging("INFO", "bot.log")
+        logging_setup.setup_logging("DEBUG", "bot.log", json_file=False)
+        assert len(logging.getLogger().handlers) == 1
+        assert logging.getLogger().level == logging.DEBUG
@@ -0,0 +1,82 @@
+"""
+Tests for the event loop lag monitor
+"""
+
+import asyncio
+import time
+import pytest
+from loop_monitor import LoopMonitor
+
+
+class TestLagRecording:
+    """Test sample bookkeeping without a running loop"""
+
+    def test_percentiles(self):
+        """Test percentiles over the recent window"""
+        monitor = LoopMonitor(threshold=10)
+        for ms in range(1, 101):
+            monitor.record(ms / 1000)
+        percentiles = monitor.percentiles()
+        assert percentiles["p50"] == pytest.approx(0.050, abs=0.002)
+        assert percentiles["p99"] == pytest.approx(0.099, abs=0.002)
+        assert monitor.stats()["max_ms"] == pytest.approx(100)
+
+    def test_empty(self):
+        """Test that no samples reports zero lag"""
+        assert LoopMonitor().stats()["p99_ms"] == 0
+
+    def test_window_drops_old_samples(self):
+        """Test that only the most recent samples count"""
+        monitor = LoopMonitor(threshold=10, window=3)
+        for lag in (5.0, 0.001, 0.001, 0.001):
+            monitor.record(lag)
+        assert monitor.percentiles()["p99"] == 0.001
+        assert monitor.stats()["max_ms"] == 5000
+
+    def test_stall_is_counted_with_its_stack(self):
+        """Test that lag over the threshold is a stall reported with the sampled stack"""
+        monitor = LoopMonitor(threshold=0.1)
+        monitor.record(0.05)
+        assert monitor.stalls == 0
+        monitor._stacks.append('  File "bot.py", line 1, in save_state\n')
+        monitor.record(0.3)
+        assert monitor.stalls == 1
+        assert monitor.last_stall["lag_ms"] == 300
+        assert "save_state" in monitor.last_stall["stack"]
+        assert monitor._stacks == []
+
+
+class TestLoopMonitor:
+    """Test the sampler and watchdog on a real loop"""
+
+    @pytest.mark.asyncio
+    async def test_detects_blocking_call(self):
+        """Test that a blocking call on the loop is caught with a stack sample"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        monitor.start(asyncio.get_running_loop())
+        try:
+            await asyncio.sleep(0.05)
+
+            def blocking_io():
+                time.sleep(0.3)
+
+            blocking_io()
+            await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+        assert monitor.stalls >= 1
+        assert monitor.stats()["max_ms"] >= 200
+        assert "blocking_io" in monitor.last_stall["stack"]
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_has_low_lag(self):
+        """Test that an idle loop records samples without stalls"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.5)
+        monitor.start(asyncio.get_running_loop())
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            monitor.stop()
+        assert monitor.stats()["samples"] > 0
+        assert monitor.stalls == 0
+        assert monitor.task is None
@@ -0,0 +1,140 @@
+"""
+Tests for the metrics registry and /metrics endpoint
+"""
+
+import socket
+import aiohttp
+import pytest
+import metrics
+from metrics import MetricsRegistry, MetricsServer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestMetricsRegistry:
+    """Test recording and the Prometheus text format"""
+
+    def test_counter_and_labels(self):
+        """Test unlabeled and labeled counters"""
+        registry = MetricsRegistry(prefix="t_")
+        total = registry.counter("messages_total", "Messages")
+        by_route = registry.counter("commands_total", "Commands", ("route",))
+        total.inc()
+        total.inc(2)
+        by_route.labels("ai").inc()
+        by_route.labels("chat").inc(3)
+        text = registry.render()
+        assert "# TYPE t_messages_total counter" in text
+        assert "t_messages_total 3" in text
+        assert 't_commands_total{route="ai"} 1' in text
+        assert 't_commands_total{route="chat"} 3' in text
+
+    def test_label_count_must_match(self):
+        """Test that the wrong number of label values raises ValueError"""
+        counter = MetricsRegistry().counter("x_total", "X", ("a", "b"))
+        with pytest.raises(ValueError):
+            counter.labels("only_one")
+
+    def test_label_values_are_escaped(self):
+        """Test escaping of quotes, backslashes and newlines"""
+        registry = MetricsRegistry(prefix="")
+        registry.counter("c_total", "C", ("name",)).labels('a"b\\c\nd').inc()
+        assert 'c_total{name="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+    def test_gauge(self):
+        """Test that gauges go up and down"""
+        gauge = MetricsRegistry(prefix="").gauge("depth", "Depth")
+        gauge.set(5)
+        gauge.dec(2)
+        gauge.inc(0.5)
+        assert gauge.value == 3.5
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts, sum, count and quantiles"""
+        registry = MetricsRegistry(prefix="")
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_sum 2.65" in text
+        assert "latency_seconds_count 4" in text
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.75) == 1.0
+
+    def test_histogram_timer(self):
+        """Test timing a block into a labeled histogram"""
+        histogram = MetricsRegistry(prefix="").histogram("work_seconds", "Work", ("route",))
+        with histogram.labels("chat").time():
+            pass
+        assert histogram.labels("chat").count == 1
+
+    def test_callback_metrics(self):
+        """Test metrics read at scrape time, skipping ones that fail"""
+        registry = MetricsRegistry(prefix="")
+        depth = [4]
+        registry.gauge_func("queued", "Queued", lambda: depth[0])
+        registry.counter_func("broken_total", "Broken", lambda: 1 / 0)
+        depth[0] = 7
+        text = registry.render()
+        assert "queued 7" in text
+        assert "# TYPE broken_total counter" in text
+        assert "broken_total " not in text.replace("# HELP broken_total ", "").replace("# TYPE broken_total ", "")
+
+    def test_redeclaring_keeps_totals(self):
+        """Test that re-registering a metric (e.g. on module reload) returns the existing one"""
+        registry = MetricsRegistry(prefix="")
+        first = registry.counter("reloads_total", "Reloads")
+        first.inc()
+        assert registry.counter("reloads_total", "Reloads") is first
+        with pytest.raises(ValueError):
+            registry.gauge("reloads_total", "Reloads")
+
+    def test_global_metrics_render(self):
+        """Test that the bot's shared metrics are registered"""
+        text = metrics.registry.render()
+        assert "murphy_messages_total" in text
+        assert "murphy_ai_latency_seconds_count" in text
+
+
+class TestMetricsServer:
+    """Test the local HTTP endpoint"""
+
+    @pytest.mark.asyncio
+    async def test_serves_metrics(self):
+        """Test that /metrics returns the registry in the text format"""
+        registry = MetricsRegistry(prefix="")
+        registry.counter("hits_total", "Hits").inc(2)
+        server = MetricsServer(registry, port=free_port())
+        assert await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                    body = await response.text()
+                    assert response.status == 200
+                    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        finally:
+            await server.stop()
+        assert "hits_total 2" in body
+
+    @pytest.mark.asyncio
+    async def test_busy_port_gives_up(self, monkeypatch):
+        """Test that a port held by another process is retried, then skipped"""
+        monkeypatch.setattr(metrics.Numbers, "METRICS_BIND_ATTEMPTS", 2)
+        monkeypatch.setattr(metrics.Numbers, "METRICS_BIND_RETRY_DELAY", 0)
+        with socket.socket() as holder:
+            holder.bind(("127.0.0.1", 0))
+            holder.listen()
+            server = MetricsServer(MetricsRegistry(), port=holder.getsockname()[1])
+            assert await server.start() is False
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """Test that port 0 disables the server"""
+        assert await MetricsServer(MetricsRegistry(), port=0).start() is False
@@ -0,0 +1,196 @@
+"""
+Tests for the outbound chat message scheduler
+"""
+
+import asyncio
+import pytest
+from outbound import OutboundQueue, Priority, TokenBucket
+
+
+class Recorder:
+    """Collects delivered messages, optionally blocking until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, text):
+        await self.gate.wait()
+        self.sent.append(text)
+        return text
+
+
+class TestTokenBucket:
+    """Test the token bucket"""
+
+    def test_allows_capacity_then_waits(self):
+        """Test that a full bucket allows a burst up to capacity"""
+        bucket = TokenBucket(3, 30)
+        for _ in range(3):
+            assert bucket.delay() == 0
+            bucket.consume()
+        assert bucket.delay() > 0
+
+
+class TestOutboundQueue:
+    """Test pacing, priorities, coalescing and backpressure"""
+
+    @pytest.mark.asyncio
+    async def test_delivers_in_order(self):
+        """Test that same-priority messages keep their order"""
+        queue = OutboundQueue(message_limit=10)
+        recorder = Recorder()
+        futures = [queue.send("chan", f"message {i}", recorder) for i in range(3)]
+        await asyncio.gather(*futures)
+        assert recorder.sent == ["message 0", "message 1", "message 2"]
+        assert queue.stats()["sent"] == 3
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_pending_messages_are_merged(self):
+        """Test that short queued messages go out in one send"""
+        queue = OutboundQueue()
+        recorder = Recorder()
+        futures = [queue.send("chan", f"msg {i}", recorder) for i in range(3)]
+        await asyncio.gather(*futures)
+        assert recorder.sent == ["msg 0 | msg 1 | msg 2"]
+        assert queue.stats()["merged"] == 2
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_replies_to_different_users_are_not_merged(self):
+        """Test that merging stops at a message with another reply target"""
+        queue = OutboundQueue()
+        alice, bob = Recorder(), Recorder()
+        alice.gate.clear()
+        first = queue.send("chan", "busy", alice)
+        await asyncio.sleep(0)
+        futures = [
+            queue.send("chan", "for alice 1", alice),
+            queue.send("chan", "for bob", bob),
+            queue.send("chan", "for alice 2", alice),
+        ]
+        alice.gate.set()
+        await asyncio.gather(first, *futures)
+        assert alice.sent == ["busy", "for alice 1", "for alice 2"]
+        assert bob.sent == ["for bob"]
+        assert queue.stats()["merged"] == 0
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_send_only_fails_its_own_target(self):
+        """Test that one target's failure does not resolve another's message as failed"""
+        queue = OutboundQueue()
+        ok = Recorder()
+        ok.gate.clear()
+
+        async def broken(text):
+            raise RuntimeError("send failed")
+
+        first = queue.send("chan", "first", ok)
+        await asyncio.sleep(0)
+        failing = queue.send("chan", "doomed", broken)
+        fine = queue.send("chan", "delivered", ok)
+        ok.gate.set()
+        await asyncio.gather(first, failing, fine)
+        assert failing.result() is None
+        assert fine.result() == "delivered"
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_long_message_is_split(self):
+        """Test that an oversized reply is split instead of truncated"""
+        queue = OutboundQueue(message_limit=20)
+        recorder = Recorder()
+        recorder.gate.clear()
+        future = queue.send("chan", "Main Queue: alice, bob, carol, dave", recorder)
+        recorder.gate.set()
+        await future
+        assert recorder.sent[0] == "Main Queue: alice"
+        assert " | ".join(recorder.sent) == "Main Queue: alice | bob, carol, dave"
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_mod_messages_jump_the_queue(self):
+        """Test that mod replies are sent before pending fun replies"""
+        queue = OutboundQueue()
+        recorder = Recorder()
+        recorder.gate.clear()
+
+        first = queue.send("chan", "in flight", recorder, Priority.FUN)
+        await asyncio.sleep(0)
+        queue.send("chan", "fun", recorder, Priority.FUN)
+        last = queue.send("chan", "mod", recorder, Priority.MOD)
+
+        recorder.gate.set()
+        await asyncio.gather(first, last)
+        assert recorder.sent == ["in flight", "mod | fun"]
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_duplicates_are_coalesced(self):
+        """Test that identical pending messages are sent once"""
+        queue = OutboundQueue()
+        recorder = Recorder()
+        recorder.gate.clear()
+
+        queue.send("chan", "in flight", recorder)
+        await asyncio.sleep(0)
+        first = queue.send("chan", "Penta count: 5", recorder)
+        second = queue.send("chan", "Penta count: 5", recorder)
+        assert first is second
+
+        recorder.gate.set()
+        await first
+        assert recorder.sent.count("Penta count: 5") == 1
+        assert queue.stats()["coalesced"] == 1
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_is_enforced(self):
+        """Test that a channel never exceeds its bucket"""
+        queue = OutboundQueue(channel_limit=2, window=30, message_limit=10)
+        recorder = Recorder()
+        for i in range(4):
+            queue.send("chan", f"message {i}", recorder)
+
+        await asyncio.sleep(0.05)
+        assert recorder.sent == ["message 0", "message 1"]
+        assert queue.depth("chan") == 2
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_lowest_priority(self):
+        """Test that backpressure sheds fun messages before mod messages"""
+        queue = OutboundQueue(channel_limit=1, window=30, max_pending=2)
+        recorder = Recorder()
+        queue.send("chan", "sent now", recorder)
+        await asyncio.sleep(0.01)
+
+        fun = queue.send("chan", "fun", recorder, Priority.FUN)
+        queue.send("chan", "normal", recorder)
+        queue.send("chan", "mod", recorder, Priority.MOD)
+        extra_fun = queue.send("chan", "more fun", recorder, Priority.FUN)
+
+        assert fun.done() and fun.result() is None
+        assert extra_fun.done() and extra_fun.result() is None
+        assert queue.depth("chan") == 2
+        assert queue.stats()["dropped"] == 2
+        queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_send_does_not_stop_lane(self):
+        """Test that one failing send does not block later messages"""
+        queue = OutboundQueue(message_limit=5)
+        recorder = Recorder()
+
+        async def broken(text):
+            raise RuntimeError("connection lost")
+
+        failed = queue.send("chan", "lost", broken)
+        delivered = queue.send("chan", "ok", recorder)
+        assert await failed is None
+        assert await delivered == "ok"
+        assert queue.stats()["failed"] == 1
+        queue.stop()
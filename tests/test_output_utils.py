@@ -0,0 +1,54 @@
+"""
+Tests for chat output splitting and pagination
+"""
+
+from output_utils import split_message, pack_segments, paginate
+
+
+class TestSplitMessage:
+    """Test splitting replies to the chat message budget"""
+
+    def test_short_text_is_unchanged(self):
+        """Test that a reply within budget is one message"""
+        assert split_message("Cannon count: 5") == ["Cannon count: 5"]
+
+    def test_lines_are_packed(self):
+        """Test that newline-separated lines share a message when they fit"""
+        text = "Command: hi\nResponse: hello\nUsed: 3 times"
+        assert split_message(text) == ["Command: hi | Response: hello | Used: 3 times"]
+
+    def test_splits_on_item_boundaries(self):
+        """Test that long lists break between items"""
+        users = [f"user{i:03d}" for i in range(100)]
+        text = "Main Queue: " + ", ".join(users)
+        messages = split_message(text, budget=100)
+
+        assert all(len(message) <= 100 for message in messages)
+        rejoined = ", ".join(messages).replace("Main Queue: ", "")
+        assert rejoined.split(", ") == users
+
+    def test_splits_on_words_then_characters(self):
+        """Test that text without items breaks on spaces, and unbroken text is cut"""
+        assert split_message("aaaa bbbb cccc", budget=9) == ["aaaa bbbb", "cccc"]
+        assert split_message("x" * 25, budget=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+    def test_blank_text(self):
+        """Test that blank text produces no messages"""
+        assert split_message(" \n ") == []
+
+
+class TestPagination:
+    """Test grouping items into pages"""
+
+    def test_pages_fit_budget(self):
+        """Test that every page fits and no item is lost"""
+        items = [f"command{i}" for i in range(60)]
+        pages = paginate(items, budget=80)
+
+        assert len(pages) > 1
+        assert all(len(page) <= 80 for page in pages)
+        assert ", ".join(pages).split(", ") == items
+
+    def test_pack_segments(self):
+        """Test greedy packing with a custom joiner"""
+        assert pack_segments(["ab", "cd", "ef"], budget=6, joiner="-") == ["ab-cd", "ef"]
@@ -0,0 +1,71 @@
+"""
+Tests for hot reloading handler modules
+"""
+
+import importlib
+import sys
+import pytest
+from reloader import reload_handlers, ReloadError
+
+MODULE_SOURCE = '''
+counters = {{"penta": 0}}
+_RELOAD_STATE = ("counters",)
+
+def handle():
+    return "{reply}"
+'''
+
+
+class TestReloader:
+    """Test module reload with state migration"""
+
+    @pytest.fixture
+    def handler_module(self, tmp_path, monkeypatch):
+        """A throwaway handler module importable from sys.path"""
+        path = tmp_path / "reload_target.py"
+        path.write_text(MODULE_SOURCE.format(reply="old"))
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(sys, "dont_write_bytecode", True)
+        module = importlib.import_module("reload_target")
+        yield module, path
+        sys.modules.pop("reload_target", None)
+
+    def test_reload_picks_up_new_code_and_keeps_state(self, handler_module):
+        """Test that new handlers are used while counters survive"""
+        module, path = handler_module
+        module.counters["penta"] = 5
+        path.write_text(MODULE_SOURCE.format(reply="new handler"))
+
+        elapsed_ms, reloaded = reload_handlers(["reload_target"])
+
+        assert module.handle() == "new handler"
+        assert module.counters["penta"] == 5
+        assert reloaded == ["reload_target"]
+        assert elapsed_ms >= 0
+
+    def test_syntax_error_keeps_old_code(self, handler_module):
+        """Test that a broken edit never replaces the running handlers"""
+        module, path = handler_module
+        path.write_text("def handle(:\n")
+
+        with pytest.raises(ReloadError):
+            reload_handlers(["reload_target"])
+
+        assert module.handle() == "old"
+
+    def test_import_error_restores_namespace(self, handler_module):
+        """Test that a module failing at import time is rolled back"""
+        module, path = handler_module
+        module.counters["penta"] = 3
+        path.write_text("raise RuntimeError('broken at import')\n")
+
+        with pytest.raises(ReloadError):
+            reload_handlers(["reload_target"])
+
+        assert module.handle() == "old"
+        assert module.counters["penta"] == 3
+
+    def test_unknown_module(self):
+        """Test reloading a module that is not loaded"""
+        with pytest.raises(ReloadError):
+            reload_handlers(["definitely_not_a_module"])
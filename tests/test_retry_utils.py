@@ -0,0 +1,95 @@
+"""
+Tests for retries and circuit breakers
+"""
+
+import time
+import pytest
+from retry_utils import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    RetryConfig,
+    breaker_states,
+    get_circuit_breaker,
+    resilient_call,
+)
+import retry_utils
+
+
+class Flaky:
+    """Async callable failing a set number of times before succeeding"""
+
+    def __init__(self, failures, exc=ConnectionError):
+        self.failures = failures
+        self.exc = exc
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc("boom")
+        return "ok"
+
+
+FAST_RETRY = RetryConfig(max_attempts=3, initial_delay=0, jitter=False, exceptions=(ConnectionError,))
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_registry(self, monkeypatch):
+        """Isolate the breaker registry"""
+        monkeypatch.setattr(retry_utils, "_breakers", {})
+
+    @pytest.mark.asyncio
+    async def test_opens_and_fails_fast(self):
+        """Test that consecutive failures open the breaker"""
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60, name="dep")
+        func = Flaky(failures=10)
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(func)
+        with pytest.raises(CircuitBreakerOpenError):
+            await breaker.call(func)
+        assert func.calls == 2
+        assert breaker.describe().startswith("OPEN")
+
+    @pytest.mark.asyncio
+    async def test_success_resets_failure_count(self):
+        """Test that only consecutive failures count"""
+        breaker = CircuitBreaker(failure_threshold=2, name="dep")
+        func = Flaky(failures=1)
+
+        with pytest.raises(ConnectionError):
+            await breaker.call(func)
+        assert await breaker.call(func) == "ok"
+        assert breaker.failure_count == 0
+        assert breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_half_open_failure_reopens(self):
+        """Test that a failed trial call reopens the breaker immediately"""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=0, name="dep")
+        breaker.state = "open"
+        breaker.last_failure_time = time.monotonic() - 1
+
+        with pytest.raises(ConnectionError):
+            await breaker.call(Flaky(failures=1))
+        assert breaker.state == "open"
+
+    @pytest.mark.asyncio
+    async def test_resilient_call_retries_behind_breaker(self):
+        """Test that retries happen inside one breaker call"""
+        get_circuit_breaker("dep", failure_threshold=1)
+        func = Flaky(failures=2)
+
+        assert await resilient_call("dep", func, config=FAST_RETRY) == "ok"
+        assert func.calls == 3
+        assert breaker_states() == {"dep": "CLOSED"}
+
+    def test_registry_returns_same_breaker(self):
+        """Test that every caller of a dependency shares its breaker"""
+        first = get_circuit_breaker("openai", failure_threshold=2)
+        assert get_circuit_breaker("openai") is first
+        assert first.failure_threshold == 2
@@ -0,0 +1,60 @@
+"""
+Tests for the semantic AI response cache
+"""
+
+import numpy as np
+from semantic_cache import SemanticCache, embed
+
+
+class TestEmbed:
+    """Test the hashed n-gram embedding"""
+
+    def test_unit_length(self):
+        """Test that embeddings are normalized"""
+        assert np.isclose(np.linalg.norm(embed("who is peks")), 1.0)
+
+    def test_word_order_does_not_matter(self):
+        """Test that reordered prompts embed almost identically"""
+        assert float(embed("murphy who is peks") @ embed("who is peks murphy")) > 0.99
+
+    def test_unrelated_prompts_are_dissimilar(self):
+        """Test that different questions score low"""
+        assert float(embed("who is peks") @ embed("what is the best game")) < 0.5
+
+    def test_empty_text(self):
+        """Test that text without features embeds to zeros"""
+        assert not embed("?!").any()
+
+
+class TestSemanticCache:
+    """Test lookups, thresholds, expiry and bounds"""
+
+    def test_near_duplicate_hits(self):
+        """Test that a rephrased prompt reuses the cached answer"""
+        cache = SemanticCache(max_entries=8)
+        cache.add("murphy who is peks", "Peks is the streamer okayCousin")
+        assert cache.lookup("who is peks murphy?") == "Peks is the streamer okayCousin"
+        assert cache.stats()["hit_rate"] == 1.0
+
+    def test_dissimilar_prompt_misses(self):
+        """Test that a different question is not answered from the cache"""
+        cache = SemanticCache(max_entries=8)
+        cache.add("what is your favorite food", "Pizza")
+        assert cache.lookup("what is your favorite color") is None
+        assert cache.stats()["hits"] == 0
+
+    def test_expired_entries_are_ignored(self):
+        """Test that entries older than the TTL do not hit"""
+        cache = SemanticCache(max_entries=8, ttl=-1)
+        cache.add("who is peks", "The streamer")
+        assert cache.lookup("who is peks") is None
+
+    def test_memory_is_bounded(self):
+        """Test that the oldest entry is replaced once full"""
+        cache = SemanticCache(max_entries=2)
+        cache.add("who is peks", "first")
+        cache.add("what game is this", "second")
+        cache.add("when does the stream start", "third")
+        assert len(cache) == 2
+        assert cache.lookup("who is peks") is None
+        assert cache.lookup("when does the stream start") == "third"
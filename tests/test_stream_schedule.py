@@ -0,0 +1,202 @@
+"""
+Tests for the compiled stream schedule
+"""
+
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+import pytest
+from stream_schedule import StreamSchedule, minutes_between, parse_times
+
+LONDON = ZoneInfo("Europe/London")
+WEEKLY = {
+    "monday": "18:00",
+    "tuesday": "",
+    "wednesday": "14:00, 20:30",
+    "friday": "20:00",
+    "sunday": "19:30",
+}
+
+
+def at(year, month, day, hour=0, minute=0):
+    return datetime(year, month, day, hour, minute, tzinfo=LONDON)
+
+
+@pytest.fixture
+def host_in_london():
+    """Run a test with the process's local timezone set to Europe/London."""
+    if not hasattr(time, "tzset"):
+        pytest.skip("Changing the local timezone needs time.tzset")
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/London"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+class TestParseTimes:
+    """Test parsing of per-day stream times"""
+
+    def test_single_multiple_and_empty(self):
+        """Test single times, comma separated lists and empty days"""
+        assert [t.strftime("%H:%M") for t in parse_times("18:00")] == ["18:00"]
+        assert [t.strftime("%H:%M") for t in parse_times("20:30,14:00")] == ["14:00", "20:30"]
+        assert [t.strftime("%H:%M") for t in parse_times(["09:15"])] == ["09:15"]
+        assert parse_times("") == []
+        assert parse_times(None) == []
+
+    def test_invalid_time(self):
+        """Test that malformed times raise ValueError"""
+        for spec in ["18", "25:00", "six:30"]:
+            with pytest.raises(ValueError):
+                parse_times(spec)
+
+
+class TestStreamSchedule:
+    """Test slot lookups, exceptions and timezones"""
+
+    def test_next_and_previous_slot(self):
+        """Test lookups within a day, across days and across the week"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        # 2026-03-04 is a Wednesday
+        assert schedule.next_slot(at(2026, 3, 4, 15)) == at(2026, 3, 4, 20, 30)
+        assert schedule.previous_slot(at(2026, 3, 4, 15)) == at(2026, 3, 4, 14)
+        assert schedule.next_slot(at(2026, 3, 4, 21)) == at(2026, 3, 6, 20)
+        assert schedule.previous_slot(at(2026, 3, 3, 12)) == at(2026, 3, 2, 18)
+        # A slot counts as both next and previous at its exact start
+        assert schedule.next_slot(at(2026, 3, 4, 14)) == at(2026, 3, 4, 14)
+        assert schedule.previous_slot(at(2026, 3, 4, 14)) == at(2026, 3, 4, 14)
+
+    def test_slots_on_and_nearest(self):
+        """Test per-day slots and picking the closest one to a start time"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        assert schedule.slots_on(date(2026, 3, 4)) == [at(2026, 3, 4, 14), at(2026, 3, 4, 20, 30)]
+        assert schedule.slots_on(date(2026, 3, 3)) == []
+        assert schedule.nearest_on_day(at(2026, 3, 4, 19)) == at(2026, 3, 4, 20, 30)
+        assert schedule.nearest_on_day(at(2026, 3, 4, 16)) == at(2026, 3, 4, 14)
+        assert schedule.nearest_on_day(at(2026, 3, 3, 19)) is None
+
+    def test_next_day_slot(self):
+        """Test finding the first stream on a later day"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        assert schedule.next_day_slot(at(2026, 3, 4, 10)) == at(2026, 3, 6, 20)
+
+    def test_exceptions_replace_and_cancel_days(self):
+        """Test that date exceptions override the weekly schedule"""
+        schedule = StreamSchedule(
+            WEEKLY, tz=LONDON, exceptions={"2026-03-06": "", "2026-03-07": "12:00"}
+        )
+        assert schedule.slots_on(date(2026, 3, 6)) == []
+        assert schedule.next_slot(at(2026, 3, 5)) == at(2026, 3, 7, 12)
+        # The following Friday is back to normal
+        assert schedule.slots_on(date(2026, 3, 13)) == [at(2026, 3, 13, 20)]
+
+    def test_invalid_exception(self):
+        """Test that bad exception dates raise ValueError"""
+        with pytest.raises(ValueError):
+            StreamSchedule(WEEKLY, tz=LONDON, exceptions={"next friday": ""})
+
+    def test_load_exceptions(self, tmp_path):
+        """Test loading exceptions from disk, keeping them on a broken file"""
+        path = tmp_path / "schedule_exceptions.json"
+        path.write_text(json.dumps({"2026-03-02": "21:00"}))
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        assert schedule.slots_on(date(2026, 3, 2)) == [at(2026, 3, 2, 18)]
+        assert schedule.load_exceptions(str(path)) == 1
+        assert schedule.slots_on(date(2026, 3, 2)) == [at(2026, 3, 2, 21)]
+        path.write_text("{broken")
+        assert schedule.load_exceptions(str(path)) == 0
+        assert schedule.slots_on(date(2026, 3, 2)) == [at(2026, 3, 2, 21)]
+        assert schedule.load_exceptions(str(tmp_path / "missing.json")) == 0
+
+    def test_daylight_saving_keeps_wall_time(self):
+        """Test that slots stay at the same local time across a DST change"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        # UK clocks go forward on 2026-03-29
+        before = schedule.next_slot(at(2026, 3, 22))
+        after = schedule.next_slot(at(2026, 3, 29))
+        assert before.strftime("%H:%M") == after.strftime("%H:%M") == "19:30"
+        assert before.astimezone(timezone.utc).hour == 19
+        assert after.astimezone(timezone.utc).hour == 18
+
+    def test_host_local_time_follows_daylight_saving(self, host_in_london):
+        """Test that without a timezone, slots past a DST change in the same index keep wall time"""
+        schedule = StreamSchedule(WEEKLY)
+        # Both lookups fall in one compiled window spanning the 2026-03-29 change
+        before = schedule.next_slot(datetime(2026, 3, 22))
+        after = schedule.next_slot(datetime(2026, 3, 29))
+        assert before.strftime("%H:%M") == after.strftime("%H:%M") == "19:30"
+        assert before.astimezone(timezone.utc).hour == 19
+        assert after.astimezone(timezone.utc).hour == 18
+        assert schedule.now().tzinfo is not None
+        assert schedule.nearest_on_day(datetime(2026, 3, 30, 18, 10)).strftime("%H:%M") == "18:00"
+
+    def test_aware_times_in_other_zones(self):
+        """Test that UTC moments (e.g. Helix started_at) are compared correctly"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        started = datetime(2026, 7, 6, 17, 5, tzinfo=timezone.utc)  # 18:05 in London
+        assert schedule.nearest_on_day(started) == at(2026, 7, 6, 18)
+        assert minutes_between(schedule.nearest_on_day(started), started) == 5
+
+    def test_naive_times_are_local(self):
+        """Test that naive moments are read in the schedule's timezone"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON)
+        assert schedule.next_slot(datetime(2026, 3, 4, 15)) == at(2026, 3, 4, 20, 30)
+
+    def test_index_rebuilds_outside_window(self):
+        """Test that lookups far from the first compile still work"""
+        schedule = StreamSchedule(WEEKLY, tz=LONDON, horizon_days=10)
+        assert schedule.next_slot(at(2026, 3, 4, 15)) == at(2026, 3, 4, 20, 30)
+        assert schedule.next_slot(at(2027, 1, 4, 12)) == at(2027, 1, 4, 18)
+        assert schedule.previous_slot(at(2025, 6, 3, 12)) == at(2025, 6, 2, 18)
+
+    def test_empty_schedule(self):
+        """Test that an empty schedule has no slots"""
+        schedule = StreamSchedule({}, tz=LONDON)
+        assert schedule.next_slot(at(2026, 3, 4)) is None
+        assert schedule.previous_slot(at(2026, 3, 4)) is None
+        assert schedule.next_day_slot(at(2026, 3, 4)) is None
+
+    def test_loads_config_on_first_use(self, monkeypatch, tmp_path):
+        """Test that a schedule built without times reads config.STREAM_SCHEDULE lazily"""
+        monkeypatch.setitem(sys.modules, "config", SimpleNamespace(STREAM_SCHEDULE={"Monday": "18:00"}))
+        monkeypatch.chdir(tmp_path)
+        schedule = StreamSchedule()
+        schedule.set_timezone(LONDON)
+        assert schedule.next_slot(at(2026, 3, 4)) == at(2026, 3, 9, 18)
+
+    def test_explicit_schedule_skips_config(self, monkeypatch):
+        """Test that configure() wins over the config module"""
+        monkeypatch.setitem(sys.modules, "config", SimpleNamespace(STREAM_SCHEDULE={"monday": "18:00"}))
+        schedule = StreamSchedule()
+        schedule.configure({"friday": "20:00"}, tz=LONDON)
+        assert schedule.next_slot(at(2026, 3, 4)) == at(2026, 3, 6, 20)
+
+    def test_missing_config_leaves_schedule_empty(self, monkeypatch):
+        """Test that without a config module the schedule is empty rather than failing"""
+        monkeypatch.setitem(sys.modules, "config", None)
+        schedule = StreamSchedule(tz=LONDON)
+        assert schedule.next_slot(at(2026, 3, 4)) is None
+
+    def test_unknown_timezone(self):
+        """Test that an unknown timezone raises ValueError"""
+        with pytest.raises(ValueError):
+            StreamSchedule(WEEKLY, tz="Mars/Olympus_Mons")
+
+
+class TestMinutesBetween:
+    """Test the delta helper that replaces timedelta.seconds"""
+
+    def test_negative_and_multi_day(self):
+        """Test deltas that timedelta.seconds got wrong"""
+        assert minutes_between(at(2026, 3, 4, 18), at(2026, 3, 4, 18, 30)) == 30
+        assert minutes_between(at(2026, 3, 4, 18, 30), at(2026, 3, 4, 18)) == -30
+        assert minutes_between(at(2026, 3, 2, 18), at(2026, 3, 4, 18)) == 2 * 24 * 60
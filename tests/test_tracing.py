@@ -0,0 +1,126 @@
+"""
+Tests for per-message tracing
+"""
+
+import asyncio
+import pytest
+import tracing
+from tracing import Tracer, span
+
+
+class TestTracer:
+    """Test sampling, spans and the slow trace buffer"""
+
+    def test_disabled_records_nothing(self):
+        """Test that a zero sample rate never starts a trace"""
+        tracer = Tracer(sample_rate=0)
+        with tracer.trace("message") as trace:
+            assert trace is None
+            assert tracing.current() is None
+            with span("step"):
+                pass
+        assert tracer.stats()["traced"] == 0
+        assert not tracer.enabled
+
+    def test_spans_are_recorded_in_order(self):
+        """Test nested spans, their depth and the breakdown text"""
+        tracer = Tracer(sample_rate=1, slow_ms=0)
+        with tracer.trace("message", channel="peks") as trace:
+            with span("get_context"):
+                pass
+            with span("command"):
+                with span("cooldown"):
+                    pass
+        assert tracing.current() is None
+        names = [(record.name, record.depth) for record in sorted(trace.spans, key=lambda r: r.offset)]
+        assert names == [("get_context", 0), ("command", 0), ("cooldown", 1)]
+        assert trace.duration is not None
+        assert trace.breakdown().startswith("get_context ")
+        assert "> cooldown" in trace.breakdown()
+        assert "channel=peks" in trace.summary()
+
+    def test_errors_are_marked(self):
+        """Test that a span records the exception that left it"""
+        tracer = Tracer(sample_rate=1, slow_ms=0)
+        with pytest.raises(KeyError):
+            with tracer.trace("message") as trace:
+                with span("lookup"):
+                    raise KeyError("missing")
+        assert trace.spans[0].error == "KeyError"
+        assert tracer.stats()["traced"] == 1
+
+    def test_only_slow_traces_are_kept(self):
+        """Test the slow threshold and slowest-first ordering"""
+        tracer = Tracer(sample_rate=1, slow_ms=1000)
+        with tracer.trace("fast"):
+            pass
+        assert tracer.slowest() == []
+
+        tracer.configure(1, 0)
+        for name in ("a", "b", "c"):
+            with tracer.trace(name) as trace:
+                pass
+            trace.duration = {"a": 0.2, "b": 0.9, "c": 0.5}[name]
+        assert [trace.name for trace in tracer.slowest(2)] == ["b", "c"]
+
+    def test_ring_buffer_drops_oldest(self):
+        """Test that the buffer keeps only the most recent slow traces"""
+        tracer = Tracer(sample_rate=1, slow_ms=0, capacity=2)
+        for name in ("first", "second", "third"):
+            with tracer.trace(name):
+                pass
+        assert {trace.name for trace in tracer.slowest(10)} == {"second", "third"}
+        assert tracer.stats()["slow"] == 3
+
+    def test_to_dict(self):
+        """Test the JSON form served on /traces"""
+        tracer = Tracer(sample_rate=1, slow_ms=0)
+        with tracer.trace("message") as trace:
+            tracing.annotate(command="ai")
+            with span("ai_queue"):
+                pass
+        data = trace.to_dict()
+        assert data["attrs"] == {"command": "ai"}
+        assert data["spans"][0]["name"] == "ai_queue"
+
+
+class TestTraceContext:
+    """Test that traces follow a message across awaits and tasks"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_messages_stay_separate(self):
+        """Test that interleaved messages record into their own traces"""
+        tracer = Tracer(sample_rate=1, slow_ms=0)
+
+        async def handle(name):
+            with tracer.trace(name) as trace:
+                with span(f"{name}_step"):
+                    await asyncio.sleep(0)
+            return trace
+
+        first, second = await asyncio.gather(handle("one"), handle("two"))
+        assert [record.name for record in first.spans] == ["one_step"]
+        assert [record.name for record in second.spans] == ["two_step"]
+
+    @pytest.mark.asyncio
+    async def test_explicit_trace_in_worker_task(self):
+        """Test recording into a trace from a task started outside it"""
+        tracer = Tracer(sample_rate=1, slow_ms=0)
+        jobs: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            func = await jobs.get()
+            await func()
+
+        worker_task = asyncio.create_task(worker())
+        with tracer.trace("message") as trace:
+            captured = tracing.current()
+
+            async def work():
+                assert tracing.current() is None
+                with span("openai", captured):
+                    pass
+
+            await jobs.put(work)
+            await worker_task
+        assert [record.name for record in trace.spans] == ["openai"]
@@ -0,0 +1,106 @@
+"""
+Tests for the translation cache and English fast-path
+"""
+
+import asyncio
+import pytest
+from translation import Translator, looks_english, normalize_text
+
+
+class FakeBackend:
+    """Remote translator stand-in that counts calls"""
+
+    def __init__(self, result=("Hello world", "es"), delay=0):
+        self.calls = []
+        self.result = result
+        self.delay = delay
+
+    async def __call__(self, text):
+        self.calls.append(text)
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+class TestLanguageDetection:
+    """Test the local English pre-check"""
+
+    def test_english_is_detected(self):
+        """Test that ordinary English chat skips translation"""
+        assert looks_english("what are you doing with the jungle today")
+        assert looks_english("I don't think that is it")
+
+    def test_other_languages_are_not_english(self):
+        """Test that foreign or uncertain text still goes to the translator"""
+        assert not looks_english("hola mundo como estas amigo")
+        assert not looks_english("wie geht es dir heute")
+        assert not looks_english("привет как дела")
+        assert not looks_english("hello there")  # too short to be sure
+
+    def test_shared_short_words_do_not_count(self):
+        """Test that Spanish and German made of words English shares are not taken as English"""
+        assert not looks_english("no me gusta la comida")
+        assert not looks_english("a mi me gusta mucho")
+        assert not looks_english("so was hab ich nie")
+        assert not looks_english("ich will in die stadt")
+
+    def test_normalize_text(self):
+        """Test that whitespace and case do not split cache entries"""
+        assert normalize_text("  Hola   MUNDO ") == normalize_text("hola mundo")
+
+
+class TestTranslator:
+    """Test caching and request deduplication"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_text_is_cached(self):
+        """Test that a repeated phrase is translated once"""
+        backend = FakeBackend()
+        translator = Translator(backend)
+
+        assert await translator.translate("Hola mundo") == ("Hello world", "es")
+        assert await translator.translate("hola   mundo") == ("Hello world", "es")
+        assert len(backend.calls) == 1
+        assert translator.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_english_skips_backend(self):
+        """Test that English text returns immediately as English"""
+        backend = FakeBackend()
+        translator = Translator(backend)
+
+        assert await translator.translate("this is what we do") == ("this is what we do", "en")
+        assert backend.calls == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_call(self):
+        """Test that identical in-flight requests are deduplicated"""
+        backend = FakeBackend(delay=0.05)
+        translator = Translator(backend)
+
+        results = await asyncio.gather(*(translator.translate("Hola mundo") for _ in range(5)))
+        assert all(result == ("Hello world", "es") for result in results)
+        assert len(backend.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        """Test that a failed translation is retried next time"""
+        backend = FakeBackend(result=("Error translating text. Please try again later.", None))
+        translator = Translator(backend)
+
+        await translator.translate("Hola mundo")
+        await translator.translate("Hola mundo")
+        assert len(backend.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self):
+        """Test that the least recently used entry is evicted"""
+        translator = Translator(FakeBackend(), max_entries=2)
+
+        await translator.translate("uno")
+        await translator.translate("dos")
+        await translator.translate("uno")
+        await translator.translate("tres")
+
+        assert translator.stats()["entries"] == 2
+        assert "dos" not in translator._cache
+        assert "uno" in translator._cache
@@ -0,0 +1,104 @@
+"""
+Tests for the chat trigger engine
+"""
+
+import json
+import os
+from triggers import KeywordAutomaton, TriggerEngine, parse_triggers
+
+
+def engine_with(*entries):
+    engine = TriggerEngine(path="unused.json")
+    engine.set_triggers(parse_triggers({"triggers": list(entries)}))
+    return engine
+
+
+class TestKeywordAutomaton:
+    """Test multi-pattern matching"""
+
+    def test_finds_overlapping_keywords(self):
+        """Test that keywords sharing suffixes and prefixes are all found"""
+        automaton = KeywordAutomaton()
+        for keyword in ["he", "she", "his", "hers"]:
+            automaton.add(keyword, keyword)
+        automaton.build()
+        found = sorted((start, value) for start, _, value in automaton.scan("ushers"))
+        assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+    def test_no_keywords(self):
+        """Test that an empty automaton matches nothing"""
+        automaton = KeywordAutomaton()
+        automaton.build()
+        assert list(automaton.scan("anything")) == []
+
+
+class TestTriggerEngine:
+    """Test matching, cooldowns, probability and reloading"""
+
+    def test_keyword_trigger(self):
+        """Test that a keyword anywhere in the message fires, case-insensitively"""
+        engine = engine_with({"name": "always", "keywords": ["alwase", "alwse"], "responses": ["always!"]})
+        assert engine.respond("I ALWASE do that", now=0) == "always!"
+
+    def test_unmatched_message_gets_no_reply(self):
+        """Test that ordinary chat does not get a catch-all reply"""
+        engine = engine_with({"name": "dms", "keywords": ["dms"], "responses": ["dms? PauseChamp"]})
+        assert engine.respond("hello chat", now=0) is None
+
+    def test_whole_word(self):
+        """Test that whole-word triggers ignore matches inside other words"""
+        engine = engine_with({"name": "dms", "keywords": ["dms"], "whole_word": True, "responses": ["dms?"]})
+        assert engine.respond("admsx", now=0) is None
+        assert engine.respond("check your dms!", now=0) == "dms?"
+
+    def test_regex_needs_keyword_and_pattern(self):
+        """Test that a regex trigger fires only when its pattern also matches"""
+        engine = engine_with({"name": "gg", "keywords": ["gg"], "regex": r"^gg\b", "responses": ["GG WP"]})
+        assert engine.respond("that was gg", now=0) is None
+        assert engine.respond("gg ez", now=0) == "GG WP"
+
+    def test_unanchored_regex(self):
+        """Test that regex triggers without keywords still run"""
+        engine = engine_with({"name": "digits", "regex": r"\d{4}", "responses": ["numbers!"]})
+        assert engine.respond("code 1234", now=0) == "numbers!"
+
+    def test_cooldown_is_per_trigger_and_channel(self):
+        """Test that a trigger waits out its cooldown in each channel separately"""
+        engine = engine_with({"name": "dms", "keywords": ["dms"], "responses": ["dms?"], "cooldown": 30})
+        assert engine.respond("dms", "peks", now=100) == "dms?"
+        assert engine.respond("dms", "peks", now=110) is None
+        assert engine.respond("dms", "other", now=110) == "dms?"
+        assert engine.respond("dms", "peks", now=131) == "dms?"
+
+    def test_probability(self, monkeypatch):
+        """Test that a trigger only fires within its probability"""
+        engine = engine_with({"name": "lul", "keywords": ["lul"], "responses": ["LUL"], "probability": 0.2, "cooldown": 0})
+        monkeypatch.setattr("triggers.random.random", lambda: 0.5)
+        assert engine.respond("LUL", now=0) is None
+        monkeypatch.setattr("triggers.random.random", lambda: 0.1)
+        assert engine.respond("LUL", now=1) == "LUL"
+
+    def test_first_trigger_in_file_wins(self):
+        """Test that file order decides between several matching triggers"""
+        engine = engine_with(
+            {"name": "first", "keywords": ["world"], "responses": ["first"]},
+            {"name": "second", "keywords": ["hello"], "responses": ["second"]},
+        )
+        assert engine.respond("hello world", now=0) == "first"
+
+    def test_load_and_bad_file(self, tmp_path):
+        """Test that a broken triggers file keeps the previous set"""
+        path = tmp_path / "triggers.json"
+        path.write_text(json.dumps({"triggers": [{"name": "a", "keywords": ["a"], "responses": ["A"]}]}))
+        engine = TriggerEngine(path=str(path))
+        assert engine.load()
+        assert len(engine.triggers) == 1
+
+        path.write_text(json.dumps({"triggers": [{"name": "broken", "responses": ["x"]}]}))
+        assert not engine.load()
+        assert [t.name for t in engine.triggers] == ["a"]
+
+    def test_shipped_triggers_file_is_valid(self):
+        """Test that the repository's triggers.json parses"""
+        with open(os.path.join(os.path.dirname(__file__), "..", "triggers.json")) as f:
+            assert parse_triggers(json.load(f))
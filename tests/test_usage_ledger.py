@@ -0,0 +1,127 @@
+"""
+Tests for AI token and cost accounting
+"""
+
+import asyncio
+import json
+import threading
+import pytest
+from types import SimpleNamespace
+from usage_ledger import UsageLedger, price
+from constants import Models
+
+
+def usage(prompt_tokens, completion_tokens):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+class TestPricing:
+    """Test the pricing table lookups"""
+
+    def test_known_model(self):
+        """Test that cost follows the per-million-token rates"""
+        input_rate, output_rate = Models.PRICING["gpt-4o-mini"]
+        assert price("gpt-4o-mini", 1_000_000, 1_000_000) == input_rate + output_rate
+
+    def test_unknown_model_is_priced_high(self):
+        """Test that unknown models are charged at the most expensive rate"""
+        assert price("mystery-model", 1000, 1000) >= price("gpt-4o", 1000, 1000)
+
+
+class TestUsageLedger:
+    """Test aggregation, budgets and rollups"""
+
+    def test_record_aggregates_by_dimension(self, tmp_path):
+        """Test that usage is totalled per user, channel and model"""
+        ledger = UsageLedger(path=str(tmp_path / "usage.json"))
+        ledger.record("Alice", "peks", "gpt-3.5-turbo", usage(100, 50))
+        ledger.record("bob", "peks", "gpt-3.5-turbo", usage(200, 50))
+
+        assert ledger.spent("user", "alice") == price("gpt-3.5-turbo", 100, 50)
+        assert ledger.spent("channel", "peks") == pytest.approx(price("gpt-3.5-turbo", 300, 100))
+        assert ledger.totals().requests == 2
+        assert ledger.top("user")[0][0] == "bob"
+
+    def test_missing_usage_is_ignored(self, tmp_path):
+        """Test that responses without usage do not break accounting"""
+        ledger = UsageLedger(path=str(tmp_path / "usage.json"))
+        assert ledger.record("alice", "peks", "gpt-4o", None) == 0.0
+        assert ledger.totals().requests == 0
+
+    def test_downgrade_near_budget(self, tmp_path):
+        """Test that the budget model is used once most of a budget is spent"""
+        ledger = UsageLedger(path=str(tmp_path / "usage.json"), user_budget=0.001, channel_budget=0)
+        ledger.record("alice", "peks", "gpt-4o", usage(350, 0))  # $0.000875
+        assert ledger.check("alice", "peks", "gpt-4o") == (True, Models.AI_BUDGET_MODEL)
+        assert ledger.check("bob", "peks", "gpt-4o") == (True, "gpt-4o")
+
+    def test_throttle_when_budget_spent(self, tmp_path):
+        """Test that requests are refused once a channel budget is used up"""
+        ledger = UsageLedger(path=str(tmp_path / "usage.json"), user_budget=0, channel_budget=0.001)
+        ledger.record("alice", "peks", "gpt-4o", usage(1000, 0))
+        allowed, _ = ledger.check("bob", "peks", "gpt-4o")
+        assert not allowed
+        assert ledger.stats()["throttled"] == 1
+
+    def test_budget_override(self, tmp_path):
+        """Test that a per-channel override replaces the default budget"""
+        ledger = UsageLedger(path=str(tmp_path / "usage.json"), user_budget=0, channel_budget=0.001)
+        ledger.set_budget("channel", "Peks", 0)
+        ledger.record("alice", "peks", "gpt-4o", usage(1000, 0))
+        assert ledger.check("alice", "peks", "gpt-4o") == (True, "gpt-4o")
+
+    def test_rollup_round_trip(self, tmp_path):
+        """Test that a rollup can be loaded back"""
+        path = tmp_path / "usage.json"
+        ledger = UsageLedger(path=str(path))
+        ledger.record("alice", "peks", "gpt-4o-mini", usage(100, 20))
+        assert ledger.rollup()
+        assert not ledger.rollup()  # Nothing changed since
+        assert "days" in json.loads(path.read_text())
+
+        restored = UsageLedger(path=str(path))
+        restored.load()
+        assert restored.spent("user", "alice") == ledger.spent("user", "alice")
+
+    @pytest.mark.asyncio
+    async def test_async_rollup_writes_a_snapshot(self, tmp_path, monkeypatch):
+        """Test that the scheduled rollup writes off the loop and keeps usage recorded during the write"""
+        path = tmp_path / "usage.json"
+        ledger = UsageLedger(path=str(path))
+        ledger.record("alice", "peks", "gpt-4o-mini", usage(100, 20))
+        write = ledger._write
+        release = threading.Event()
+
+        def slow_write(data):
+            # Runs in a worker thread while the loop records more usage
+            assert threading.current_thread() is not threading.main_thread()
+            release.wait(1)
+            write(data)
+
+        monkeypatch.setattr(ledger, "_write", slow_write)
+        rollup = asyncio.create_task(ledger.rollup_async())
+        await asyncio.sleep(0.01)
+        ledger.record("bob", "peks", "gpt-4o-mini", usage(100, 20))
+        release.set()
+        assert await rollup
+
+        on_disk = UsageLedger(path=str(path))
+        on_disk.load()
+        assert on_disk.spent("user", "alice") > 0
+        assert on_disk.spent("user", "bob") == 0
+        assert await ledger.rollup_async()  # Bob's usage is still pending
+        assert not await ledger.rollup_async()
+
+    def test_checkpoint_round_trip(self, tmp_path):
+        """Test that spend survives a checkpoint restore and is rolled up afterwards"""
+        ledger = UsageLedger(path=str(tmp_path / "old.json"))
+        ledger.record("alice", "peks", "gpt-4o-mini", usage(100, 20))
+        ledger.set_budget("user", "alice", 2.0)
+        snapshot = ledger.snapshot_state()
+        ledger.record("alice", "peks", "gpt-4o-mini", usage(100, 20))  # Snapshot is detached
+
+        restored = UsageLedger(path=str(tmp_path / "new.json"))
+        restored.restore_state(snapshot)
+        assert restored.spent("user", "alice") == pytest.approx(price("gpt-4o-mini", 100, 20))
+        assert restored.budget("user", "alice") == 2.0
+        assert restored.rollup()
@@ -3,11 +3,14 @@ Tests for utility functions
 """
 
 import pytest
-from unittest.mock import patch, MagicMock
+import http_client
+import retry_utils
+from constants import Urls
 from utils import (
     suggest_alwase_variants,
     shazdm,
-    translate_text_to_english
+    translate_text_to_english,
+    fetch_joke
 )
 
 
@@ -35,36 +38,53 @@ class TestUtilityFunctions:
         assert isinstance(result, str)
         assert len(result) > 0
 
+    @pytest.fixture
+    def translate_api(self, local_http_server, monkeypatch):
+        """Point the translator at the stand-in server"""
+        monkeypatch.setattr(Urls, "GOOGLE_TRANSLATE_API", f"{local_http_server.url}/translate_a/single")
+        monkeypatch.setattr(retry_utils, "_breakers", {})
+        monkeypatch.setattr(retry_utils.API_RETRY_CONFIG, "initial_delay", 0)
+        return local_http_server
+
     @pytest.mark.asyncio
-    async def test_translate_text_to_english(self):
+    async def test_translate_text_to_english(self, translate_api):
         """Test translation functionality"""
-        with patch('utils.GoogleTranslator') as mock_translator_class:
-            # Setup mock
-            mock_translator = MagicMock()
-            mock_translator.translate.return_value = "Hello world"
-            mock_translator_class.return_value = mock_translator
-            
-            # Test translation
-            result, source_lang = translate_text_to_english("Hola mundo")
-            
-            assert result == "Hello world"
-            assert source_lang == "auto"
-            mock_translator.translate.assert_called_once_with("Hola mundo")
+        translate_api.routes["/translate_a/single"] = (
+            200, [[["Hello ", "Hola ", None, None], ["world", "mundo", None, None]], None, "es"]
+        )
+
+        result, source_lang = await translate_text_to_english("Hola mundo")
+
+        assert result == "Hello world"
+        assert source_lang == "es"
+        assert "q=Hola+mundo" in translate_api.requests[0]
+        await http_client.close_session()
 
     @pytest.mark.asyncio
-    async def test_translate_text_error_handling(self):
+    async def test_translate_text_error_handling(self, translate_api):
         """Test translation error handling"""
-        with patch('utils.GoogleTranslator') as mock_translator_class:
-            # Setup mock to raise exception
-            mock_translator = MagicMock()
-            mock_translator.translate.side_effect = Exception("Translation error")
-            mock_translator_class.return_value = mock_translator
-            
-            # Test error handling
-            result, source_lang = translate_text_to_english("test text")
-            
-            assert "Error translating" in result
-            assert source_lang is None
+        translate_api.routes["/translate_a/single"] = (500, {"error": "Translation error"})
+
+        result, source_lang = await translate_text_to_english("test text")
+
+        assert "Error translating" in result
+        assert source_lang is None
+        await http_client.close_session()
+
+    @pytest.mark.asyncio
+    async def test_fetch_joke(self, local_http_server, monkeypatch, caplog):
+        """Test fetching a joke, and None with a logged warning when the service fails"""
+        monkeypatch.setattr(Urls, "DAD_JOKE_API", f"{local_http_server.url}/")
+        monkeypatch.setattr(retry_utils, "_breakers", {})
+        monkeypatch.setattr(retry_utils.API_RETRY_CONFIG, "initial_delay", 0)
+        local_http_server.routes["/"] = (200, {"id": "1", "joke": "I'm reading a book on anti-gravity."})
+
+        assert await fetch_joke() == "I'm reading a book on anti-gravity."
+
+        local_http_server.routes["/"] = (503, {})
+        assert await fetch_joke() is None
+        assert "Error fetching joke" in caplog.text
+        await http_client.close_session()
 
 
 class TestStringManipulation:
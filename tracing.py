@@ -0,0 +1,247 @@
+"""
+Optional per-message tracing with a latency breakdown.
+
+A sampled chat message gets a Trace, and the steps it goes through mark
+themselves with ``span("name")``. The active trace lives in a ContextVar,
+so it follows the message through awaits without being passed around.
+When tracing is off, or the message wasn't sampled, ``span`` is a single
+ContextVar lookup returning a shared no-op context manager. Finished
+traces slower than a threshold are kept in a small ring buffer that
+?slowtraces and the local /traces endpoint read from.
+"""
+import logging
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+from constants import Numbers
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+
+class _NoopSpan:
+    """Stands in for a span or trace when nothing is being recorded."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+@dataclass
+class SpanRecord:
+    """One finished step of a trace."""
+    name: str
+    offset: float  # Seconds from the start of the trace
+    duration: float
+    depth: int
+    error: Optional[str] = None
+
+
+class _Span:
+    __slots__ = ("trace", "name", "started", "depth")
+
+    def __init__(self, trace: "Trace", name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.depth = self.trace._depth
+        self.trace._depth += 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        ended = time.perf_counter()
+        self.trace._depth -= 1
+        self.trace.spans.append(SpanRecord(
+            self.name,
+            self.started - self.trace.started,
+            ended - self.started,
+            self.depth,
+            exc_type.__name__ if exc_type else None,
+        ))
+        return False
+
+
+class Trace:
+    """Timeline of the spans one chat message went through."""
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs: Dict[str, Any] = dict(attrs or {})
+        self.wall_time = time.time()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[SpanRecord] = []
+        self._depth = 0
+
+    def span(self, name: str) -> _Span:
+        """Context manager timing one step of this trace."""
+        return _Span(self, name)
+
+    def breakdown(self) -> str:
+        """Spans in start order, e.g. "get_context 2ms, dispatch 810ms > ai_queue 800ms"."""
+        parts = []
+        for record in sorted(self.spans, key=lambda record: record.offset):
+            text = f"{record.name} {record.duration * 1000:.0f}ms"
+            if record.error:
+                text += f" ({record.error})"
+            parts.append(("> " * record.depth) + text)
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        """One line for chat: total time, what the message was and where the time went."""
+        label = " ".join(f"{key}={value}" for key, value in self.attrs.items())
+        total = (self.duration or 0) * 1000
+        return f"{total:.0f}ms {self.name} {label}: {self.breakdown() or 'no spans'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "attrs": self.attrs,
+            "started": self.wall_time,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "spans": [
+                {
+                    "name": record.name,
+                    "offset_ms": round(record.offset * 1000, 3),
+                    "duration_ms": round(record.duration * 1000, 3),
+                    "depth": record.depth,
+                    "error": record.error,
+                }
+                for record in sorted(self.spans, key=lambda record: record.offset)
+            ],
+        }
+
+
+class _TraceScope:
+    __slots__ = ("tracer", "trace", "token")
+
+    def __init__(self, tracer: "Tracer", trace: Trace):
+        self.tracer = tracer
+        self.trace = trace
+
+    def __enter__(self) -> Trace:
+        self.token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc) -> bool:
+        _current.reset(self.token)
+        self.trace.duration = time.perf_counter() - self.trace.started
+        self.tracer.finish(self.trace)
+        return False
+
+
+class Tracer:
+    """Samples traces and keeps the recent slow ones."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        slow_ms: float = Numbers.TRACE_SLOW_MS,
+        capacity: int = Numbers.TRACE_BUFFER_SIZE,
+    ):
+        """
+        Args:
+            sample_rate: Fraction of messages traced, 0 to 1; 0 turns tracing off
+            slow_ms: Traces at least this long are kept and logged
+            capacity: Slow traces kept, oldest dropped first
+        """
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._slow: Deque[Trace] = deque(maxlen=capacity)
+        self.traced = 0
+        self.slow = 0
+
+    def configure(self, sample_rate: float, slow_ms: float) -> None:
+        """Change sampling at runtime; kept traces are left alone."""
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.slow_ms = slow_ms
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def trace(self, name: str, **attrs: Any):
+        """
+        Context manager making a new trace current, if this message is sampled.
+
+        Yields the Trace, or None when it wasn't sampled.
+        """
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return _NOOP
+        return _TraceScope(self, Trace(name, attrs))
+
+    def finish(self, trace: Trace) -> None:
+        """Record a completed trace, keeping it if it was slow."""
+        self.traced += 1
+        if trace.duration * 1000 < self.slow_ms:
+            return
+        self.slow += 1
+        self._slow.append(trace)
+        logger.info(
+            "Slow %s took %.0fms: %s", trace.name, trace.duration * 1000, trace.breakdown(),
+            extra={"trace": trace.to_dict()},
+        )
+
+    def slowest(self, count: int = Numbers.TRACE_DUMP_COUNT) -> List[Trace]:
+        """The slowest kept traces, slowest first."""
+        return sorted(self._slow, key=lambda trace: trace.duration, reverse=True)[:count]
+
+    def clear(self) -> None:
+        self._slow.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for health reporting."""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "traced": self.traced,
+            "slow": self.slow,
+            "kept": len(self._slow),
+        }
+
+
+def current() -> Optional[Trace]:
+    """The trace of the message being handled, if it is sampled."""
+    return _current.get()
+
+
+def span(name: str, trace: Optional[Trace] = None):
+    """
+    Time a step of the current trace.
+
+    Args:
+        name: Step name shown in the breakdown
+        trace: Trace to record into; defaults to the current one. Pass it
+            explicitly from work that runs in another task, e.g. a callback
+            handed to a worker queue.
+    """
+    trace = trace or _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name)
+
+
+def annotate(**attrs: Any) -> None:
+    """Attach fields such as channel or command to the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+# Global tracer, configured from TRACE_SAMPLE_RATE and TRACE_SLOW_MS by the bot
+tracer = Tracer()
@@ -0,0 +1,137 @@
+"""
+Translation subsystem for the ?t command.
+
+Sits in front of the remote translator with a bounded LRU cache keyed by
+normalized text, a local check that skips the remote call for text that is
+already English, and single-flight deduplication so identical requests
+arriving together share one remote call.
+"""
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from constants import Messages, Numbers
+from utils import translate_text_to_english
+
+logger = logging.getLogger(__name__)
+
+TranslateBackend = Callable[[str], Awaitable[Tuple[str, Optional[str]]]]
+
+# Frequent English words that aren't also common words in other Latin-script
+# languages ("no", "me", "a", "in", "was", "so" ... are left out); enough of
+# them in a message marks it as English
+ENGLISH_WORDS = frozenset("""
+about all always and are at back be been because but by can can't could did
+didn't does doing don't every for from game get go going good got had have
+help him his how i i'll i'm if it it's its just know like make more much my
+never not nothing now of on or our out people play please really right say
+see she should some something than thank thanks that that's the their them
+then there they thing think this time to today too true up us very want way
+we well were what what's when where which who why with would yes you you're
+your
+""".split())
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so trivially different requests share a cache entry."""
+    return " ".join(text.split()).casefold()
+
+
+def looks_english(text: str) -> bool:
+    """
+    Cheap local check for text that is clearly English already.
+
+    Returns True only when the text is plain ASCII and enough of its words
+    are common English words; anything uncertain goes to the translator.
+    """
+    if not text.isascii():
+        return False
+    words = _WORD_RE.findall(text.casefold())
+    if len(words) < Numbers.TRANSLATION_MIN_WORDS_FOR_DETECTION:
+        return False
+    english = sum(1 for word in words if word in ENGLISH_WORDS)
+    return english / len(words) >= Numbers.TRANSLATION_ENGLISH_WORD_RATIO
+
+
+class Translator:
+    """Caching, deduplicating front end for the remote translator."""
+
+    def __init__(self, backend: TranslateBackend = translate_text_to_english, max_entries: int = Numbers.TRANSLATION_CACHE_SIZE):
+        self.backend = backend
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    async def translate(self, text: str) -> Tuple[str, Optional[str]]:
+        """
+        Translate text to English.
+
+        Returns:
+            Tuple of (translation, source language code); the language is
+            None if translation failed
+        """
+        if looks_english(text):
+            self.skipped += 1
+            return text, "en"
+
+        key = normalize_text(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        # Someone already asked for this text; wait for their result
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self.backend(text)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Translation backend failed: {e}")
+            result = (Messages.ERROR_TRANSLATION, None)
+        finally:
+            del self._in_flight[key]
+
+        # Failures are not cached so the next request retries
+        if result[1] is not None:
+            self._store(key, result)
+        future.set_result(result)
+        return result
+
+    def _store(self, key: str, result: Tuple[str, str]) -> None:
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """Cache effectiveness for health reporting."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped_english": self.skipped,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Global translator instance
+translator = Translator()
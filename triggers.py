@@ -0,0 +1,246 @@
+"""
+Keyword and regex trigger engine for chat auto-responses.
+
+All trigger keywords are compiled into one Aho-Corasick automaton, so each
+message is scanned once no matter how many triggers exist. Regex triggers
+name the keywords they need, and their pattern only runs when one of those
+keywords shows up in the scan. Each trigger has its own per-channel cooldown
+and firing probability. The trigger set is loaded from triggers.json and
+reloaded when the file changes.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple
+
+from constants import Numbers, Paths
+from job_scheduler import JobScheduler, job_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton matching many keywords in one pass."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (keyword length, value) for every keyword ending there
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+    def add(self, keyword: str, value: Any) -> None:
+        """Add a keyword; call build() once all keywords are added."""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(keyword), value))
+
+    def build(self) -> None:
+        """Compute failure links breadth first."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Find every keyword occurrence.
+
+        Yields:
+            Tuples of (start, end, value) in order of end position
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in out[state]:
+                yield index - length + 1, index + 1, value
+
+
+@dataclass
+class Trigger:
+    """One auto-response rule."""
+    name: str
+    responses: List[str]
+    keywords: List[str] = field(default_factory=list)
+    pattern: Optional[Pattern] = None
+    whole_word: bool = False
+    cooldown: float = Numbers.TRIGGER_DEFAULT_COOLDOWN
+    probability: float = 1.0
+
+
+def parse_triggers(data: Dict[str, Any]) -> List[Trigger]:
+    """
+    Build triggers from the triggers.json structure.
+
+    Raises:
+        ValueError: If a trigger is malformed
+    """
+    triggers = []
+    for entry in data.get("triggers", []):
+        name = entry.get("name")
+        responses = entry.get("responses") or []
+        if not name or not responses:
+            raise ValueError(f"Trigger {entry!r} needs a name and at least one response")
+        keywords = [keyword.lower() for keyword in entry.get("keywords", []) if keyword]
+        regex = entry.get("regex")
+        if not keywords and not regex:
+            raise ValueError(f"Trigger '{name}' needs keywords or a regex")
+        try:
+            pattern = re.compile(regex, re.IGNORECASE) if regex else None
+        except re.error as e:
+            raise ValueError(f"Trigger '{name}' has an invalid regex: {e}") from e
+        probability = float(entry.get("probability", 1.0))
+        if not 0.0 <= probability <= 1.0:
+            raise ValueError(f"Trigger '{name}' probability must be between 0 and 1")
+        triggers.append(Trigger(
+            name=name,
+            responses=list(responses),
+            keywords=keywords,
+            pattern=pattern,
+            whole_word=bool(entry.get("whole_word", False)),
+            cooldown=float(entry.get("cooldown", Numbers.TRIGGER_DEFAULT_COOLDOWN)),
+            probability=probability,
+        ))
+    return triggers
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class TriggerEngine:
+    """Matches chat against the trigger set and picks auto-responses."""
+
+    def __init__(self, path: str = Paths.TRIGGERS_FILE):
+        self.path = path
+        self.triggers: List[Trigger] = []
+        self._automaton = KeywordAutomaton()
+        # Regex triggers without keywords have to run on every message
+        self._unanchored: List[int] = []
+        self._last_fired: Dict[Tuple[str, str], float] = {}
+        self.last_modified_time = 0.0
+
+        self.scanned = 0
+        self.fired = 0
+
+    def set_triggers(self, triggers: List[Trigger]) -> None:
+        """Replace the trigger set, keeping cooldowns of triggers that still exist."""
+        automaton = KeywordAutomaton()
+        for index, trigger in enumerate(triggers):
+            for keyword in trigger.keywords:
+                automaton.add(keyword, index)
+        automaton.build()
+
+        names = {trigger.name for trigger in triggers}
+        self._last_fired = {key: at for key, at in self._last_fired.items() if key[0] in names}
+        self._unanchored = [i for i, trigger in enumerate(triggers) if not trigger.keywords]
+        # Swap in one step so a message never sees half a trigger set
+        self.triggers, self._automaton = triggers, automaton
+
+    def load(self) -> bool:
+        """
+        Load triggers from disk; a broken file keeps the current set.
+
+        Returns:
+            True if the triggers were (re)loaded
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r") as f:
+                triggers = parse_triggers(json.load(f))
+            self.last_modified_time = os.path.getmtime(self.path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading triggers, keeping the current set: {e}")
+            return False
+        self.set_triggers(triggers)
+        logger.info(f"Loaded {len(triggers)} chat triggers")
+        return True
+
+    def matches(self, text: str) -> List[Trigger]:
+        """Triggers matching a message, in trigger file order."""
+        lowered = text.lower()
+        hits = set(self._unanchored)
+        for start, end, index in self._automaton.scan(lowered):
+            if index not in hits and (not self.triggers[index].whole_word or _is_word_boundary(lowered, start, end)):
+                hits.add(index)
+
+        matched = []
+        for index in sorted(hits):
+            trigger = self.triggers[index]
+            if trigger.pattern is None or trigger.pattern.search(text):
+                matched.append(trigger)
+        return matched
+
+    def respond(self, text: str, channel: str = "", now: Optional[float] = None) -> Optional[str]:
+        """
+        Pick the auto-response for a message, if any trigger fires.
+
+        Args:
+            text: Message text
+            channel: Channel the message came from; cooldowns are per channel
+            now: Current time, for tests
+
+        Returns:
+            A response, or None if nothing fired
+        """
+        self.scanned += 1
+        now = time.time() if now is None else now
+        for trigger in self.matches(text):
+            key = (trigger.name, channel)
+            if now - self._last_fired.get(key, float("-inf")) < trigger.cooldown:
+                continue
+            if trigger.probability < 1.0 and random.random() >= trigger.probability:
+                continue
+            self._last_fired[key] = now
+            self.fired += 1
+            return random.choice(trigger.responses)
+        return None
+
+    def start_watcher(self, scheduler: JobScheduler = job_scheduler) -> None:
+        """Schedule a job that reloads triggers when the file changes."""
+        scheduler.add_interval("trigger_watcher", self._check_file, Numbers.TRIGGER_RELOAD_INTERVAL)
+        logger.info("Started trigger file watcher job")
+
+    def _check_file(self) -> None:
+        try:
+            if os.path.exists(self.path) and os.path.getmtime(self.path) > self.last_modified_time:
+                logger.info("Triggers file modified, reloading...")
+                if not self.load():
+                    # Don't retry a broken file until it changes again
+                    self.last_modified_time = os.path.getmtime(self.path)
+        except OSError as e:
+            logger.error(f"Error watching triggers file: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Trigger counters for health reporting."""
+        return {"triggers": len(self.triggers), "scanned": self.scanned, "fired": self.fired}
+
+
+# Global trigger engine instance
+trigger_engine = TriggerEngine()
+trigger_engine.load()
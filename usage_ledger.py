@@ -0,0 +1,277 @@
+"""
+Token and cost accounting for OpenAI calls.
+
+Every completion's ``response.usage`` is priced from the model pricing table
+and added to per-day totals for each user, channel and model. Totals live in
+memory and are rolled up to disk periodically. Daily per-user and
+per-channel budgets downgrade to a cheaper model when spend gets close to
+the budget and refuse further requests once it is used up.
+"""
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from constants import Models, Numbers, Paths
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("user", "channel", "model")
+
+
+@dataclass
+class Usage:
+    """Accumulated usage for one user, channel or model on one day."""
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+
+def price(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Cost of a call in dollars.
+
+    Unknown models are priced as the most expensive known model so budgets
+    err on the safe side.
+    """
+    rates = Models.PRICING.get(model) or max(Models.PRICING.values())
+    input_rate, output_rate = rates
+    return (prompt_tokens * input_rate + completion_tokens * output_rate) / 1_000_000
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class UsageLedger:
+    """In-memory usage totals with disk rollups and daily budgets."""
+
+    def __init__(
+        self,
+        path: str = Paths.AI_USAGE_FILE,
+        user_budget: float = Numbers.AI_USER_DAILY_BUDGET,
+        channel_budget: float = Numbers.AI_CHANNEL_DAILY_BUDGET,
+        downgrade_ratio: float = Numbers.AI_BUDGET_DOWNGRADE_RATIO,
+        retention_days: int = Numbers.AI_USAGE_RETENTION_DAYS,
+    ):
+        """
+        Args:
+            path: JSON file rollups are written to
+            user_budget: Daily dollars per user; 0 disables the limit
+            channel_budget: Daily dollars per channel; 0 disables the limit
+            downgrade_ratio: Fraction of a budget after which the cheaper model is used
+            retention_days: Days of history kept on disk
+        """
+        self.path = path
+        self.user_budget = user_budget
+        self.channel_budget = channel_budget
+        self.downgrade_ratio = downgrade_ratio
+        self.retention_days = retention_days
+
+        # day -> dimension -> name -> usage
+        self._days: Dict[str, Dict[str, Dict[str, Usage]]] = {}
+        # Per-name budget overrides, e.g. a bigger allowance for the main channel
+        self.overrides: Dict[str, Dict[str, float]] = {"user": {}, "channel": {}}
+
+        self.throttled = 0
+        self.downgraded = 0
+        self._dirty = False
+
+    def _bucket(self, day: str, dimension: str, name: str) -> Usage:
+        return self._days.setdefault(day, {d: {} for d in DIMENSIONS})[dimension].setdefault(name, Usage())
+
+    def record(self, user: str, channel: str, model: str, usage: Any) -> float:
+        """
+        Add one completion's usage to today's totals.
+
+        Args:
+            user: Requesting user
+            channel: Channel the request came from
+            model: Model that served the request
+            usage: ``response.usage`` from the API; None is ignored
+
+        Returns:
+            Cost of the call in dollars
+        """
+        if usage is None:
+            return 0.0
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cost = price(model, prompt_tokens, completion_tokens)
+
+        day = _today()
+        for dimension, name in (("user", user.lower()), ("channel", channel.lower()), ("model", model)):
+            bucket = self._bucket(day, dimension, name)
+            bucket.requests += 1
+            bucket.prompt_tokens += prompt_tokens
+            bucket.completion_tokens += completion_tokens
+            bucket.cost += cost
+        self._dirty = True
+        return cost
+
+    def spent(self, dimension: str, name: str, day: Optional[str] = None) -> float:
+        """Dollars spent by a user, channel or model on a day (default today)."""
+        if dimension != "model":
+            name = name.lower()
+        usage = self._days.get(day or _today(), {}).get(dimension, {}).get(name)
+        return usage.cost if usage else 0.0
+
+    def budget(self, dimension: str, name: str) -> float:
+        """Daily budget for a user or channel; 0 means unlimited."""
+        default = self.user_budget if dimension == "user" else self.channel_budget
+        return self.overrides[dimension].get(name.lower(), default)
+
+    def set_budget(self, dimension: str, name: str, dollars: float) -> None:
+        """Override the daily budget of one user or channel."""
+        self.overrides[dimension][name.lower()] = dollars
+        self._dirty = True
+
+    def check(self, user: str, channel: str, model: str) -> Tuple[bool, str]:
+        """
+        Decide whether a request may run and on which model.
+
+        Returns:
+            Tuple of (allowed, model to use)
+        """
+        downgrade = False
+        for dimension, name in (("user", user), ("channel", channel)):
+            limit = self.budget(dimension, name)
+            if limit <= 0:
+                continue
+            spent = self.spent(dimension, name)
+            if spent >= limit:
+                self.throttled += 1
+                logger.warning(f"AI {dimension} budget exhausted for {name}: ${spent:.4f} of ${limit:.2f}")
+                return False, model
+            if spent >= limit * self.downgrade_ratio:
+                downgrade = True
+
+        if downgrade and model != Models.AI_BUDGET_MODEL:
+            self.downgraded += 1
+            logger.info(f"AI budget nearly used for {user}/{channel}, downgrading {model} to {Models.AI_BUDGET_MODEL}")
+            return True, Models.AI_BUDGET_MODEL
+        return True, model
+
+    def totals(self, day: Optional[str] = None) -> Usage:
+        """Usage across all models on a day (default today)."""
+        total = Usage()
+        for usage in self._days.get(day or _today(), {}).get("model", {}).values():
+            total.requests += usage.requests
+            total.prompt_tokens += usage.prompt_tokens
+            total.completion_tokens += usage.completion_tokens
+            total.cost += usage.cost
+        return total
+
+    def top(self, dimension: str, limit: int = 5, day: Optional[str] = None):
+        """Biggest spenders in a dimension on a day, most expensive first."""
+        usages = self._days.get(day or _today(), {}).get(dimension, {})
+        return sorted(usages.items(), key=lambda item: item[1].cost, reverse=True)[:limit]
+
+    def _prune(self) -> None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for day in [d for d in self._days if d < cutoff]:
+            del self._days[day]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable copy of the ledger."""
+        return {
+            "days": {
+                day: {dimension: {name: asdict(usage) for name, usage in names.items()} for dimension, names in dims.items()}
+                for day, dims in self._days.items()
+            },
+            "overrides": {dimension: dict(names) for dimension, names in self.overrides.items()},
+        }
+
+    def load_dict(self, data: Dict[str, Any]) -> None:
+        """Replace the ledger contents with a to_dict() copy."""
+        self._days = {
+            day: {dimension: {name: Usage(**usage) for name, usage in dims.get(dimension, {}).items()} for dimension in DIMENSIONS}
+            for day, dims in data.get("days", {}).items()
+        }
+        overrides = data.get("overrides", {})
+        self.overrides = {dimension: dict(overrides.get(dimension, {})) for dimension in ("user", "channel")}
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Detached copy of the ledger for checkpoints and hot restart handoffs."""
+        return self.to_dict()
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Adopt a checkpointed ledger; it is newer than the last rollup, so roll it up next time."""
+        self.load_dict(state)
+        self._dirty = True
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def rollup(self) -> bool:
+        """
+        Write the ledger to disk if it changed since the last rollup.
+
+        Blocks the caller; used at shutdown and before a restart, when
+        nothing else is left to run. The scheduled rollup uses rollup_async.
+
+        Returns:
+            True if the file was written
+        """
+        if not self._dirty:
+            return False
+        self._prune()
+        try:
+            self._write(self.to_dict())
+        except OSError as e:
+            logger.error(f"Failed to roll up AI usage: {e}")
+            return False
+        self._dirty = False
+        logger.info(f"Rolled up AI usage: ${self.totals().cost:.4f} spent today")
+        return True
+
+    async def rollup_async(self) -> bool:
+        """
+        Snapshot the ledger on the event loop and write it in a worker thread.
+
+        Returns:
+            True if the file was written
+        """
+        if not self._dirty:
+            return False
+        self._prune()
+        data = self.to_dict()
+        # Cleared before the write so usage recorded meanwhile makes the next rollup run
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, data)
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Failed to roll up AI usage: {e}")
+            return False
+        logger.info(f"Rolled up AI usage: ${self.totals().cost:.4f} spent today")
+        return True
+
+    def load(self) -> None:
+        """Load the last rollup from disk."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    self.load_dict(json.load(f))
+                logger.info(f"Loaded AI usage for {len(self._days)} days from disk")
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Failed to load AI usage: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Today's totals for health reporting."""
+        total = self.totals()
+        return {
+            "requests": total.requests,
+            "tokens": total.prompt_tokens + total.completion_tokens,
+            "cost": total.cost,
+            "throttled": self.throttled,
+            "downgraded": self.downgraded,
+        }
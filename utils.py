@@ -1,20 +1,55 @@
 # utils.py
 # Utility functions for MurphyAI Twitch Chat Bot
 
-from deep_translator import GoogleTranslator
+import logging
 
+import http_client
+from constants import Urls
 
-def translate_text_to_english(text):
+logger = logging.getLogger(__name__)
+
+
+async def translate_text_to_english(text):
+    """
+    Translate text to English, detecting the source language.
+
+    :param text: The text to translate.
+    :return: A tuple of (translation, source language code), or an error
+             message and None on failure.
+    """
     try:
-        # Detect language and translate to English
-        translator = GoogleTranslator(source='auto', target='en')
-        translation = translator.translate(text)
-        return translation, 'auto'  # deep-translator doesn't return source language easily
+        data = await http_client.get_json(
+            Urls.GOOGLE_TRANSLATE_API,
+            "translate",
+            params={"client": "gtx", "sl": "auto", "tl": "en", "dt": "t", "q": text},
+        )
+        # Response is [[[translated, original, ...], ...], None, source_lang, ...]
+        translation = "".join(segment[0] for segment in data[0] if segment and segment[0])
+        source_lang = data[2] if len(data) > 2 and data[2] else "auto"
+        return translation, source_lang
     except Exception as e:
-        print(f"Error translating text: {e}")
+        logger.warning(f"Error translating text: {e}")
         return "Error translating text. Please try again later.", None
 
 
+async def fetch_joke():
+    """
+    Fetch a random dad joke.
+
+    :return: The joke text, or None if the service could not be reached.
+    """
+    try:
+        data = await http_client.get_json(
+            Urls.DAD_JOKE_API,
+            "joke",
+            headers={"Accept": "application/json"},
+        )
+        return data["joke"]
+    except Exception as e:
+        logger.warning(f"Error fetching joke: {e}")
+        return None
+
+
 def format_queue(queue):
     """
     Formats the queue list into a string for display.
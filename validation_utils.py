@@ -10,11 +10,108 @@ logger = logging.getLogger(__name__)
 
 from constants import Numbers, Patterns, Commands, Security
 from type_definitions import ValidationResult
+from chat_filter import extract_features
 
 # Compile patterns
 COMMAND_NAME_PATTERN = re.compile(Patterns.COMMAND_NAME)
 USERNAME_PATTERN = re.compile(Patterns.USERNAME)
 TWITCH_EMOTE_PATTERN = re.compile(Patterns.TWITCH_EMOTE)
+URL_PATTERN = re.compile(Patterns.URL, re.IGNORECASE)
+SCRIPT_PATTERN = re.compile("|".join(Patterns.SCRIPT_INJECTION), re.IGNORECASE)
+# One alternation scans the prompt once instead of once per pattern
+AI_INJECTION_PATTERN = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in Patterns.AI_INJECTION_PATTERNS), re.IGNORECASE
+)
+# The same alternation for lowercased ASCII prompts; case-sensitive matching
+# is about three times faster than IGNORECASE on these '.*' patterns
+AI_INJECTION_PATTERN_LOWER = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in Patterns.AI_INJECTION_PATTERNS)
+)
+
+
+def _required_literals(pattern: str) -> Optional[List[str]]:
+    """Literal words a 'word.*word' pattern needs, or None if it has other syntax."""
+    pieces = pattern.split('.*')
+    return pieces if all(piece and re.escape(piece) == piece for piece in pieces) else None
+
+
+AI_INJECTION_LITERALS = [_required_literals(pattern) for pattern in Patterns.AI_INJECTION_PATTERNS]
+
+
+def _may_contain_script(text: str) -> bool:
+    # Every script pattern starts with '<' or 'alert'; substring checks are far
+    # cheaper than a regex scan and rule out almost all chat messages
+    return '<' in text or 'alert' in text.lower()
+
+
+def _may_contain_injection(lowered: str) -> bool:
+    # Plain loops; generator expressions cost more than the substring checks themselves
+    for literals in AI_INJECTION_LITERALS:
+        if literals is None:
+            return True
+        for literal in literals:
+            if literal not in lowered:
+                break
+        else:
+            return True
+    return False
+
+
+def _filter_injections(prompt: str) -> Tuple[str, Optional[str]]:
+    """
+    Replace prompt injection phrases with [FILTERED].
+
+    Returns:
+        Tuple of (filtered prompt, first phrase found or None)
+    """
+    if not prompt.isascii():
+        # Case-insensitive regex matching has non-ASCII equivalents; let the regex decide
+        match = AI_INJECTION_PATTERN.search(prompt)
+        if match is None:
+            return prompt, None
+        return AI_INJECTION_PATTERN.sub("[FILTERED]", prompt), match.group(0)
+
+    # ASCII lowercasing keeps every offset, so matches on the lowered copy
+    # can be cut out of the original in a single scan
+    lowered = prompt.lower()
+    if not _may_contain_injection(lowered):
+        return prompt, None
+    pieces = []
+    first = None
+    end = 0
+    for match in AI_INJECTION_PATTERN_LOWER.finditer(lowered):
+        start = match.start()
+        if first is None:
+            first = prompt[start:match.end()]
+        pieces.append(prompt[end:start])
+        pieces.append("[FILTERED]")
+        end = match.end()
+    if first is None:
+        return prompt, None
+    pieces.append(prompt[end:])
+    return "".join(pieces), first
+
+
+class _ControlCharTable(dict):
+    """
+    str.translate table that drops non-printable characters except newlines and tabs.
+
+    Entries are computed the first time a character is seen, so the table only
+    grows to the characters chat actually uses.
+    """
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        keep = char.isprintable() or char in '\n\t'
+        self[codepoint] = codepoint if keep else None
+        return self[codepoint]
+
+
+CONTROL_CHAR_TABLE = _ControlCharTable()
+for _codepoint in range(128):
+    CONTROL_CHAR_TABLE[_codepoint]
+# ASCII control characters, for bytes.translate deletion on ASCII text
+ASCII_CONTROL_CHARS = bytes(codepoint for codepoint in range(128) if CONTROL_CHAR_TABLE[codepoint] is None)
 
 
 def sanitize_input(text: str, max_length: int = Numbers.MAX_MESSAGE_LENGTH) -> str:
@@ -34,19 +131,23 @@ def sanitize_input(text: str, max_length: int = Numbers.MAX_MESSAGE_LENGTH) -> s
     # Truncate to max length
     text = text[:max_length]
 
-    # Remove potential script tags
-    text = re.sub(r"<\s*script[^>]*>", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"<\s*/\s*script\s*>", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"alert\s*\(.*?\)", "", text, flags=re.IGNORECASE)
-
-    # Remove control characters except newlines and tabs
-    text = ''.join(char for char in text if char.isprintable() or char in '\n\t')
+    # Remove control characters except newlines and tabs; done first so they
+    # cannot be used to split a script tag past the pattern below
+    if not text.isprintable():
+        if text.isascii():
+            # Deleting bytes is several times faster than a str.translate mapping
+            text = text.encode("ascii").translate(None, ASCII_CONTROL_CHARS).decode("ascii")
+        else:
+            text = text.translate(CONTROL_CHAR_TABLE)
 
-    # Remove multiple consecutive spaces
-    text = re.sub(r'\s+', ' ', text)
+    # Remove potential script tags, repeating in case a removal joins a new match
+    while _may_contain_script(text):
+        text, removed = SCRIPT_PATTERN.subn("", text)
+        if not removed:
+            break
 
-    # Trim whitespace
-    text = text.strip()
+    # Collapse consecutive whitespace and trim
+    text = " ".join(text.split())
 
     return text
 
@@ -153,20 +254,9 @@ def sanitize_ai_prompt(prompt: str) -> str:
     prompt = sanitize_input(prompt, Numbers.MAX_MESSAGE_LENGTH)
 
     # Remove potential command injections
-    injection_patterns = [
-        r'ignore.*previous.*instructions',
-        r'disregard.*above',
-        r'forget.*everything',
-        r'system.*prompt',
-        r'you.*are.*now',
-        r'act.*as.*if',
-        r'pretend.*you.*are',
-    ]
-
-    for pattern in injection_patterns:
-        if re.search(pattern, prompt, re.IGNORECASE):
-            logger.warning(f"Potential prompt injection detected: {pattern}")
-            prompt = re.sub(pattern, "[FILTERED]", prompt, flags=re.IGNORECASE)
+    prompt, found = _filter_injections(prompt)
+    if found is not None:
+        logger.warning("Potential prompt injection detected: %r", found[:50])
 
     return prompt
 
@@ -181,26 +271,13 @@ def validate_url(url: str) -> Tuple[bool, Optional[str]]:
     if not url:
         return False, "URL cannot be empty"
 
-    # Basic URL pattern
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE
-    )
-
-    if not url_pattern.match(url):
+    if not URL_PATTERN.match(url):
         return False, "Invalid URL format"
 
     # Check for suspicious patterns
-    suspicious_patterns = [
-        'javascript:', 'data:', 'vbscript:', 'file://'
-    ]
-
-    for pattern in suspicious_patterns:
-        if pattern in url.lower():
+    lowered = url.lower()
+    for pattern in Security.SUSPICIOUS_URL_PATTERNS:
+        if pattern in lowered:
             return False, f"URL contains suspicious pattern: {pattern}"
 
     return True, None
@@ -240,19 +317,18 @@ def validate_message_content(message: str, context: str = "general") -> Tuple[bo
     if len(message) > Numbers.MAX_MESSAGE_LENGTH:
         return False, f"Message too long (max {Numbers.MAX_MESSAGE_LENGTH} characters)"
 
+    features = extract_features(message)
+
     # Check for spam patterns
-    if message.count(message[0]) == len(message) and len(message) > 5:
+    if features.single_char and features.length > Numbers.SPAM_MIN_REPEAT_LENGTH:
         return False, "Message appears to be spam"
 
-    # Check for excessive caps (more than 70% caps)
-    if len(message) > 10:
-        caps_count = sum(1 for c in message if c.isupper())
-        if caps_count / len(message) > 0.7:
-            return False, "Message contains too many capital letters"
+    # Check for excessive caps
+    if features.length > Numbers.SPAM_MIN_CAPS_LENGTH and features.caps_ratio > Numbers.MAX_EXCESSIVE_CAPS_RATIO:
+        return False, "Message contains too many capital letters"
 
     # Check for excessive special characters
-    special_count = sum(1 for c in message if not c.isalnum() and not c.isspace())
-    if special_count > len(message) * 0.5:
+    if features.special_ratio > Numbers.MAX_SPECIAL_CHARS_RATIO:
         return False, "Message contains too many special characters"
 
     return True, None